@@ -1,16 +1,27 @@
+import numpy as np
 import pandas as pd
 from collections import OrderedDict
 from datetime import datetime
  
 from simulation import Simulation
+from simulation_batch import Simulation_Batch
 from evaluation.sensitivity import Sensitivity_analysis
 from evaluation.economics import Economics
+from evaluation.economics_batch import Economics_Batch
 from evaluation.performance import Performance
 from evaluation.dispatch_eval import Dispatch_Eval
+from evaluation.results_store import Results_Store
+from evaluation.surrogate import Surrogate_Model
 from evaluation.graphics import Graphics
+from evaluation.plot_queue import Plot_Queue
 from data_manager import *
+from checkpoint import Checkpoint
+from profiler import Profiler, profile_phase
 
 from optimization.PyomoMain import Optimization_model
+from optimization.fixed_point import Fixed_Point
+from optimization.decomposition import Decomposition
+from optimization.solver_cache import Solver_Cache
 
 def Main():
     #%% Define simulation settings 
@@ -20,14 +31,45 @@ def Main():
     simulation_steps = 24*31*1
     #declare if run needs to be saved
     save_data = False
+    #file format of saved run ('csv', or typed and compressed columnar files with run metadata: 'parquet', 'hdf5')
+    save_data_format = 'csv'
+    #declare if run state is checkpointed, to resume after a crash or a solver failure
+    checkpoint_run = False
+    #declare if run is resumed from latest checkpoint
+    resume_run = False
+    run_checkpoint = None
+    resume_state = None
+    #declare if run time and call counts of phases and components are profiled
+    profile_run = False
+    #declare if peak memory and allocations per phase are profiled as well (slows down run)
+    profile_memory = False
+    profiler = None
+    if profile_run:
+        profiler = Profiler(memory=profile_memory)
+    if checkpoint_run:
+        run_checkpoint = Checkpoint(directory='data/Checkpoints', 
+                                    interval=1)
     
     #%% Create Simulation instance
     sim = Simulation(simulation_steps=simulation_steps,
-                     timestep=timestep)
+                     timestep=timestep,
+                     profiler=profiler)
     plot_simulation_results = True
+    #headless plotting: plots are recorded and rendered by worker processes to files (instead of drawn in the run)
+    plot_headless = False
+    #directory and file formats ('png', 'svg', 'pdf') of rendered plots
+    plot_directory = 'data/Plots'
+    plot_formats = ['png']
+    plot_queue = None
+    if plot_headless:
+        plot_queue = Plot_Queue(directory=plot_directory,
+                                formats=plot_formats)
+    if checkpoint_run:
+        sim.checkpoint = Checkpoint(directory='data/Checkpoints', 
+                                    interval=24*30)
     
     #Call Main Simulation methods
-    sim.simulate()  
+    sim.simulate(resume=resume_run)  
     
     #%%Define pyomo optimization settings
     #declare whether model needs to be optimized with Pyomo-model addon
@@ -36,8 +78,32 @@ def Main():
     #toggle multiobjective optimsation objectives
     opt_pv = True  
     opt_bat = True
+    #solve a linearized model (fixed efficiencies, linear sizing) with an LP solver (HiGHS, GLPK) instead of the NLP with Ipopt, e.g. for screening studies
+    linear_opt = False
+    #solve the NLP and the linear model on the same data before the first optimization run of each sample and print the objective difference
+    compare_opt_formulations = False
     #maximal number of iterations per optimisation run
     max_opt_iterations = 30
+    #acceleration of the efficiency vectors exchanged between simulation and optimization (None: cost criterion only, 'plain', 'relaxation' or 'anderson')
+    fixed_point_strategy = None
+    #convergence criterion of the iteration with fixed_point_strategy ('cost' or 'vectors': relative residual of the efficiency vectors below tolerance)
+    fixed_point_convergence = 'cost'
+    #iterations needed without acceleration on the same case, to report the iterations saved (optional)
+    fixed_point_reference = None
+    #solve the model in blocks of time steps linked by their boundary states of charge (None: whole horizon at once, 'month' or number of blocks)
+    decomposition_blocks = None
+    #number of worker processes solving the blocks in parallel (None: number of cpu cores)
+    decomposition_workers = None
+    #directory of the on-disk cache of solutions of identical model data, e.g. for repeated sensitivity runs (None: no cache)
+    solver_cache_directory = None
+    #start solves without cached solution from the solution of the closest cached model data
+    solver_cache_warm_start = False
+    solver_cache = None
+    if solver_cache_directory is not None:
+        solver_cache = Solver_Cache(directory=solver_cache_directory,
+                                    warm_start=solver_cache_warm_start)
+    #records of model size, timings and solver results of each solve over all iterations and sensitivity samples
+    solver_stats = list()
     
     #create optimization instance
     if optimization:
@@ -47,12 +113,28 @@ def Main():
             simulation = sim, 
             opt_pv_size = opt_pv,
             opt_batt_size = opt_bat)
+        opt_model.checkpoint = run_checkpoint
+        opt_model.profiler = profiler
+        opt_model.linear_model = linear_opt
+        opt_model.solver_stats = solver_stats
+        if fixed_point_strategy is not None:
+            opt_model.fixed_point = Fixed_Point(strategy=fixed_point_strategy,
+                                                convergence=fixed_point_convergence,
+                                                reference_iterations=fixed_point_reference)
+        #one decomposition instance for all optimization models, which keeps its worker processes until the end of the run
+        decomposition = None
+        if decomposition_blocks is not None:
+            decomposition = Decomposition(blocks=decomposition_blocks,
+                                          workers=decomposition_workers)
+        opt_model.decomposition = decomposition
+        opt_model.solver_cache = solver_cache
     
     #%% initialize technical performance instance
     tech = Performance(simulation=sim,
                         opt_model = opt_model,
                         timestep=timestep,
                         optimization = optimization)
+    tech.plot_queue = plot_queue
     
     #%% inititalize dispatch evaluation instance
     dispatch = Dispatch_Eval(simulation=sim,
@@ -63,18 +145,81 @@ def Main():
     #%%Define sensitivity analysis settings
     sensitivity_analysis = False
     max_sens_samples = 20
+    #SQLite file each finished sample is written to, finished samples of the sweep are skipped when it is rerun (None: results in memory only)
+    sens_results_path = None
+    sens_sweep = 'sweep'
+    finished_samples = set()
+    #space-filling sample design instead of random draws (None, 'lhs', 'sobol' or 'saltelli' for Sobol indices of the objective)
+    sens_sampling = None
+    #number of samples of the design (base samples N of 'saltelli', which runs N*(number of parameters+2) samples)
+    sens_design_samples = 8
+    sens_seed = None
+    #ranges of the parameters of the design as factors of their base values
+    sens_parameter_space = {'pv_investment_costs': (0.8, 1.2),
+                            'battery_investment_costs': (0.5, 1.5),
+                            'load': (0.8, 1.2)}
+    #Gaussian process surrogate of objective and sizes selecting the next sample of the design (candidates) where it is most uncertain (needs sens_sampling)
+    sens_surrogate = False
+    #number of samples run in order of the design before the surrogate selects them, and number of samples run in total
+    sens_surrogate_initial = 5
+    sens_surrogate_samples = 15
+    #perturbation of the load timeseries of random samples ('independent' per step, 'global', 'daily' or 'ar1')
+    sens_load_perturbation = 'independent'
+    #simulate all samples of a sensitivity analysis without optimization at once as scenarios of a batched simulation (not with sens_surrogate)
+    sens_batch_simulation = True
+    sens_batch = None
     
     #create sensitivity analysis instance
     if sensitivity_analysis:
         sens = Sensitivity_analysis(simulation = sim,
                                     optimization = opt_model,
-                                    randomize_method = 1)
+                                    randomize_method = 1,
+                                    seed = sens_seed)
+        if sens_results_path is not None:
+            sens.results_store = Results_Store(path=sens_results_path,
+                                               sweep=sens_sweep)
         #declare input variables that need be changed
         sens_pv_investment_costs = list()
         for i in range(len(sim.pv)):
             sens_pv_investment_costs.append(sim.pv[i].investment_costs_specific)
         sens_battery_investment_costs = sim.battery.investment_costs_specific
         sens_load = sim.load_power_demand
+        if sens_sampling is not None:
+            sens.set_parameter_space(sens_parameter_space)
+            sens.generate_samples(sens_design_samples, method=sens_sampling, seed=sens_seed)
+            #unaltered base case followed by the samples of the design
+            max_sens_samples = len(sens.sample_design) + 1
+            if sens_surrogate:
+                sens.surrogate = Surrogate_Model(bounds=list(sens_parameter_space.values()),
+                                                 seed=sens_seed)
+                max_sens_samples = min(sens_surrogate_samples, max_sens_samples)
+        sens_base_inputs = {'pv_investment_costs': sens_pv_investment_costs,
+                            'battery_investment_costs': sens_battery_investment_costs,
+                            'load': sens_load}
+        
+        #inputs of all samples are drawn in order and the samples are simulated at once (first sample: unaltered base case)
+        if sens_batch_simulation and not optimization and not sens_surrogate:
+            sens_sample_inputs = [sens_base_inputs]
+            sens_sample_rows = [None]
+            for sample in range(1, max_sens_samples):
+                sens_sample_inputs.append(sens.draw_sample_inputs(sample, sens_base_inputs, sens_surrogate_initial, sens_load_perturbation))
+                sens_sample_rows.append(sens.current_row)
+            sens.current_row = None
+            sens_batch = Simulation_Batch(simulation_steps=simulation_steps,
+                                          timestep=timestep,
+                                          scenarios=max_sens_samples,
+                                          load_power_demand=np.array([sample_inputs['load'] for sample_inputs in sens_sample_inputs]),
+                                          profiler=profiler)
+            for i in range(len(sens_batch.pv)):
+                sens_batch.pv[i].investment_costs_specific = np.array([sample_inputs['pv_investment_costs'][i] for sample_inputs in sens_sample_inputs])
+            sens_batch.battery.investment_costs_specific = np.array([sample_inputs['battery_investment_costs'] for sample_inputs in sens_sample_inputs])
+            with profile_phase(profiler, 'simulate batch'):
+                sens_batch.simulate()
+            #levelized costs of all components of all samples at once
+            with profile_phase(profiler, 'economics'):
+                sens_eco_batch, sens_eco_index = Economics_Batch.from_simulation_batch(sens_batch)
+                sens_eco_batch.calculate()
+            sens_batch.set_scenario(sim, 0)
         
     else:
         max_sens_samples = 1
@@ -82,6 +227,48 @@ def Main():
     #%%
     #%% Main optimization method 
     sens_iterations = 0
+    
+    #restore state of interrupted run from latest checkpoint
+    if resume_run and checkpoint_run and run_checkpoint.exists('main'):
+        resume_state = run_checkpoint.load('main')
+        sens_iterations = resume_state['sens_iterations'] - 1
+        sim.checkpoint = run_checkpoint
+        sim.load_checkpoint('main_simulation')
+        if optimization:
+            opt_model.load_checkpoint('main_optimization')
+        Checkpoint.set_state(tech, resume_state['tech'])
+        if sensitivity_analysis:
+            Checkpoint.set_state(sens, resume_state['sens'])
+        print('---------------------------------------------------------')
+        print('resuming sensitivity simulation', sens_iterations, 'at iteration', resume_state['iteration'])
+    #skip the samples of the sweep which are already finished in the results store
+    elif sensitivity_analysis and sens.results_store is not None:
+        finished_samples = sens.load_results()
+        while sens_iterations < max_sens_samples and sens_iterations+1 in finished_samples:
+            sens_iterations += 1
+            #randomized inputs of finished samples are drawn and discarded, so the next samples get the inputs of an uninterrupted sweep
+            if sens_iterations > 1 and sens.sample_design is None and sens_batch is None:
+                sens.draw_sample_inputs(sens_iterations-1, sens_base_inputs, sens_surrogate_initial, sens_load_perturbation)
+        if sens_iterations > 0:
+            print('---------------------------------------------------------')
+            print('resuming sensitivity analysis after', sens_iterations, 'finished samples of sweep', sens_sweep)
+            #first unfinished sample is a randomized sample or a sample of the design (or a scenario of the batched simulation)
+            if sens_batch is not None:
+                sens_batch.set_scenario(sim, sens_iterations)
+                sample_inputs = sens_sample_inputs[sens_iterations]
+                sens.current_row = sens_sample_rows[sens_iterations]
+            else:
+                sample_inputs = sens.draw_sample_inputs(sens_iterations, sens_base_inputs, sens_surrogate_initial, sens_load_perturbation)
+                #simulate the load profile of the sample
+                sim = Simulation(simulation_steps=simulation_steps,
+                                 timestep=timestep,
+                                 profiler=profiler)
+                sim.load.load_data = pd.Series(sample_inputs['load'])
+                sim.simulate()
+            for i in range(len(sim.pv)):
+                sim.pv[i].investment_costs_specific = sample_inputs['pv_investment_costs'][i]
+            sim.load_power_demand = sample_inputs['load']
+            sim.battery.investment_costs_specific = sample_inputs['battery_investment_costs']
     #loop for sensitivity analysis
     while sens_iterations < max_sens_samples:
         #get model start time to calculate program run-time
@@ -95,6 +282,8 @@ def Main():
         iteration_needed = True
         econ_recalc_needed = True
         iteration = 0
+        if resume_state is not None:
+            iteration = resume_state['iteration']
         
         sens_iterations +=1
         
@@ -103,6 +292,14 @@ def Main():
             iteration_needed = False
         
             # Initialize economic analysis instancees with simulation values for each sensitivity iteration
+            if econ_recalc_needed and sens_batch is not None:
+                #economics of current sample are taken from the batch of all samples
+                econ_recalc_needed = False
+                eco_pv = [sens_eco_batch.get_economics(sens_eco_index['pv_' + str(i)][sens_iterations-1]) for i in range(len(sim.pv))]
+                eco_pv_charger = sens_eco_batch.get_economics(sens_eco_index['pv_charger'][sens_iterations-1])
+                eco_bms = sens_eco_batch.get_economics(sens_eco_index['battery_management'][sens_iterations-1])
+                eco_bat = sens_eco_batch.get_economics(sens_eco_index['battery'][sens_iterations-1])
+            
             if econ_recalc_needed: 
                 #reset flag
                 econ_recalc_needed = False
@@ -131,17 +328,28 @@ def Main():
                                             timestep,
                                             simulation_steps)
                 #run economics module to obtain LCOEs to pass to pyomo optimization model
-                for i in range(len(sim.pv)):
-                    eco_pv[i].calculate()
-                
-                eco_pv_charger.calculate()
-               
-                eco_bms.calculate()
+                with profile_phase(profiler, 'economics'):
+                    for i in range(len(sim.pv)):
+                        eco_pv[i].calculate()
+                    
+                    eco_pv_charger.calculate()
+                   
+                    eco_bms.calculate()
+                    
+                    eco_bat.calculate()
                 
-                eco_bat.calculate()
+                #economic results of interrupted run are kept for all further iterations
+                if resume_state is not None:
+                    for i in range(len(sim.pv)):
+                        Checkpoint.set_state(eco_pv[i], resume_state['eco_pv'][i])
+                    Checkpoint.set_state(eco_pv_charger, resume_state['eco_pv_charger'])
+                    Checkpoint.set_state(eco_bms, resume_state['eco_bms'])
+                    Checkpoint.set_state(eco_bat, resume_state['eco_bat'])
+                    resume_state = None
                 
             #calculate technical preformance
-            tech.calculate()
+            with profile_phase(profiler, 'performance'):
+                tech.calculate()
             
             #exit iteration loop if no optimization of model selected
             if not optimization:
@@ -158,25 +366,31 @@ def Main():
                                             eco_charger = eco_pv_charger,
                                             eco_bms = eco_bms)
                 #initialize optimisation and run it
-                opt_model.init_model()
+                opt_model.sample = sens_iterations
+                with profile_phase(profiler, 'init_model'):
+                    opt_model.init_model()
+                if compare_opt_formulations and iteration == 0:
+                    opt_model.compare_formulations()
                 opt_model.optimize_model()                
                 
                 #rerun simulaiton model with optimization data and obtain new component efficiencies and SODs    
-                sim.update_simulation_data(opt_model.pv_flow, 
-                                           opt_model.battery_flow, 
-                                           opt_model.power_junct_flow,
-                                           opt_model.pv_peak_mod_list,
-                                           opt_model.batt_peak_mod,
-                                           opt_model.bought_power_list)
+                with profile_phase(profiler, 'update_simulation_data'):
+                    sim.update_simulation_data(opt_model.pv_flow, 
+                                               opt_model.battery_flow, 
+                                               opt_model.power_junct_flow,
+                                               opt_model.pv_peak_mod_list,
+                                               opt_model.batt_peak_mod,
+                                               opt_model.bought_power_list)
                 
                 if opt_pv:
                     opt_model.update = False
                 
                 #calculate technical preformance
-                tech.calculate()
+                with profile_phase(profiler, 'performance'):
+                    tech.calculate()
                 
                 #get average daily power composition for the dispatch analysis
-                dispatch.get_daily_power_mix(1,1)    
+                dispatch.get_daily_power_mix(None,1)    
             
                 #check whether deviation in costs between iterations is lower than threshold. If not rerun optimization
                 if opt_model.check_iteration_deviation():
@@ -190,17 +404,39 @@ def Main():
                         print('---------------------------------------------------------')
                         print('Caution: maximal iteration thrreshold passed. Exiting loop')
                         break
+                    
+                    #save run state to resume with next iteration
+                    if checkpoint_run and run_checkpoint.is_due(iteration):
+                        sim.checkpoint = run_checkpoint
+                        sim.save_checkpoint('main_simulation')
+                        opt_model.save_checkpoint('main_optimization')
+                        state = dict()
+                        state['sens_iterations'] = sens_iterations
+                        state['iteration'] = iteration
+                        state['eco_pv'] = [Checkpoint.get_state(eco_pv[i]) for i in range(len(eco_pv))]
+                        state['eco_pv_charger'] = Checkpoint.get_state(eco_pv_charger)
+                        state['eco_bms'] = Checkpoint.get_state(eco_bms)
+                        state['eco_bat'] = Checkpoint.get_state(eco_bat)
+                        state['tech'] = Checkpoint.get_state(tech)
+                        if sensitivity_analysis:
+                            state['sens'] = Checkpoint.get_state(sens)
+                        run_checkpoint.save('main', state)
+                    
                     print('---------------------------------------------------------')
                     print("iteration", iteration, ": Rerunning model simulation and optimization")
         
         #get model optimization end time
         model_end = datetime.now()
         model_end_time = model_end.strftime("%H:%M:%S")       
-        total_elapsed_time = (model_end.hour - model_start.hour) * 60 + model_end.minute - model_start.minute + (model_end.second-model_start.second)/60
+        total_elapsed_time = (model_end - model_start).total_seconds()/60
         
         print('-----------Optimization duration-----------')
         print("Model optimization End Time =", model_end_time)
         print('total elapsed time [min]', total_elapsed_time)
+        if optimization and opt_model.fixed_point is not None:
+            opt_model.fixed_point.print_report()
+        if optimization and opt_model.solver_cache is not None:
+            opt_model.solver_cache.print_report()
         
         tech.get_runtime(total_elapsed_time)
         
@@ -211,10 +447,10 @@ def Main():
             
             #%% Simulation evaluation and plots
             #create graphics model
-            graph = Graphics(sim, opt_model)        
+            graph = Graphics(sim, opt_model, plot_queue)        
             # Graphics
             if plot_simulation_results:
-                graph = Graphics(sim, opt_model)
+                graph = Graphics(sim, opt_model, plot_queue)
                 graph.plot_load_data()
                 graph.plot_pv_energy()
                 graph.plot_battery_soc()
@@ -232,6 +468,9 @@ def Main():
                 ## print technical performance
                 tech.plot_cut_off_days()
                 tech.plot_soc_days()
+                #recorded plots are written in the background while the run continues
+                if plot_queue is not None:
+                    plot_queue.render(wait=False)
                 # Print main technical objective results
                 tech.print_technical_objective_functions()
                 if optimization:
@@ -272,52 +511,118 @@ def Main():
         #%%sensitivity evaluation   
         if sensitivity_analysis:
             #save simulation data for current sensitivity iteration
-            sens.save_sim_data(sim, opt_model)
+            if optimization:
+                sens.save_sim_data(sim, opt_model, sample=sens_iterations, tech=tech)
+            else:
+                #objective of samples without optimization: total annuity costs of components
+                sens.save_sim_data(sim, opt_model, sample=sens_iterations, tech=tech,
+                                   objective=sum(eco.annuity_total_levelized_costs for eco in eco_pv + [eco_pv_charger, eco_bms, eco_bat]))
+            #write power flows of current sample incrementally (columnar formats)
+            if save_data and save_data_format != 'csv':
+                save_sample_data(sim, opt_model, tech, sens_iterations-1, file_format=save_data_format)
+            #skip the samples already finished in the results store
+            while sens_iterations < max_sens_samples and sens_iterations+1 in finished_samples:
+                sens_iterations += 1
+                #draw the randomized inputs of skipped samples as well
+                if sens_iterations > 1 and sens.sample_design is None and sens_batch is None:
+                    sens.draw_sample_inputs(sens_iterations-1, sens_base_inputs, sens_surrogate_initial, sens_load_perturbation)
             
             if sens_iterations < max_sens_samples:
-                # Create new Simulation instance
-                sim = Simulation(simulation_steps=simulation_steps,
-                                 timestep=timestep)
-                #Call Main Simulation methods
-                sim.simulate()  
-                
-                #declare what input parameters shall be randomized and get a randomized sample
+                #results of the next sample are taken from the batched simulation
+                if sens_batch is not None:
+                    sens_batch.set_scenario(sim, sens_iterations)
+                    sample_inputs = sens_sample_inputs[sens_iterations]
+                    sens.current_row = sens_sample_rows[sens_iterations]
+                else:
+                    #get the inputs of the next sample (of the design or randomized)
+                    sample_inputs = sens.draw_sample_inputs(sens_iterations, sens_base_inputs, sens_surrogate_initial, sens_load_perturbation)
+                    
+                    # Create new Simulation instance, which simulates the load profile of the sample as the batched simulation
+                    sim = Simulation(simulation_steps=simulation_steps,
+                                     timestep=timestep,
+                                     profiler=profiler)
+                    sim.load.load_data = pd.Series(sample_inputs['load'])
+                    #Call Main Simulation methods
+                    sim.simulate()  
                 for i in range(len(sim.pv)):
-                    sim.pv[i].investment_costs_specific = sens.generate_random_sample(sample_input=sens_pv_investment_costs[i],
-                                                                       max_deviation=0.2)
-                sim.load_power_demand = sens.generate_random_sample(sample_input=sens_load,
-                                                                       max_deviation=0.2)
-                sim.battery.investment_costs_specific = sens.generate_random_sample(sample_input=sens_battery_investment_costs,
-                                                                       max_deviation=0.5)
+                    sim.pv[i].investment_costs_specific = sample_inputs['pv_investment_costs'][i]
+                sim.load_power_demand = sample_inputs['load']
+                sim.battery.investment_costs_specific = sample_inputs['battery_investment_costs']
                 
                 #create new opt_model with changed input data
-                opt_model = Optimization_model(
-                    simulation_steps = simulation_steps, 
-                    time_step = timestep,
-                    simulation = sim, 
-                    opt_pv_size = opt_pv,
-                    opt_batt_size = opt_bat)
+                if optimization:
+                    opt_model = Optimization_model(
+                        simulation_steps = simulation_steps, 
+                        time_step = timestep,
+                        simulation = sim, 
+                        opt_pv_size = opt_pv,
+                        opt_batt_size = opt_bat)
+                    opt_model.checkpoint = run_checkpoint
+                    opt_model.profiler = profiler
+                    opt_model.linear_model = linear_opt
+                    opt_model.solver_stats = solver_stats
+                    if fixed_point_strategy is not None:
+                        opt_model.fixed_point = Fixed_Point(strategy=fixed_point_strategy,
+                                                            convergence=fixed_point_convergence,
+                                                            reference_iterations=fixed_point_reference)
+                    opt_model.decomposition = decomposition
+                    opt_model.solver_cache = solver_cache
             
             #print results of sensitivity anylysis if laast iteration
             if sens_iterations == max_sens_samples:
                 print('-----plotting results-----')
+                graph = Graphics(sim, opt_model, plot_queue)
                 graph.plot_sens_analysis(obj_values =  sens.opt_obj,
                                          battery_inv_costs = sens.battery_investment_costs,
                                             pv_inv_costs = sens.pv_investment_costs,
                                             total_load = sens.total_load)
+                #variance-based sensitivity of the objective to the parameters of the design (base case excluded)
+                if sens_sampling == 'saltelli' and not sens_surrogate:
+                    sens.print_sobol_indices(sens.calc_sobol_indices(sens.opt_obj[1:]))
+                #leave-one-out error of the surrogate of objective, pv peak and battery capacity
+                if sens_surrogate and sens.surrogate.x_train is not None:
+                    print('surrogate leave-one-out error (objective, pv peak, battery capacity):', sens.surrogate.get_loo_error())
+    #write remaining recorded plots and wait for all plot files
+    if plot_queue is not None:
+        plot_files = plot_queue.close()
+        print(len(plot_files), 'plot files written to', plot_directory)
+    
+    #shut the worker processes of the decomposition down
+    if optimization and opt_model.decomposition is not None:
+        opt_model.decomposition.close()
+    
+    #print solver statistics of all solves
+    if optimization:
+        print('-----------Solver statistics-----------')
+        print(opt_model.get_solver_stats()[['sample', 'iteration', 'formulation', 'variables', 'constraints', 'nonzeros', 'construction_time',
+                                            'write_time', 'solve_time', 'warm_start', 'iterations', 'termination_condition', 'infeasibility']].to_string())
+    
+    #print and save run time profile
+    if profile_run:
+        if profile_memory:
+            profiler.estimate_memory(sim, opt_model)
+        profiler.print_report()
+        profiler.dump('data/Profiles/profile_' + datetime.today().strftime('%Y%m%d_%H%M%S') + '.json')
+    
+    #run finished normally: checkpoints are not needed anymore
+    if checkpoint_run:
+        for label in ['main', 'main_simulation', 'main_optimization', 'simulate']:
+            run_checkpoint.remove(label)
+    
     if save_data:
         if sensitivity_analysis:
-            save_model_data(sim = sim, opt = opt_model, tech = tech, sens = sens)
+            save_model_data(sim = sim, opt = opt_model, tech = tech, sens = sens, file_format = save_data_format)
         elif optimization: 
-            save_model_data(sim = sim, opt = opt_model, tech = tech)    
+            save_model_data(sim = sim, opt = opt_model, tech = tech, file_format = save_data_format)    
         else:
-            save_model_data(sim = sim, tech = tech)         
+            save_model_data(sim = sim, tech = tech, file_format = save_data_format)         
     
-#run code with try exception handling for debugging
-try:
-    main = Main()
-    print('exited normally')
-except (RuntimeError) as error:
-    print('Runtime Error ')
+#run code with try exception handling for debugging (guarded, as worker processes of the decomposition import this module)
+if __name__ == '__main__':
+    try:
+        main = Main()
+        print('exited normally')
+    except (RuntimeError) as error:
+        print('Runtime Error ')
     
            
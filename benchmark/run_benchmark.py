@@ -0,0 +1,281 @@
+import os
+import sys
+import json
+import platform
+from datetime import datetime
+
+import numpy as np
+import pyomo
+import pyomo.environ as pyo
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulation import Simulation
+from evaluation.economics import Economics
+from evaluation.performance import Performance
+from optimization.PyomoMain import Optimization_model
+from profiler import Profiler, profile_phase
+from benchmark.synthetic_data import Synthetic_Data
+
+class Benchmark():
+    '''
+    Benchmark of the simulation and optimization hot paths with synthetic input data.
+    Times Environment.load_data, Simulation.simulate, update_simulation_data, Economics, Performance,
+    init_model, solve and get_opt_values separately and records the results for regression comparison.
+
+    Methods
+    -------
+    run
+    solver_available
+    save
+    compare
+    '''
+
+    def __init__(self,
+                 simulation_steps,
+                 timestep = 3600,
+                 data_directory = 'benchmark/data',
+                 solver = 'ipopt',
+                 linear_solver = 'mumps',
+                 seed = 0,
+                 memory = False):
+        '''
+        Parameters
+        ----------
+        simulation_steps : int. Number of simulation steps of benchmark run
+        timestep: int. Simulation timestep in seconds
+        data_directory : string. Directory synthetic input data is written to
+        solver : string. Pyomo solver to time the solve with, if locally available
+        linear_solver : string. Linear solver of ipopt (mumps is shipped with every ipopt build)
+        seed : int. Seed of synthetic data generation
+        memory : boolean. Enables memory accounting of phases and memory estimates of data structures
+        '''
+        self.simulation_steps = simulation_steps
+        self.timestep = timestep
+        self.data_directory = os.path.join(data_directory, str(simulation_steps))
+        self.solver = solver
+        self.linear_solver = linear_solver
+        self.seed = seed
+
+        self.profiler = Profiler(memory=memory)
+        self.results = dict()
+
+
+    def solver_available(self):
+        '''
+        Method to check whether the benchmark solver is locally available
+
+        Parameters
+        ----------
+        None
+        '''
+        try:
+            return bool(pyo.SolverFactory(self.solver).available(exception_flag=False))
+        except Exception:
+            return False
+
+
+    def run(self):
+        '''
+        Method to run all benchmark phases once
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        results : dict. Run settings, phase and component timings
+        '''
+        print('-----------Benchmark', self.simulation_steps, 'steps-----------')
+        self.profiler.reset()
+
+        #%% Synthetic input data
+        with profile_phase(self.profiler, 'generate data'):
+            data = Synthetic_Data(simulation_steps=self.simulation_steps,
+                                  timestep=self.timestep,
+                                  seed=self.seed)
+            data.generate()
+            files = data.save(self.data_directory)
+
+        #%% Simulation (records data load, environment and simulate phases)
+        sim = Simulation(simulation_steps=self.simulation_steps,
+                         timestep=self.timestep,
+                         profiler=self.profiler,
+                         irradiation_file=files['irradiation_file'],
+                         weather_file=files['weather_file'],
+                         load_file=files['load_file'],
+                         market_file=files['market_file'])
+        sim.simulate()
+
+        #%% Economics
+        with profile_phase(self.profiler, 'economics'):
+            eco_pv = list()
+            for i in range(len(sim.pv)):
+                eco_pv.append(Economics(sim.pv[i], sim.photovoltaic_replacement[i], sim.pv_tot_energy[i],
+                                        self.timestep, self.simulation_steps))
+            eco_pv_charger = Economics(sim.pv_charger, sim.pv_charger_replacement, sim.pv_arrays_tot_energy,
+                                       self.timestep, self.simulation_steps)
+            eco_bms = Economics(sim.battery_management, sim.battery_management_replacement, sim.battery_management_tot_energy,
+                                self.timestep, self.simulation_steps)
+            eco_bat = Economics(sim.battery, sim.battery_replacement, sim.battery_tot_energy,
+                                self.timestep, self.simulation_steps)
+            for eco in eco_pv + [eco_pv_charger, eco_bms, eco_bat]:
+                eco.calculate()
+
+        #%% Performance
+        tech = Performance(simulation=sim,
+                           opt_model=None,
+                           timestep=self.timestep,
+                           optimization=False)
+        with profile_phase(self.profiler, 'performance'):
+            tech.calculate()
+
+        #%% Optimization model (records solve and get_opt_values phases if solver is available)
+        opt_model = Optimization_model(simulation_steps=self.simulation_steps,
+                                       time_step=self.timestep,
+                                       simulation=sim,
+                                       opt_pv_size=True,
+                                       opt_batt_size=True)
+        opt_model.profiler = self.profiler
+        opt_model.solver_backend.linear_solver = self.linear_solver
+        opt_model.update_model_data(eco_pv=eco_pv,
+                                    eco_bat=eco_bat,
+                                    eco_charger=eco_pv_charger,
+                                    eco_bms=eco_bms)
+        with profile_phase(self.profiler, 'init_model'):
+            opt_model.init_model()
+
+        solved = self.solver_available()
+        if solved:
+            opt_model.optimize_model()
+        else:
+            print('solver', self.solver, 'not available: get_opt_values is timed at the initial point')
+            # Variables without initial value are set to their lower bound (or zero) to be evaluable
+            for var in opt_model.model.component_data_objects(pyo.Var):
+                if var.value is None:
+                    var.set_value(var.lb if var.lb is not None else 0, skip_validation=True)
+            opt_model.pv_peak_mod_list = [pyo.value(opt_model.model.pv_comp_block[i+1].pv_peak_mod[1]) for i in range(len(sim.pv))]
+            opt_model.batt_peak_mod = opt_model.get_battery_peak_mod()
+            with profile_phase(self.profiler, 'get_opt_values'):
+                opt_model.get_opt_values()
+
+        #%% Simulation update with optimization data
+        with profile_phase(self.profiler, 'update_simulation_data'):
+            sim.update_simulation_data(opt_model.pv_flow,
+                                       opt_model.battery_flow,
+                                       opt_model.power_junct_flow,
+                                       opt_model.pv_peak_mod_list,
+                                       opt_model.batt_peak_mod,
+                                       opt_model.bought_power_list)
+
+        if self.profiler.memory:
+            self.profiler.estimate_memory(sim, opt_model)
+
+        self.results = {'simulation_steps': self.simulation_steps,
+                        'timestep': self.timestep,
+                        'seed': self.seed,
+                        'solver': self.solver if solved else None,
+                        'linear_solver': self.linear_solver if solved else None,
+                        'model_variables': opt_model.model.nvariables(),
+                        'model_constraints': opt_model.model.nconstraints(),
+                        'solver_stats': opt_model.solver_stats,
+                        'profile': self.profiler.report()}
+
+        self.profiler.print_report()
+
+        return self.results
+
+
+    @staticmethod
+    def save(runs, directory = 'benchmark/results'):
+        '''
+        Method to write results of benchmark runs with system information to json file
+
+        Parameters
+        ----------
+        runs : list. Results of benchmark runs
+        directory : string. Directory the results are written to
+
+        Returns
+        -------
+        file_path : string. Path of written json file
+        '''
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        file_path = os.path.join(directory, 'benchmark_' + datetime.today().strftime('%Y%m%d_%H%M%S') + '.json')
+        record = {'date': datetime.today().strftime('%Y-%m-%d %H:%M:%S'),
+                  'python': platform.python_version(),
+                  'numpy': np.__version__,
+                  'pyomo': pyomo.version.version,
+                  'machine': platform.machine(),
+                  'runs': runs}
+        with open(file_path, 'w') as json_file:
+            json.dump(record, json_file, indent=4)
+        print('benchmark results saved to', file_path)
+
+        return file_path
+
+
+    @staticmethod
+    def compare(file_path, reference_file_path, tolerance = 0.1):
+        '''
+        Method to compare phase timings of two benchmark result files.
+        Runs are matched by their number of simulation steps
+
+        Parameters
+        ----------
+        file_path : string. Path of json file with new results
+        reference_file_path : string. Path of json file with reference results
+        tolerance : float. Relative slow down above which a phase is reported as regression
+
+        Returns
+        -------
+        regressions : list. Tuples of (simulation steps, phase, time ratio) of regressed phases
+        '''
+        with open(file_path) as json_file:
+            new = json.load(json_file)
+        with open(reference_file_path) as json_file:
+            reference = json.load(json_file)
+
+        reference_runs = {run['simulation_steps']: run for run in reference['runs']}
+        regressions = list()
+        for run in new['runs']:
+            steps = run['simulation_steps']
+            if steps not in reference_runs:
+                continue
+            print('-----------Comparison', steps, 'steps-----------')
+            reference_phases = reference_runs[steps]['profile']['phases']
+            for phase, record in run['profile']['phases'].items():
+                if phase not in reference_phases or reference_phases[phase]['time'] == 0:
+                    continue
+                ratio = record['time'] / reference_phases[phase]['time']
+                print(phase.ljust(30), 'time [s]', round(record['time'], 4),
+                      'reference [s]', round(reference_phases[phase]['time'], 4), 'ratio', round(ratio, 3))
+                if ratio > 1 + tolerance:
+                    regressions.append((steps, phase, ratio))
+
+        return regressions
+
+
+if __name__ == '__main__':
+    #%% Define benchmark settings
+    # Benchmark sizes: one week, one month and one year of hourly steps (up to 20 years: 20*8760)
+    benchmark_steps = [24*7, 24*31, 24*365]
+    # Reference result file for regression comparison (optional)
+    reference_file_path = None
+    # Memory accounting per phase (slows down benchmark runs)
+    benchmark_memory = False
+
+    runs = list()
+    for simulation_steps in benchmark_steps:
+        benchmark = Benchmark(simulation_steps=simulation_steps,
+                              memory=benchmark_memory)
+        runs.append(benchmark.run())
+
+    file_path = Benchmark.save(runs)
+    if reference_file_path:
+        regressions = Benchmark.compare(file_path, reference_file_path)
+        for steps, phase, ratio in regressions:
+            print('regression:', phase, 'with', steps, 'steps is slower by factor', round(ratio, 3))
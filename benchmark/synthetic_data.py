@@ -0,0 +1,147 @@
+import os
+import numpy as np
+import pandas as pd
+
+class Synthetic_Data():
+    '''
+    Generator of synthetic irradiation, weather, load and market price timeseries
+    in the csv formats of the CAMS radiation service, MERRA weather data, load profiles and market prices.
+    Used to benchmark the simulation and optimization without real measurement data.
+
+    Methods
+    -------
+    generate
+    save
+    '''
+
+    def __init__(self,
+                 simulation_steps,
+                 timestep = 3600,
+                 latitude = 41.965,
+                 start = '2020-01-01 00:00:00',
+                 seed = 0):
+        '''
+        Parameters
+        ----------
+        simulation_steps : int. Number of timesteps to be generated (e.g. 24*7 for one week up to 20*8760 for 20 years)
+        timestep: int. Timestep in seconds
+        latitude : float. Latitude of system location in degrees [°] used for the sun elevation
+        start : string. First timestamp of the generated timeseries
+        seed : int. Seed of random number generator to obtain reproducible data
+        '''
+        self.simulation_steps = simulation_steps
+        self.timestep = timestep
+        self.latitude = latitude
+        self.start = start
+        self.seed = seed
+
+
+    def generate(self):
+        '''
+        Method to generate all timeseries
+
+        Parameters
+        ----------
+        None
+        '''
+        rng = np.random.default_rng(self.seed)
+        self.time_index = pd.date_range(start=self.start, periods=self.simulation_steps, freq=str(self.timestep)+'s')
+        hours = self.timestep/3600
+
+        ## Irradiation: clear sky from sun elevation and daily cloud cover [Wh/m2]
+        day_of_year = self.time_index.dayofyear.values
+        hour_of_day = self.time_index.hour.values + self.time_index.minute.values/60
+        declination = np.radians(23.45) * np.sin(2*np.pi*(284 + day_of_year)/365)
+        hour_angle = np.radians(15*(hour_of_day - 12))
+        latitude = np.radians(self.latitude)
+        cos_zenith = np.sin(latitude)*np.sin(declination) + np.cos(latitude)*np.cos(declination)*np.cos(hour_angle)
+        cos_zenith = np.clip(cos_zenith, 0, 1)
+
+        irradiance_toa = 1361 * cos_zenith * hours
+        ghi_clear_sky = 1000 * cos_zenith**1.15 * hours
+        bhi_clear_sky = 0.8 * ghi_clear_sky
+        dhi_clear_sky = ghi_clear_sky - bhi_clear_sky
+        bni_clear_sky = np.divide(bhi_clear_sky, cos_zenith, out=np.zeros(self.simulation_steps), where=cos_zenith>0.05)
+
+        days = int(np.ceil(self.simulation_steps*hours/24)) + 1
+        cloud_cover = rng.beta(2, 3, size=days)[((np.arange(self.simulation_steps)*hours)//24).astype(int)]
+        clearness = 1 - 0.75*cloud_cover
+        ghi = ghi_clear_sky * clearness
+        bhi = bhi_clear_sky * clearness**2
+        dhi = ghi - bhi
+        bni = np.divide(bhi, cos_zenith, out=np.zeros(self.simulation_steps), where=cos_zenith>0.05)
+
+        time_start = self.time_index.strftime('%Y-%m-%dT%H:%M:%S.0')
+        time_end = (self.time_index + pd.Timedelta(seconds=self.timestep)).strftime('%Y-%m-%dT%H:%M:%S.0')
+        self.irradiation = pd.DataFrame({0: time_start + '/' + time_end,
+                                         1: irradiance_toa,
+                                         2: ghi_clear_sky,
+                                         3: bhi_clear_sky,
+                                         4: dhi_clear_sky,
+                                         5: bni_clear_sky,
+                                         6: ghi,
+                                         7: bhi,
+                                         8: dhi,
+                                         9: bni,
+                                         10: np.ones(self.simulation_steps)})
+
+        ## Weather: temperature [K], humidity [%], air pressure [hPa], wind speed [m/s], wind direction [°], rain and snow
+        seasonal = -np.cos(2*np.pi*(day_of_year - 15)/365)
+        diurnal = -np.cos(2*np.pi*(hour_of_day - 3)/24)
+        temperature = 288.15 + 9*seasonal + 5*diurnal*clearness + rng.normal(0, 1, self.simulation_steps)
+        self.weather = pd.DataFrame({0: self.time_index.strftime('%Y-%m-%d'),
+                                     1: self.time_index.strftime('%H:%M'),
+                                     2: temperature,
+                                     3: np.clip(60 + 25*cloud_cover - 10*diurnal, 0, 100),
+                                     4: 980 + rng.normal(0, 5, self.simulation_steps),
+                                     5: rng.weibull(2, self.simulation_steps)*3,
+                                     6: rng.uniform(0, 360, self.simulation_steps),
+                                     7: np.zeros(self.simulation_steps),
+                                     8: np.zeros(self.simulation_steps),
+                                     9: np.zeros(self.simulation_steps),
+                                     10: np.zeros(self.simulation_steps)})
+
+        ## Load demand: one year with daily morning and evening peak [W]
+        load_hours = np.arange(8760)
+        load_hour_of_day = load_hours % 24
+        self.load = 50000 \
+                    + 8000*np.exp(-(load_hour_of_day - 8)**2/8) \
+                    + 15000*np.exp(-(load_hour_of_day - 19)**2/6) \
+                    + 5000*np.cos(2*np.pi*load_hours/8760) \
+                    + rng.normal(0, 2000, 8760)
+        self.load = np.round(self.load)
+
+        ## Market: fixed buy and sell costs and day ahead prices [$/kWh]
+        self.price_list = np.array([0.36, 0.20])
+        self.day_ahead = np.round(0.04 + 0.01*diurnal + rng.normal(0, 0.005, self.simulation_steps), 5)
+
+
+    def save(self, directory):
+        '''
+        Method to write all generated timeseries to csv files
+
+        Parameters
+        ----------
+        directory : string. Directory the csv files are written to
+
+        Returns
+        -------
+        files : dict. File paths with the keyword arguments of Simulation as keys
+        '''
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        files = dict()
+        files['irradiation_file'] = os.path.join(directory, 'irradiation_synthetic.csv')
+        files['weather_file'] = os.path.join(directory, 'weather_synthetic.csv')
+        files['load_file'] = os.path.join(directory, 'load_synthetic.csv')
+        files['market_file'] = os.path.join(directory, 'consumer_price_list_synthetic.csv')
+        files['day_ahead_file'] = os.path.join(directory, 'day_ahead_synthetic.csv')
+
+        self.irradiation.to_csv(files['irradiation_file'], sep=';', header=False, index=False, float_format='%.4f')
+        self.weather.to_csv(files['weather_file'], sep=';', header=False, index=False, float_format='%.2f')
+        np.savetxt(files['load_file'], self.load, fmt='%.0f')
+        np.savetxt(files['market_file'], self.price_list, fmt='%.2f')
+        np.savetxt(files['day_ahead_file'], self.day_ahead, fmt='%.5f')
+
+        return files
@@ -0,0 +1,181 @@
+import os
+import gzip
+import pickle
+import numpy as np
+from datetime import datetime
+
+class Checkpoint:
+    """Methods to write and read compact checkpoints of simulation and optimization states,
+    which makes it possible to resume long runs after a crash or a solver failure.
+
+    Parameters
+    ----------
+    directory : `string`
+        Directory where checkpoint files are stored.
+    interval : `int`
+        Number of steps/iterations between two checkpoints (optional, checkpoints only on request if None).
+
+    Note
+    ----
+    - Only plain data attributes (numbers, strings, arrays, datetimes and lists/tuples thereof) are stored.
+    - Object references (components, input links, environment, Pyomo models) are skipped and need to be
+      reconstructed by the caller before the state is restored.
+    - Checkpoints are written as gzip compressed pickle files and replaced atomically.
+    """
+
+    plain_types = (bool, int, float, str, np.number, np.ndarray, datetime, type(None))
+
+    def __init__(self,
+                 directory='data/Checkpoints',
+                 interval=None):
+
+        self.directory = directory
+        self.interval = interval
+
+
+    def is_due(self, count):
+        """Checks whether a checkpoint needs to be written after the given number of steps/iterations.
+
+        Parameters
+        ----------
+        count : `int`
+            Number of finished steps/iterations.
+        """
+
+        return bool(self.interval) and count % self.interval == 0
+
+
+    def file_path(self, label):
+        """Returns file path of checkpoint with specified label.
+
+        Parameters
+        ----------
+        label : `string`
+            Name of checkpoint.
+        """
+
+        return os.path.join(self.directory, label + '.pkl.gz')
+
+
+    def exists(self, label):
+        """Checks whether a checkpoint with specified label exists.
+
+        Parameters
+        ----------
+        label : `string`
+            Name of checkpoint.
+        """
+
+        return os.path.exists(self.file_path(label))
+
+
+    def save(self, label, state):
+        """Writes checkpoint state to file. An existing checkpoint with the same label is replaced atomically.
+
+        Parameters
+        ----------
+        label : `string`
+            Name of checkpoint.
+        state : `dict`
+            Checkpoint state to be saved.
+        """
+
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+
+        file_path = self.file_path(label)
+        with gzip.open(file_path + '.tmp', 'wb', compresslevel=1) as checkpoint_file:
+            pickle.dump(state, checkpoint_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(file_path + '.tmp', file_path)
+
+
+    def load(self, label):
+        """Reads checkpoint state from file.
+
+        Parameters
+        ----------
+        label : `string`
+            Name of checkpoint.
+
+        Returns
+        -------
+        state : `dict`
+            Saved checkpoint state or None if no checkpoint exists.
+        """
+
+        if not self.exists(label):
+            print('Checkpoint', label, 'not found in', self.directory)
+            return None
+
+        with gzip.open(self.file_path(label), 'rb') as checkpoint_file:
+            return pickle.load(checkpoint_file)
+
+
+    def remove(self, label):
+        """Deletes checkpoint with specified label, e.g. after a run finished normally.
+
+        Parameters
+        ----------
+        label : `string`
+            Name of checkpoint.
+        """
+
+        if self.exists(label):
+            os.remove(self.file_path(label))
+
+
+    @classmethod
+    def is_plain(cls, value):
+        """Checks whether value is plain data, which can be stored in a checkpoint.
+
+        Parameters
+        ----------
+        value : `object`
+            Attribute value to be checked.
+        """
+
+        if isinstance(value, (list, tuple)):
+            # Series of results are homogeneous, first entry decides
+            return len(value) == 0 or cls.is_plain(value[0])
+
+        return isinstance(value, cls.plain_types)
+
+
+    @classmethod
+    def get_state(cls, obj, exclude=()):
+        """Extracts all plain data attributes of object.
+
+        Parameters
+        ----------
+        obj : `object`
+            Object whose state is extracted.
+        exclude : `tuple`
+            Attribute names not to be extracted.
+
+        Returns
+        -------
+        state : `dict`
+            Plain data attributes of object.
+        """
+
+        state = dict()
+        for name, value in obj.__dict__.items():
+            if name not in exclude and cls.is_plain(value):
+                state[name] = value
+
+        return state
+
+
+    @staticmethod
+    def set_state(obj, state):
+        """Restores plain data attributes of object.
+
+        Parameters
+        ----------
+        obj : `object`
+            Object whose state is restored.
+        state : `dict`
+            Plain data attributes extracted by get_state().
+        """
+
+        obj.__dict__.update(state)
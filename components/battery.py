@@ -280,6 +280,90 @@ class Battery(Serializable, Simulatable):
         self.battery_state_of_destruction()
         
 
+    def calculate_batch(self):
+        """Scenario-batched counterpart of calculate(). Nominal capacity and input link power
+        carry a leading scenario dimension and all scenarios are calculated at once.
+
+        Parameters
+        ----------
+        None : `None`
+
+        Returns
+        -------
+        temperature : `np.ndarray`
+            [K] Battery temperature in Kelvin per scenario.
+        power : `np.ndarray`
+            [W] Battery charge/discharge power extracted from the battery per scenario.
+        state_of_charge : `np.ndarray`
+            [1] Battery state of charge per scenario.
+        capacity_current_wh : `np.ndarray`
+            [Wh] Battery capacity of current timestep per scenario.
+        state_of_destruction : `np.ndarray`
+            [1] Battery state of destruction per scenario.
+
+        Note
+        ----
+        - Mirrors the charge discharge algorithm of calculate() with boolean masks instead of branching.
+        - Input link (BMS) needs to provide the scenario-batched efficiency methods of Power_Component.
+        """
+        ## Battery
+        # Get Battery temperature
+        self.battery_temperature()
+
+        #get available input link power (from battery management)
+        self.power = np.asarray(self.input_link.power, dtype=float)
+        self.input_link_power = self.power
+
+        ## Calculate theoretical battery power and state of charge with available input power
+        self.battery_power_batch()
+        self.power = self.power_battery
+        self.battery_state_of_charge()
+        self.battery_charge_discharge_boundary_batch()
+
+        # Discharge case: calculated SoC is under boundary - EMPTY
+        empty = (self.input_link_power < 0) & (self.state_of_charge < self.charge_discharge_boundary)
+        power_battery_empty = np.round(self.power + ((abs(self.state_of_charge - self.charge_discharge_boundary)
+                                        - self.power_self_discharge_rate) * self.capacity_current_wh / (self.timestep/3600)), 4)
+        # Charge case: calculated SoC is above boundary - FULL
+        full = (self.input_link_power > 0) & (self.state_of_charge > self.charge_discharge_boundary)
+        power_battery_full = np.round(self.power - ((abs(self.state_of_charge - self.charge_discharge_boundary)
+                                        + self.power_self_discharge_rate) * self.capacity_current_wh / (self.timestep/3600)), 4)
+
+        # Validation if power can be extracted/added, otherwise stay at old soc without battery power
+        hold = (empty & (power_battery_empty > 0)) | (full & (power_battery_full < 0))
+        self.state_of_charge = np.where(hold, self.state_of_charge_old,
+                                        np.where(empty | full, self.charge_discharge_boundary, self.state_of_charge))
+        self.power_battery = np.where(empty, power_battery_empty, np.where(full, power_battery_full, self.power_battery))
+        self.power_battery = np.where(hold, 0., self.power_battery)
+
+        # Set new input_link (BMS) power and calculate new input_link (BMS) efficiency at new power level
+        with np.errstate(invalid='ignore', divide='ignore'):
+            input_link_power_empty = self.power_battery * self.discharging_efficiency
+            input_link_power_full = self.power_battery / self.charging_efficiency
+        self.input_link.power = np.where(empty, input_link_power_empty,
+                                         np.where(full, input_link_power_full, self.input_link.power))
+        self.input_link.calculate_efficiency_output_batch(abs(self.input_link.power), empty)
+        self.input_link.calculate_efficiency_input_batch(self.input_link.power, full)
+
+        ## Battery voltage
+        self.battery_voltage_batch()
+
+        ## Battery Aging
+        # Capacity loss is 0 while micro cycle is running, otherwise cycling loss of finished micro cycle AND calendaric aging
+        cycle_running = self.power_battery != 0.
+        self.battery_aging_calendar_batch()
+        self.battery_aging_cycling_batch(cycle_running)
+        self.float_life_loss = np.where(cycle_running, 0., self.float_life_loss)
+        self.capacity_loss_wh = self.cycle_life_loss + self.float_life_loss
+
+        # Current battery capacity with absolute capacity loss per timestep
+        self.capacity_current_wh = self.capacity_current_wh - self.capacity_loss_wh
+        self.state_of_health = self.capacity_current_wh / self.capacity_nominal_wh
+
+        # Current State of Destruction
+        self.battery_state_of_destruction_batch()
+
+
     def battery_temperature(self):
         """Calculates the battery temperature in Kelvin.
 
@@ -605,3 +689,165 @@ class Battery(Serializable, Simulatable):
             self.energy_mc = 0
             self.depth_of_discharge_mc = 0
             self.temperature_mc = 0
+
+
+    def battery_power_batch(self):
+        """Scenario-batched counterpart of battery_power().
+
+        Parameters
+        ----------
+        None : `-`
+
+        Returns
+        -------
+        power : `np.ndarray`
+            [W] Battery charge/discharge power extracted from the battery per scenario.
+        efficiency : `np.ndarray`
+            [1] Battery charge/discharge efficiency per scenario.
+        """
+        charge = self.power > 0.
+        discharge = self.power < 0.
+
+        if self.const_efficiencies:
+            self.charging_efficiency = np.full(self.power.shape, self.const_ch_eff)
+            self.discharging_efficiency = np.full(self.power.shape, self.const_dch_eff)
+        else:
+            #ohmic losses for charge or discharge
+            self.charging_efficiency = np.where(charge, self.charge_power_efficiency_a * (self.power/self.capacity_nominal_wh) \
+                                                + self.charge_power_efficiency_b, self.minimal_efficiency)
+            self.discharging_efficiency = np.where(discharge, self.discharge_power_efficiency_a*(abs(self.power)/self.capacity_nominal_wh) \
+                                                   + self.discharge_power_efficiency_b, self.minimal_efficiency)
+
+        self.power_battery = np.where(discharge, self.power / self.discharging_efficiency, self.power * self.charging_efficiency)
+        #Calculation of battery power loss
+        self.power_loss = self.power - self.power_battery
+
+
+    def battery_charge_discharge_boundary_batch(self):
+        """Scenario-batched counterpart of battery_charge_discharge_boundary().
+
+        Parameters
+        ----------
+        None : `-`
+
+        Returns
+        -------
+        charge_discharge_boundary : `np.ndarray`
+            [1] Battery charge/discharge boundary per scenario.
+        """
+        self.charge_discharge_boundary = np.where(self.input_link_power < 0.,
+                                                  self.end_of_discharge_a * (abs(self.power_battery)/self.capacity_nominal_wh) + self.end_of_discharge_b,
+                                                  self.end_of_charge_a * (self.power_battery/self.capacity_nominal_wh) + self.end_of_charge_b)
+
+
+    def battery_voltage_batch(self):
+        """Scenario-batched counterpart of battery_voltage(). Voltage stays constant in case of no power.
+
+        Parameters
+        ----------
+        None : `-`
+
+        Returns
+        -------
+        voltage : `np.ndarray`
+            [V] Battery voltage level per scenario.
+        """
+        voltage_charge = self.voltage_charge_a * self.state_of_charge**2 \
+                       + self.voltage_charge_b * self.power_battery**2 \
+                       + self.voltage_charge_c * self.state_of_charge * self.power_battery \
+                       + self.voltage_charge_d * self.state_of_charge \
+                       + self.voltage_charge_e * self.power_battery \
+                       + self.voltage_charge_f
+        voltage_discharge = self.voltage_discharge_a * self.state_of_charge**2 \
+                          + self.voltage_discharge_b * abs(self.power_battery)**2 \
+                          + self.voltage_discharge_c * self.state_of_charge * abs(self.power_battery) \
+                          + self.voltage_discharge_d * self.state_of_charge \
+                          + self.voltage_discharge_e * abs(self.power_battery) \
+                          + self.voltage_discharge_f
+
+        self.voltage = np.where(self.power_battery > 0, voltage_charge,
+                                np.where(self.power_battery < 0, voltage_discharge, self.voltage))
+
+
+    def battery_state_of_destruction_batch(self):
+        """Scenario-batched counterpart of battery_state_of_destruction().
+
+        Parameters
+        ----------
+        None : `-`
+
+        Returns
+        -------
+        state_of_destruction : `np.ndarray`
+            [1] Battery State of destruction per scenario.
+        replacement : `np.ndarray`
+            [s] Time of battery component replacement in seconds per scenario.
+        """
+        state_of_destruction = (self.capacity_nominal_wh - self.capacity_current_wh) / (self.capacity_nominal_wh - self.end_of_life_battery_wh)
+        replaced = state_of_destruction >= 1
+
+        self.replacement = np.where(replaced, self.time, 0)
+        self.state_of_destruction = np.where(replaced, 0, state_of_destruction)
+        self.capacity_current_wh = np.where(replaced, self.capacity_nominal_wh, self.capacity_current_wh)
+
+
+    def battery_aging_calendar_batch(self):
+        """Scenario-batched counterpart of battery_aging_calendar().
+
+        Parameters
+        ----------
+        None : `-`
+
+        Returns
+        -------
+        float_life_loss : `np.ndarray`
+            [Wh] Battery absolute capacity loss per timestep due to calendar aging per scenario.
+        """
+        # Float life at battery temperature
+        self.float_life = self.calendric_aging_p5*(self.temperature)**5 + self.calendric_aging_p3*(self.temperature)**3 \
+                        + self.calendric_aging_p1*(self.temperature) + self.calendric_aging_p0
+
+        # Float life loss in Wh, in case calendaric model is implemented
+        with np.errstate(divide='ignore'):
+            float_life_loss = ((self.capacity_nominal_wh-self.end_of_life_battery_wh) / (self.float_life*365*24*(3600/self.timestep)))
+        self.float_life_loss = np.where(self.float_life != 0, float_life_loss, 0.)
+
+
+    def battery_aging_cycling_batch(self, cycle_running):
+        """Scenario-batched counterpart of battery_aging_cycling(). Micro cycles are
+        accumulated for running scenarios and evaluated for all others.
+
+        Parameters
+        ----------
+        cycle_running : `np.ndarray`
+            [-] Boolean array of scenarios with a running micro cycle (battery power not zero).
+
+        Returns
+        -------
+        cycle_life_loss : `np.ndarray`
+            [Wh] Battery absolute capacity loss per timestep due to cycling aging per scenario.
+        """
+        # Add up energy, counter, DoD and temperature of running micro cycles
+        energy_mc = self.energy_mc + abs(self.power_battery*(self.timestep/3600))
+        counter_mc = self.counter_mc + 1
+        depth_of_discharge_mc = self.depth_of_discharge_mc + (self.end_of_charge_b - self.state_of_charge)
+        temperature_mc = self.temperature_mc + self.temperature
+
+        # Evaluate ending micro cycles with a non zero counter
+        evaluated = ~cycle_running & (np.asarray(self.counter_mc) != 0)
+        counter_safe = np.where(evaluated, self.counter_mc, 1)
+        depth_of_discharge_mc_mean = self.depth_of_discharge_mc / counter_safe
+        temperature_mc_mean = self.temperature_mc / counter_safe
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cycle_life_mc = self.energy_mc / (2*self.capacity_nominal_wh*depth_of_discharge_mc_mean)
+            cycle_life = (self.cycle_aging_p4*depth_of_discharge_mc_mean**4 + self.cycle_aging_p3*depth_of_discharge_mc_mean**3 \
+                          + self.cycle_aging_p2*depth_of_discharge_mc_mean**2 + self.cycle_aging_p1*depth_of_discharge_mc_mean + self.cycle_aging_p0) \
+                          * ((self.cycle_aging_pl1*temperature_mc_mean) + self.cycle_aging_pl0)
+            cycle_life_loss = (cycle_life_mc / cycle_life) * (self.capacity_nominal_wh-self.end_of_life_battery_wh) * (self.timestep/3600)
+        self.cycle_life_loss = np.where(evaluated, cycle_life_loss, 0.)
+
+        # Keep accumulating running micro cycles and reset all others to initial values
+        self.energy_mc = np.where(cycle_running, energy_mc, 0)
+        self.counter_mc = np.where(cycle_running, counter_mc, 0)
+        self.depth_of_discharge_mc = np.where(cycle_running, depth_of_discharge_mc, 0)
+        self.temperature_mc = np.where(cycle_running, temperature_mc, 0)
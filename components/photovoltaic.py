@@ -1,3 +1,4 @@
+import numpy as np
 import pvlib
 from simulatable import Simulatable
 from serializable import Serializable
@@ -192,6 +193,47 @@ class Photovoltaic(Serializable, Simulatable):
         self.photovoltaic_state_of_destruction()
 
 
+    def calculate_batch(self):
+        """Scenario-batched counterpart of calculate(). Peak power carries a leading
+        scenario dimension, while cell temperature and module power are shared by all scenarios.
+
+        Parameters
+        ----------
+        None : `None`
+
+        Returns
+        -------
+        temperature : `float`
+            [K] Photovoltaic cell temperature, equals temperature_cell.
+        power : `np.ndarray`
+            [W] Photvoltaic overall power per scenario.
+        peak_power_current : `np.ndarray`
+            [W] Photovoltaic current peak power per scenario.
+        state_of_destruction : `np.ndarray`
+            [-] Phovoltaic state of destruction per scenario.
+        replacement : `np.ndarray`
+            [s] Time of replacement in case state_of_destruction equals 1.
+        """
+        # Photovoltaic cell temperature
+        self.temperature = self.temperature_cell[self.time]
+
+        # PWM power calculation
+        if self.controller_type == 'pwm':
+            self.photovoltaic_power_pwm()
+            self.power = (self.power_module / self.params_pdc0) * self.peak_power_current
+
+        # MPPT power calculation
+        elif self.controller_type == 'mppt':
+            self.power = (self.power_module[self.time] / self.params_pdc0) * self.peak_power_current
+
+        else:
+            print('Specify valid pv controller type!')
+
+        # Aging and State of Destruction
+        self.photovoltaic_aging()
+        self.photovoltaic_state_of_destruction_batch()
+
+
     def photovoltaic_temperature(self):
         """Calculates photovoltaic cell temperature with the Sandia PV Array
         Performance Model integrated in pvlib.
@@ -397,4 +439,30 @@ class Photovoltaic(Serializable, Simulatable):
             self.state_of_destruction = 0
             self.peak_power_current = self.peak_power
         else:
-            self.replacement = 0
\ No newline at end of file
+            self.replacement = 0
+
+
+    def photovoltaic_state_of_destruction_batch(self):
+        """Scenario-batched counterpart of photovoltaic_state_of_destruction().
+
+        Parameters
+        ----------
+        None : `-`
+
+        Returns
+        -------
+        state_of_destruction : `np.ndarray`
+            [1] Photovoltaic State of destruction per scenario.
+        replacement : `np.ndarray`
+            [s] Time of photovoltaic component replacement in seconds per scenario.
+        """
+
+        # State of destruction
+        state_of_destruction = (self.peak_power - self.peak_power_current) \
+                               / (self.peak_power -  self.end_of_life_photovoltaic)
+        replaced = state_of_destruction >= 1
+
+        # Store time index in case end of life criteria is met and reset peak power of replaced scenarios
+        self.replacement = np.where(replaced, self.time, 0)
+        self.state_of_destruction = np.where(replaced, 0, state_of_destruction)
+        self.peak_power_current = np.where(replaced, self.peak_power, self.peak_power_current)
@@ -94,6 +94,8 @@ class Power_Component(Serializable, Simulatable):
         
         #calculate poly fit parameters for output efficiency if needed for 
         self.poly_fit = False
+        #plot of efficiency curve and poly fit (figures are only drawn if set, e.g. to check the fit)
+        self.plot_fit = False
         if self.poly_fit:
             self.eff_output_polyfit_coeff()
 
@@ -316,8 +318,163 @@ class Power_Component(Serializable, Simulatable):
 
         # Calculate State of Desctruction
         self.power_component_state_of_destruction()
-        
-        
+
+
+    def calculate_batch(self):
+        """Scenario-batched counterpart of calculate(). Input link power and nominal power
+        carry a leading scenario dimension and all scenarios are calculated at once.
+
+        Parameters
+        ----------
+        None : `None`
+
+        Returns
+        -------
+        efficiency : `np.ndarray`
+            [1] Component efficiency per scenario.
+        power : `np.ndarray`
+            [W] Component input/output power in watts per scenario.
+        state_of_destruction : `float`
+            [-] Component state of destruction (equal for all scenarios).
+        replacement : `float`
+            [s] time of replacement in case state_of_destruction equals 1.
+
+        Note
+        ----
+        - Charge/discharge branching of the scalar methods is replaced by boolean masks.
+        """
+
+        input_link_power = np.asarray(self.input_link.power, dtype=float)
+        output_case = input_link_power >= 0
+
+        # Calculate the Power output or input
+        self.calculate_efficiency_output_batch(input_link_power, output_case)
+        self.calculate_efficiency_input_batch(input_link_power, ~output_case)
+        self.calculate_power_batch(input_link_power)
+
+        # Calculate State of Desctruction (time dependent only, equal for all scenarios)
+        self.power_component_state_of_destruction()
+
+
+    def calculate_efficiency_output_batch(self, input_link_power, mask=None):
+        """Scenario-batched counterpart of calculate_efficiency_output(). Only entries selected
+        by mask are updated, all others keep their last efficiency values.
+
+        Parameters
+        ----------
+        input_link_power : `np.ndarray`
+            [W] Input link power per scenario.
+        mask : `np.ndarray`
+            [-] Boolean array of scenarios to be updated (optional, all scenarios if None).
+
+        Returns
+        -------
+        efficiency : `np.ndarray`
+            [1] Component efficiency per scenario.
+        """
+        input_link_power = np.asarray(input_link_power, dtype=float)
+        if mask is None:
+            mask = np.ones(input_link_power.shape, dtype=bool)
+        self.init_batch_efficiencies(input_link_power.shape)
+        idle = input_link_power == 0
+
+        if self.fixed_efficiencies:
+            charger_efficiency = np.full(input_link_power.shape, self.const_ch_eff)
+            discharger_efficiency = np.where(idle, self.const_dch_eff, self.discharger_efficiency)
+        else:
+            power_input = np.minimum(1, input_link_power / self.power_nominal)
+            # Dummy value for idle scenarios to avoid divisions by zero, these are overwritten below
+            power_input = np.where(idle, 1., power_input)
+            with np.errstate(invalid='ignore'):
+                charger_efficiency = -((1 + self.voltage_loss_star) / (2 * self.resistance_loss_star * power_input)) \
+                                  + (((1 + self.voltage_loss_star)**2 / (2 * self.resistance_loss_star * power_input)**2) \
+                                  + ((power_input - self.power_self_consumption_star) / (self.resistance_loss_star * power_input**2)))**0.5
+
+            # In case of negative eta or no power flow it is set to minimal efficiency
+            charger_efficiency = np.where(idle | (charger_efficiency < 0), self.minimal_efficiency, charger_efficiency)
+            discharger_efficiency = np.full(input_link_power.shape, self.minimal_efficiency)
+
+        self.charger_efficiency = np.where(mask, charger_efficiency, self.charger_efficiency)
+        self.discharger_efficiency = np.where(mask, discharger_efficiency, self.discharger_efficiency)
+
+
+    def calculate_efficiency_input_batch(self, input_link_power, mask=None):
+        """Scenario-batched counterpart of calculate_efficiency_input(). Only entries selected
+        by mask are updated, all others keep their last efficiency values.
+
+        Parameters
+        ----------
+        input_link_power : `np.ndarray`
+            [W] Input link power per scenario.
+        mask : `np.ndarray`
+            [-] Boolean array of scenarios to be updated (optional, all scenarios if None).
+
+        Returns
+        -------
+        efficiency : `np.ndarray`
+            [1] Component efficiency per scenario.
+        """
+        input_link_power = np.asarray(input_link_power, dtype=float)
+        if mask is None:
+            mask = np.ones(input_link_power.shape, dtype=bool)
+        self.init_batch_efficiencies(input_link_power.shape)
+
+        if self.fixed_efficiencies:
+            discharger_efficiency = np.full(input_link_power.shape, self.const_dch_eff)
+            charger_efficiency = np.full(input_link_power.shape, self.const_ch_eff)
+        else:
+            power_output = (abs(input_link_power) / self.power_nominal)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                discharger_efficiency = power_output / (power_output + self.power_self_consumption + (power_output * self.voltage_loss) \
+                           + (power_output**2 * self.resistance_loss))
+            charger_efficiency = np.full(input_link_power.shape, self.minimal_efficiency)
+
+        self.charger_efficiency = np.where(mask, charger_efficiency, self.charger_efficiency)
+        self.discharger_efficiency = np.where(mask, discharger_efficiency, self.discharger_efficiency)
+
+
+    def calculate_power_batch(self, input_link_power):
+        """Scenario-batched counterpart of calculate_power_output() and calculate_power_input().
+
+        Parameters
+        ----------
+        input_link_power : `np.ndarray`
+            [W] Input link power per scenario.
+
+        Returns
+        -------
+        power : `np.ndarray`
+            [W] Component output (positive) or input (negative) power in watts per scenario.
+        """
+        # Output case: no negative power flow as output possible
+        power_input = np.minimum(1, input_link_power / self.power_nominal)
+        power_norm_output = np.maximum(power_input * self.charger_efficiency, 0.)
+        power_norm_output = np.where(input_link_power == 0, 0., power_norm_output)
+
+        # Input case: calculated power is NEGATIVE
+        power_output = (abs(input_link_power) / self.power_nominal)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            power_norm_input = power_output / self.discharger_efficiency
+
+        self.power_norm = np.where(input_link_power >= 0, power_norm_output, power_norm_input)
+        self.power = np.where(input_link_power >= 0, 1., -1.) * self.power_norm * self.power_nominal
+
+
+    def init_batch_efficiencies(self, shape):
+        """Initializes efficiency arrays for the scenario-batched calculation on first call.
+
+        Parameters
+        ----------
+        shape : `tuple`
+            [-] Shape of the scenario dimension.
+        """
+        if np.shape(getattr(self, 'charger_efficiency', None)) != shape:
+            initial_charger_efficiency = self.const_ch_eff if self.fixed_efficiencies else self.minimal_efficiency
+            initial_discharger_efficiency = self.const_dch_eff if self.fixed_efficiencies else self.minimal_efficiency
+            self.charger_efficiency = np.full(shape, initial_charger_efficiency)
+            self.discharger_efficiency = np.full(shape, initial_discharger_efficiency)
+
+
     def eff_output_polyfit_coeff(self):
         
         def eff_out_funv(power_input):
@@ -355,7 +512,8 @@ class Power_Component(Serializable, Simulatable):
                 best_deg = i
         # print(best_deg)
         # print(self.eff_coeff_array)
-        plt.plot(p_out,eff,'o', x_new, bestfit)
-        plt.grid()
-        # plt.show()
+        if self.plot_fit:
+            plt.plot(p_out,eff,'o', x_new, bestfit)
+            plt.grid()
+            # plt.show()
                     
@@ -6,22 +6,30 @@ Created on Fri Sep 10 11:14:09 2021
 """
 
 import os
+import glob
+import json
+import numpy as np
 import pandas as pd
 from collections import OrderedDict
- 
-def save_model_data(sim = None, opt= None, tech = None, sens = None):
+
+#file extensions of the export formats
+file_extensions = {'csv': '.csv', 'parquet': '.parquet', 'hdf5': '.h5'}
+#key of file level run metadata in parquet schema and hdf5 attributes
+metadata_key = 'openopt'
+
+def get_save_directory(sim, opt = None, sens = None):
     
-    #open new directory where new model outup is saved
+    #directory name from simulation steps, start sizes and optimization options
     modID = 'data/SaveFiles/' + str(sim.simulation_steps)+'PV' + str(round(sim.pv_peak_power[0]))+ 'bat' + str(round(sim.battery_capacity)) 
     
     if opt:
-        modID += opt.solver_type+'Opt'
+        modID += opt.solver_backend.linear_solver+'Opt'
         if opt.opt_pv_size:
             modID += '_PV'
         if opt.opt_batt_size:
             modID += '_bat'
     if sens:
-        modID += '_sens' + str(sens.sens_iterations+1)
+        modID += '_sens' + str(len(sens.opt_obj))
     
     if not os.path.exists(modID):
         os.makedirs(modID)
@@ -29,6 +37,23 @@ def save_model_data(sim = None, opt= None, tech = None, sens = None):
     else:
         print("Directory already existed : ", modID)
     
+    return modID
+
+
+def save_model_data(sim = None, opt= None, tech = None, sens = None, file_format = 'csv'):
+    
+    #open new directory where new model outup is saved
+    modID = get_save_directory(sim, opt, sens)
+    
+    #typed and compressed columnar files with run metadata
+    if file_format != 'csv':
+        metadata = get_run_metadata(sim, opt, tech)
+        write_columns(modID + '/env_data' + file_extensions[file_format], get_env_columns(sim), metadata, file_format)
+        write_columns(modID + '/power_data' + file_extensions[file_format], get_power_columns(sim, opt), metadata, file_format)
+        if sens:
+            write_columns(modID + '/sens_data' + file_extensions[file_format], get_sens_columns(sens, tech), metadata, file_format)
+        return modID
+    
     # Summarize and save environmental data
     results_env = pd.DataFrame(
                   data=OrderedDict({'sun_elevation':sim.env.sun_position_pvlib['elevation'],
@@ -92,15 +117,8 @@ def save_model_data(sim = None, opt= None, tech = None, sens = None):
     #Summarize and save sensitivity Analysis data
     if sens:
         # Summarize sensitivity data
-        sens_index = range(sens.sens_iterations)
-        results_sens = pd.DataFrame(
-                        data=OrderedDict({'battery_inv_costs':sens.battery_investment_costs,
-                                          'pv_inv_costs':sens.pv_investment_costs,
-                                          'total_load':sens.total_load,
-                                          'opt_objective':sens.opt_obj,
-                                          'bat_capa':sens.pv_peak,
-                                          'pv_peak':sens.batt_capa,                                      
-                                          'runtime':tech.runtime,}), index=sens_index)
+        sens_index = range(len(sens.opt_obj))
+        results_sens = pd.DataFrame(data=get_sens_columns(sens, tech), index=sens_index)
         path =  modID+ '/sens_data.csv' 
         results_sens.to_csv(path ,index=False)
     
@@ -112,9 +130,179 @@ def save_model_data(sim = None, opt= None, tech = None, sens = None):
     # results_comp.to_csv(path ,index=False)
         
     
-def load_model_data(path = 'data/SaveFiles/power_data.csv'):
+    return modID
+
+
+def get_env_columns(sim):
+    
+    #environmental timeseries as typed columns
+    return OrderedDict({'timeindex':pd.to_datetime(sim.timeindex),
+                        'sun_elevation':np.asarray(sim.env.sun_position_pvlib['elevation'], dtype=float),
+                        'sun_azimuth':np.asarray(sim.env.sun_position_pvlib['azimuth'], dtype=float),
+                        'sun_angle_of_incident':np.asarray(sim.env.sun_aoi_pvlib, dtype=float),
+                        'sun_ghi':np.asarray(sim.env.sun_ghi, dtype=float),
+                        'sun_dhi':np.asarray(sim.env.sun_dhi, dtype=float),
+                        'sun_bni':np.asarray(sim.env.sun_bni, dtype=float),
+                        'temperature_ambient':np.asarray(sim.env.temperature_ambient, dtype=float),
+                        'windspeed':np.asarray(sim.env.windspeed, dtype=float)})
+
+
+def get_power_columns(sim, opt = None):
+    
+    #power flow timeseries as typed columns, one column per pv array
+    columns = OrderedDict({'timeindex':pd.to_datetime(sim.timeindex),
+                           'sun_power_poa_global':np.asarray(sim.env.sun_irradiance_pvlib['poa_global'], dtype=float),
+                           'sun_power_poa_direct':np.asarray(sim.env.sun_irradiance_pvlib['poa_direct'], dtype=float),
+                           'sun_power_poa_diffuse':np.asarray(sim.env.sun_irradiance_pvlib['poa_diffuse'], dtype=float)})
+    for i in range(len(sim.pv_power)):
+        columns['pv_power_' + str(i)] = np.asarray(sim.pv_power[i], dtype=float)
+    
+    if opt:
+        series = [('pv_charger_power', sim.pv_charger_power),
+                  ('pv_charger_efficiency', opt.pv_charger_efficiency),
+                  ('load_power', sim.load_power_demand),
+                  ('power_junction_power', opt.power_junct_flow),
+                  ('battery_management_power', sim.battery_management_power),
+                  ('BMS_charger_efficiency', opt.battery_charger_efficiency),
+                  ('BMS_discharger_efficiency', opt.battery_discharger_efficiency),
+                  ('battery_power', sim.battery_power),
+                  ('battery_charging_efficiency', opt.battery_charging_efficiency),
+                  ('battery_discharging_efficiency', opt.battery_discharging_efficiency),
+                  ('battery_soc', sim.battery_state_of_charge),
+                  ('bought_power', opt.bought_power_list),
+                  ('sold_power', opt.sold_power_list)]
+    else:
+        series = [('pv_charger_power', sim.pv_charger_power),
+                  ('pv_charger_efficiency', sim.pv_charger_efficiency),
+                  ('load_power', sim.load_power_demand),
+                  ('power_junction_power', sim.power_junction_power),
+                  ('battery_management_power', sim.battery_management_power),
+                  ('BMS_charger_efficiency', sim.battery_management_charger_efficiency),
+                  ('BMS_discharger_efficiency', sim.battery_management_discharger_efficiency),
+                  ('battery_power', sim.battery_power),
+                  ('battery_charging_efficiency', sim.battery_charging_efficiency),
+                  ('battery_discharging_efficiency', sim.battery_discharging_efficiency),
+                  ('battery_soc', sim.battery_state_of_charge)]
+    for name, values in series:
+        columns[name] = np.asarray(values, dtype=float)
+    
+    return columns
+
+
+def get_sens_columns(sens, tech):
+    
+    #sensitivity analysis results, one row per sample
+    samples = len(sens.opt_obj)
+    columns = OrderedDict({'battery_inv_costs':sens.battery_investment_costs})
+    #pv investment costs are recorded for all pv arrays of a sample in turn, one column per pv array
+    pv_arrays = len(sens.pv_investment_costs) // max(samples, 1)
+    for i in range(pv_arrays):
+        columns['pv_inv_costs_' + str(i)] = sens.pv_investment_costs[i::pv_arrays]
+    #runtime of samples finished before a resumed sweep is not known
+    runtime = [np.nan] * (samples - len(tech.runtime)) + list(tech.runtime[-samples:])
+    columns.update({'total_load':sens.total_load,
+                    'opt_objective':sens.opt_obj,
+                    'bat_capa':sens.batt_capa,
+                    'pv_peak':sens.pv_peak,
+                    'runtime':runtime})
+    
+    return columns
+
+
+def get_run_metadata(sim, opt = None, tech = None):
+    
+    #sizes, solver, options and levelized costs of the run (scalars stored as file level metadata)
+    metadata = {'simulation_steps':sim.simulation_steps,
+                'timestep':sim.timestep,
+                'pv_peak_power':list(sim.pv_peak_power),
+                'battery_capacity':sim.battery_capacity,
+                'grid_connected':sim.grid_connected}
+    if opt:
+        metadata.update({'solver':opt.solver_backend.solve_info.get('solver'),
+                         'linear_solver':opt.solver_backend.solve_info.get('linear_solver'),
+                         'linear_model':opt.linear_model,
+                         'opt_pv_size':opt.opt_pv_size,
+                         'opt_batt_size':opt.opt_batt_size,
+                         'total_costs':opt.total_costs_new,
+                         'pv_LCOE':list(opt.pv_LCOE),
+                         'bat_LCOE':opt.bat_LCOE,
+                         'pv_peak_mod':list(sim.pv_peak_change),
+                         'bat_peak_mod':sim.bat_capa_change})
+    if tech:
+        metadata.update({'loss_of_load_probability':getattr(tech, 'loss_of_load_probability', None),
+                         'level_of_autonomy':getattr(tech, 'level_of_autonomy', None),
+                         'runtime':list(tech.runtime)})
+    
+    return metadata
+
+
+def write_columns(path, columns, metadata, file_format = 'parquet', key = 'data'):
+    
+    #parquet: zstd compressed columns, metadata in the schema
+    if file_format == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        table = pa.table(columns)
+        table = table.replace_schema_metadata({metadata_key: json.dumps(metadata, default=float)})
+        pq.write_table(table, path, compression='zstd')
+    #hdf5: blosc compressed table of key, metadata as node attribute (further keys are appended to the file)
+    elif file_format == 'hdf5':
+        with pd.HDFStore(path, mode='a', complevel=9, complib='blosc:zstd') as store:
+            store.put(key, pd.DataFrame(columns), format='table')
+            store.get_storer(key).attrs[metadata_key] = json.dumps(metadata, default=float)
+    else:
+        print('data_manager: file format', file_format, 'not supported, use', list(file_extensions))
+
+
+def save_sample_data(sim, opt, tech, sample, file_format = 'parquet'):
+    
+    #power flows and metadata of one sensitivity sample, written as soon as the sample is solved
+    modID = get_save_directory(sim, opt) + '_samples'
+    if not os.path.exists(modID):
+        os.makedirs(modID)
+    metadata = get_run_metadata(sim, opt, tech)
+    metadata['sample'] = sample
+    
+    if file_format == 'parquet':
+        path = modID + '/power_data_sample' + str(sample).zfill(4) + '.parquet'
+    else:
+        path = modID + '/power_data' + file_extensions[file_format]
+    write_columns(path, get_power_columns(sim, opt), metadata, file_format, key='sample' + str(sample).zfill(4))
+    
+    return path
 
-    power_data = pd.read_csv(path)  
-    pvPower = power_data['pv_power'].to_numpy()[1]
+
+def load_model_data(path = 'data/SaveFiles/power_data.csv', key = None):
+    
+    #directory of parquet sample files: samples are concatenated with their sample number
+    if os.path.isdir(path):
+        data = list()
+        metadata = list()
+        for file_path in sorted(glob.glob(os.path.join(path, '*.parquet'))):
+            sample_data, sample_metadata = load_model_data(file_path)
+            sample_data['sample'] = sample_metadata.get('sample')
+            data.append(sample_data)
+            metadata.append(sample_metadata)
+        return pd.concat(data, ignore_index=True), metadata
+    
+    if path.endswith(file_extensions['parquet']):
+        import pyarrow.parquet as pq
+        
+        table = pq.read_table(path)
+        schema_metadata = table.schema.metadata or dict()
+        metadata = json.loads(schema_metadata.get(metadata_key.encode(), b'{}'))
+        return table.to_pandas(), metadata
+    
+    if path.endswith(file_extensions['hdf5']):
+        with pd.HDFStore(path, mode='r') as store:
+            #all keys of the file (e.g. sensitivity samples) if no key is given
+            keys = [key] if key is not None else [store_key.lstrip('/') for store_key in store.keys()]
+            data = {store_key: store[store_key] for store_key in keys}
+            metadata = {store_key: json.loads(store.get_storer(store_key).attrs[metadata_key]) 
+                        if metadata_key in store.get_storer(store_key).attrs else dict() for store_key in keys}
+        if len(keys) == 1:
+            return data[keys[0]], metadata[keys[0]]
+        return data, metadata
     
-    print('pv_Power', pvPower)
\ No newline at end of file
+    return pd.read_csv(path), dict()
@@ -1,4 +1,147 @@
 import numpy as np
+from collections import OrderedDict
+
+class Economics_Context():
+    '''
+    Cache of the economic factors shared by Economics instances. Capital recovery factor and CELF only depend on
+    apr, ry and timeframe, the escalation and discount factors of a replacement only on its timeindex and the timestep length,
+    so they are calculated once instead of on every Economics.calculate of every optimizer and sensitivity iteration
+    
+    Methods
+    -------
+    get_capital_recovery_factor
+    get_constant_escalation_levelisation_factor
+    get_replacement_factors
+    clear
+    report
+    
+    Note
+    ----
+    - factors of array parameters (e.g. per pair parameters of Economics_Batch) are calculated without caching
+    - replacement factors are kept in a least recently used cache of max_replacement_factors entries
+    '''
+    
+    def __init__(self, max_replacement_factors = 4096):
+        '''
+        Parameters
+        ----------
+        max_replacement_factors : int. Maximal number of cached replacement factors
+        '''
+        self.max_replacement_factors = max_replacement_factors
+        # Capital recovery factors and CELF by parameters
+        self.factors = dict()
+        # Escalation and discount factors by replacement timeindex, timestep, ry and apr (least recently used first)
+        self.replacement_factors = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    
+    def get_capital_recovery_factor(self, apr, timeframe):
+        '''
+        Capital recovery factor
+        
+        Parameter
+        ---------
+        apr : float. Anual percentage rate
+        timeframe : int. Timeframe of annuity calculation [a]
+        '''
+        if np.ndim(apr) or np.ndim(timeframe):
+            return (apr* (1 + apr)**timeframe) / (((1 + apr)**timeframe)-1)
+        
+        key = ('capital_recovery_factor', apr, timeframe)
+        if key not in self.factors:
+            self.misses += 1
+            self.factors[key] = (apr* (1 + apr)**timeframe) / (((1 + apr)**timeframe)-1)
+        else:
+            self.hits += 1
+        
+        return self.factors[key]
+    
+    
+    def get_constant_escalation_levelisation_factor(self, apr, ry, timeframe):
+        '''
+        Constant Escalation Levelisation Factor - CELF (Nivelierungsfaktor)
+        
+        Parameter
+        ---------
+        apr : float. Anual percentage rate
+        ry : float. Nominal price escalation rate
+        timeframe : int. Timeframe of annuity calculation [a]
+        '''
+        if np.ndim(apr) or np.ndim(ry) or np.ndim(timeframe):
+            k = (1 + ry) / (1 + apr)
+            return (k*(1-k**timeframe)) / (1-k) * self.get_capital_recovery_factor(apr, timeframe)
+        
+        key = ('constant_escalation_levelisation_factor', apr, ry, timeframe)
+        if key not in self.factors:
+            self.misses += 1
+            k = (1 + ry) / (1 + apr)
+            self.factors[key] = (k*(1-k**timeframe)) / (1-k) * self.get_capital_recovery_factor(apr, timeframe)
+        else:
+            self.hits += 1
+        
+        return self.factors[key]
+    
+    
+    def get_replacement_factors(self, replacement, timestep, apr, ry):
+        '''
+        Escalation and discount factor of a replacement
+        
+        Parameter
+        ---------
+        replacement : int. Timeindex of replacement
+        timestep: int. Simulation timestep in seconds
+        apr : float. Anual percentage rate
+        ry : float. Nominal price escalation rate
+        
+        Returns
+        -------
+        factors : tuple of floats. Escalation factor (1+ry)^years and discount factor (1+apr)^years of replacement
+        '''
+        key = (replacement, timestep, apr, ry)
+        factors = self.replacement_factors.get(key)
+        if factors is not None:
+            self.hits += 1
+            self.replacement_factors.move_to_end(key)
+            return factors
+        
+        self.misses += 1
+        years = replacement / (365*24*(3600/timestep))
+        factors = ((1+ry)**years, (1+apr)**years)
+        self.replacement_factors[key] = factors
+        if len(self.replacement_factors) > self.max_replacement_factors:
+            self.replacement_factors.popitem(last=False)
+        
+        return factors
+    
+    
+    def clear(self):
+        '''
+        Deletes all cached factors
+        
+        Parameter
+        ---------
+        None
+        '''
+        self.factors = dict()
+        self.replacement_factors = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    
+    def report(self):
+        '''
+        Returns cache statistics
+        
+        Parameter
+        ---------
+        None
+        '''
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'factors': len(self.factors),
+                'replacement_factors': len(self.replacement_factors)}
+
 
 class Economics():
     '''
@@ -12,6 +155,10 @@ class Economics():
     -------
     calculate
     
+    Note
+    ----
+    - economic factors are taken from the Economics_Context context, which is shared by all instances unless one is passed
+    
     capital_recovery_factor
     constant_escalation_levelisation_factor
     annuity_investment_costs
@@ -21,7 +168,10 @@ class Economics():
     annuity_total_levelized_costs
     '''
     
-    def __init__(self, component, component_replacement, component_energy, timestep, sim_duration):
+    #cache of economic factors shared by all instances
+    context = Economics_Context()
+    
+    def __init__(self, component, component_replacement, component_energy, timestep, sim_duration, context = None):
         '''
         Parameters
         ----------
@@ -29,7 +179,10 @@ class Economics():
         component_replacement : list. List with timeindex of component replacement
             timeindex is dependent on set timestep
         timestep: int. Simulation timestep in seconds
+        context : class. Economics_Context instance with cached economic factors (optional, shared context of all instances by default)
         ''' 
+        if context is not None:
+            self.context = context
         # Timestep of simulation [s]
         self.timestep = timestep
         self.sim_duration = sim_duration
@@ -78,8 +231,7 @@ class Economics():
         ---------
         None
         '''
-        self.capital_recovery_factor = (self.apr* (1 + self.apr)**self.timeframe) \
-                                       / (((1 + self.apr)**self.timeframe)-1)
+        self.capital_recovery_factor = self.context.get_capital_recovery_factor(self.apr, self.timeframe)
 
     
     def calc_constant_escalation_levelisation_factor(self):
@@ -90,9 +242,7 @@ class Economics():
         ---------
         None
         '''
-        k = (1 + self.ry) / (1 + self.apr)
-        self.constant_escalation_levelisation_factor = (k*(1-k**self.timeframe)) \
-                                                       / (1-k) * self.capital_recovery_factor
+        self.constant_escalation_levelisation_factor = self.context.get_constant_escalation_levelisation_factor(self.apr, self.ry, self.timeframe)
 
     
     def calc_annuity_investment_costs(self):
@@ -130,11 +280,11 @@ class Economics():
         rc = np.zeros(len(self.component_replacement))
         # Cost calc for every replacement
         for k in range(0,len(self.component_replacement)):
+            escalation, discount = self.context.get_replacement_factors(self.component_replacement[k], self.timestep, self.apr, self.ry)
             # Cost of each replacement with escalation rate r
-            cc = (self.component.investment_costs_specific \
-                  * (1+self.ry)**(self.component_replacement[k] / (365*24*(3600/self.timestep))))
+            cc = self.component.investment_costs_specific * escalation
             # Present value of replacement cost
-            rc[k] = cc / (1+self.apr)**(self.component_replacement[k]/(24*365*(3600/self.timestep)))
+            rc[k] = cc / discount
         # Annuity of present value
         self.annuity_replacement_factor = self.capital_recovery_factor * sum(rc)
         self.annuity_replacement_costs = self.annuity_replacement_factor  * self.component.size_nominal 
@@ -0,0 +1,227 @@
+import numpy as np
+from types import SimpleNamespace
+
+from evaluation.economics import Economics
+
+class Economics_Batch(Economics):
+    '''
+    Batched Levelized Costs of Energy calculation of many component-scenario pairs in one vectorized call.
+    Investment costs, sizes, states of destruction and energies carry a leading pair dimension,
+    the replacement schedules of all pairs are flattened into one array with the index of their pair.
+
+    Attributes
+    ----------
+    Economics : class. Scalar economics class whose factor calculations are applied elementwise
+
+    Methods
+    -------
+    calculate
+    get_replacement_schedule
+    get_pair_values
+    from_components
+    from_simulation_batch
+    get_results
+    get_economics
+
+    Note
+    ----
+    - results equal the results of Economics for every pair (up to the rounding of the summation of replacement costs)
+    - the economic parameters timeframe, apr, ry and romy can be set as scalars or as arrays with one value per pair
+    '''
+
+    #results of calculate per pair
+    result_attributes = ['capital_recovery_factor', 'constant_escalation_levelisation_factor',
+                         'annuity_investment_costs', 'annuity_operation_maintenance_costs', 'annuity_replacement_costs',
+                         'annuity_residual_value', 'annuity_total_levelized_costs', 'total_LCOE_factor', 'levelized_costs']
+
+    def __init__(self, investment_costs_specific, size_nominal, state_of_destruction, component_energy, component_replacement, timestep, sim_duration):
+        '''
+        Parameters
+        ----------
+        investment_costs_specific : array of floats (pairs,). Specific investment costs of component of each pair
+        size_nominal : array of floats (pairs,). Nominal size of component of each pair
+        state_of_destruction : array of floats (pairs,). State of destruction of component at the end of simulation of each pair
+        component_energy : array of floats (pairs,). Average annual energy of component of each pair
+        component_replacement : list of arrays or array of ints (pairs, simulation steps). Timeseries with timeindex of component
+            replacement of each pair (ragged lists are possible). Timeindex is dependent on set timestep
+        timestep: int. Simulation timestep in seconds
+        sim_duration : int. Number of simulation steps
+        '''
+        #all pair data is broadcast to one pair dimension
+        investment_costs_specific, size_nominal, state_of_destruction, component_energy = \
+            [np.array(values, dtype=float).ravel() for values in np.broadcast_arrays(investment_costs_specific, size_nominal,
+                                                                                      state_of_destruction, component_energy)]
+        self.pairs = len(investment_costs_specific)
+        component = SimpleNamespace(investment_costs_specific=investment_costs_specific,
+                                    size_nominal=size_nominal,
+                                    state_of_destruction=state_of_destruction)
+
+        Economics.__init__(self, component, [], component_energy, timestep, sim_duration)
+        self.component_replacement, self.replacement_pair = self.get_replacement_schedule(component_replacement, self.pairs)
+
+
+    @staticmethod
+    def get_replacement_schedule(component_replacement, pairs):
+        '''
+        Method to flatten the replacement timeseries of all pairs into one array, without leading and trailing zeros
+        of each timeseries (as Economics)
+
+        Parameter
+        ---------
+        component_replacement : list of arrays or array of ints (pairs, simulation steps). Replacement timeseries of each pair
+        pairs : int. Number of pairs
+
+        Returns
+        -------
+        replacement : array of floats. Timeindex of all replacements
+        replacement_pair : array of ints. Index of pair of each replacement
+        '''
+        if isinstance(component_replacement, np.ndarray) and component_replacement.ndim == 2:
+            #rectangular timeseries: entries between the first and last nonzero entry of each row
+            nonzero = component_replacement != 0
+            steps = np.arange(component_replacement.shape[1])
+            first = np.argmax(nonzero, axis=1)
+            last = component_replacement.shape[1] - 1 - np.argmax(nonzero[:,::-1], axis=1)
+            mask = (steps >= first[:,None]) & (steps <= last[:,None]) & nonzero.any(axis=1)[:,None]
+            return component_replacement[mask].astype(float), np.nonzero(mask)[0]
+
+        replacements = [np.trim_zeros(np.asarray(replacement, dtype=float).ravel()) for replacement in component_replacement]
+        if len(replacements) != pairs:
+            raise ValueError('Economics_Batch: ' + str(len(replacements)) + ' replacement timeseries for ' + str(pairs) + ' pairs')
+        replacement_pair = np.repeat(np.arange(pairs), [len(replacement) for replacement in replacements])
+
+        return np.concatenate(replacements + [np.zeros(0)]), replacement_pair
+
+
+    def get_pair_values(self, value):
+        '''
+        Method to broadcast a scalar or per pair economic parameter to the pair dimension
+
+        Parameter
+        ---------
+        value : float or array of floats (pairs,). Economic parameter
+
+        Returns
+        -------
+        values : array of floats (pairs,). Economic parameter of each pair
+        '''
+        return np.broadcast_to(np.asarray(value, dtype=float), (self.pairs,))
+
+
+    def calc_annuity_replacement_costs(self):
+        '''
+        Annuity calculation of Replacement Costs of all replacements of all pairs at once
+
+        Parameter
+        ---------
+        None
+        '''
+        years = self.component_replacement / (365*24*(3600/self.timestep))
+        # Cost of each replacement with escalation rate r
+        cc = self.component.investment_costs_specific[self.replacement_pair] * (1+self.get_pair_values(self.ry)[self.replacement_pair])**years
+        # Present value of replacement cost
+        rc = cc / (1+self.get_pair_values(self.apr)[self.replacement_pair])**years
+        # Annuity of present value, summed per pair
+        self.annuity_replacement_factor = self.capital_recovery_factor * np.bincount(self.replacement_pair, weights=rc, minlength=self.pairs)
+        self.annuity_replacement_costs = self.annuity_replacement_factor  * self.component.size_nominal
+
+
+    @classmethod
+    def from_components(cls, components, component_replacement, component_energy, timestep, sim_duration):
+        '''
+        Method to create the batch of a list of (scalar) simulated components, e.g. of several sensitivity samples
+
+        Parameter
+        ---------
+        components : list. Simulated component classes
+        component_replacement : list. Replacement timeseries of each component
+        component_energy : list of floats. Average annual energy of each component
+        timestep: int. Simulation timestep in seconds
+        sim_duration : int. Number of simulation steps
+
+        Returns
+        -------
+        batch : class. Economics_Batch instance with one pair per component
+        '''
+        return cls([component.investment_costs_specific for component in components],
+                   [component.size_nominal for component in components],
+                   [component.state_of_destruction for component in components],
+                   component_energy, component_replacement, timestep, sim_duration)
+
+
+    @classmethod
+    def from_simulation_batch(cls, sim):
+        '''
+        Method to create the batch of all components (pv arrays, pv charger, battery management and battery) of all scenarios of a batched simulation
+
+        Parameter
+        ---------
+        sim : class. Simulation_Batch instance after simulate
+
+        Returns
+        -------
+        batch : class. Economics_Batch instance
+        index : dict. Pair indices (scenarios,) by component name (pv_0, pv_1, ..., pv_charger, battery_management, battery)
+        '''
+        shape = (sim.scenarios,)
+        components = [('pv_' + str(i), sim.pv[i], sim.photovoltaic_replacement[:,i], sim.pv_tot_energy[:,i]) for i in range(len(sim.pv))]
+        components += [('pv_charger', sim.pv_charger, sim.pv_charger_replacement, sim.pv_arrays_tot_energy),
+                       ('battery_management', sim.battery_management, sim.battery_management_replacement, sim.battery_management_tot_energy),
+                       ('battery', sim.battery, sim.battery_replacement, sim.battery_tot_energy)]
+
+        index = dict()
+        data = {'investment_costs_specific': list(), 'size_nominal': list(), 'state_of_destruction': list(),
+                'component_energy': list(), 'component_replacement': list()}
+        for position, (name, component, replacement, energy) in enumerate(components):
+            index[name] = np.arange(sim.scenarios) + position * sim.scenarios
+            data['investment_costs_specific'].append(np.broadcast_to(component.investment_costs_specific, shape))
+            data['size_nominal'].append(np.broadcast_to(component.size_nominal, shape))
+            data['state_of_destruction'].append(np.broadcast_to(component.state_of_destruction, shape))
+            data['component_energy'].append(np.broadcast_to(energy, shape))
+            data['component_replacement'].append(np.broadcast_to(replacement, shape + (sim.simulation_steps,)))
+
+        batch = cls(np.concatenate(data['investment_costs_specific']),
+                    np.concatenate(data['size_nominal']),
+                    np.concatenate(data['state_of_destruction']),
+                    np.concatenate(data['component_energy']),
+                    np.concatenate(data['component_replacement']),
+                    sim.timestep,
+                    sim.simulation_steps)
+
+        return batch, index
+
+
+    def get_results(self, index = None):
+        '''
+        Method to get the results of calculate of all or selected pairs
+
+        Parameter
+        ---------
+        index : array of ints. Pair indices, e.g. of one component in all scenarios (optional)
+
+        Returns
+        -------
+        results : dict. Arrays of capital recovery factor, CELF, annuities, total_LCOE_factor and levelized_costs
+        '''
+        results = dict()
+        for name in self.result_attributes:
+            values = self.get_pair_values(getattr(self, name))
+            results[name] = values if index is None else values[index]
+
+        return results
+
+
+    def get_economics(self, pair):
+        '''
+        Method to get the results of calculate of one pair with the attribute names of Economics, e.g. to pass the
+        economics of one sensitivity sample to the evaluation or the optimization model
+
+        Parameter
+        ---------
+        pair : int. Pair index
+
+        Returns
+        -------
+        economics : SimpleNamespace. Results of calculate of the pair as floats
+        '''
+        return SimpleNamespace(**{name: float(self.get_pair_values(getattr(self, name))[pair]) for name in self.result_attributes})
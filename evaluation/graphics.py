@@ -1,13 +1,26 @@
 import matplotlib.pyplot as plt
 import numpy as np
 
+from evaluation.plot_queue import recordable
+
 class Graphics():
+    
+    #attributes of simulation and optimization kept in the data snapshot of recorded plots (see Plot_Queue)
+    plot_attributes = {'sim': ['timeindex', 'load_power_demand', 'pv_power', 'pv_power_loss', 'pv_charger_power', 'power_junction_power',
+                               'battery_management_power', 'battery_power', 'battery_power_loss', 'battery_power_eta',
+                               'battery_management_power_eta', 'battery_state_of_charge', 'battery_temperature', 'pv_temperature',
+                               'photovoltaic_state_of_destruction', 'battery_state_of_destruction', 'pv_charger_state_of_destruction',
+                               'battery_management_state_of_destruction', 'day_ahead_market'],
+                       'opt': ['pv_max_possible_power', 'battery_state_of_charge', 'bought_power_list', 'power_shortage_list',
+                               'sold_power_list', 'buyprice', 'sellprice']}
 
-    def __init__(self, simulation, optimization):
+    def __init__(self, simulation, optimization, plot_queue = None):
         
         # Component specific parameter
         self.sim = simulation   
         self.opt = optimization
+        #plots are recorded in plot_queue and rendered on demand instead of drawn (optional)
+        self.plot_queue = plot_queue
         
     def figure_format(self):
         MEDIUM_SIZE = 10
@@ -21,6 +34,7 @@ class Graphics():
         plt.rc('figure', titlesize=BIGGER_SIZE)  # fontsize of the figure title
         self.figsize = (5,3)
         
+    @recordable
     def stack_plot(self, x_array, y_array, y_dict, dict_std,  y, secondary_y):
         """Relevant methods for the plotting stacked plots. Takes in x-Value array and y-array of
         of n dimension, where n is the amount of curves plotted
@@ -132,6 +146,7 @@ class Graphics():
         plt.show()
 
 
+    @recordable
     def plot_load_data(self):
         self.figure_format()
 
@@ -142,13 +157,14 @@ class Graphics():
         plt.legend(bbox_to_anchor=(0., 1.1), loc=2, borderaxespad=0., ncol=4)
         plt.grid()
 
+    @recordable
     def plot_pv_energy(self):
         self.figure_format()
         
         fig, ax1 = plt.subplots(figsize=self.figsize) 
 
         x = 0
-        for i in range(len(self.sim.pv)):
+        for i in range(len(self.sim.pv_power)):
             ax1.plot(self.sim.timeindex, self.sim.pv_power[i], color = (x, 0.2, 0.5), label='pv power')
             if self.opt:
                 ax1.plot(self.sim.timeindex, self.opt.pv_max_possible_power[i], linestyle='dashed', color=(x, 0.2, 0.5), label='pv max power')
@@ -161,6 +177,7 @@ class Graphics():
         plt.legend(bbox_to_anchor=(0., 1.1), loc=2, borderaxespad=0., ncol=4)
         plt.grid()
 
+    @recordable
     def plot_controller_energy(self):
         self.figure_format()
 
@@ -171,6 +188,7 @@ class Graphics():
         plt.legend(bbox_to_anchor=(0., 1.1), loc=2, borderaxespad=0., ncol=4)
         plt.grid()
 
+    @recordable
     def plot_main_energy(self):
         self.figure_format()
 
@@ -181,6 +199,7 @@ class Graphics():
         plt.legend(bbox_to_anchor=(0., 1.1), loc=2, borderaxespad=0., ncol=4)
         plt.grid()
 
+    @recordable
     def plot_battery_energy(self):
         self.figure_format()
 
@@ -193,6 +212,7 @@ class Graphics():
         plt.legend(bbox_to_anchor=(0., 1.2), loc=2, borderaxespad=0., ncol=4)
         plt.grid()
 
+    @recordable
     def plot_battery_eta(self):
         self.figure_format()
 
@@ -207,6 +227,7 @@ class Graphics():
         ax2.legend(bbox_to_anchor=(0.9, 1.1), loc=2, borderaxespad=0., ncol=4)
         plt.grid()
         
+    @recordable
     def plot_battery_soc(self):
         self.figure_format()
 
@@ -218,6 +239,7 @@ class Graphics():
         plt.legend(bbox_to_anchor=(0., 1.2), loc=2, borderaxespad=0., ncol=4)
         plt.grid()
 
+    @recordable
     def plot_components_temperature(self):
         self.figure_format()
 
@@ -232,13 +254,14 @@ class Graphics():
         ax2.legend(bbox_to_anchor=(0.9, 1.1), loc=2, borderaxespad=0., ncol=4)
         plt.grid()
 
+    @recordable
     def plot_components_sod(self):
         self.figure_format()
 
         plt.figure(figsize=self.figsize)
         
         x = 0
-        for i in range(len(self.sim.pv)):
+        for i in range(len(self.sim.pv_power)):
             plt.plot(self.sim.timeindex, self.sim.photovoltaic_state_of_destruction[i], color= (x, 0.2, 0.5 ), label='pv SoC')
             x += 0.3
             if x > 1:
@@ -253,6 +276,7 @@ class Graphics():
         plt.grid()
         plt.show()
         
+    @recordable
     def plot_sold_power(self):
         self.figure_format()
         
@@ -275,6 +299,7 @@ class Graphics():
         plt.grid()
         plt.show()
                 
+    @recordable
     def plot_sens_analysis(self, obj_values, **kwargs):
         
         fig_list = list()
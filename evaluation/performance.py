@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
+from evaluation.plot_queue import recordable
+
 class Performance():
     '''
     Provides all relevant methods for the technical evaluation
@@ -15,10 +17,14 @@ class Performance():
     calculate
     
     state_of_charge_evaluation
+    get_day_arrays
     technical_objectives
     days_with_cut_offs
     '''
     
+    #attributes of simulation kept in the data snapshot of recorded plots (see Plot_Queue)
+    plot_attributes = {'sim': ['timeindex']}
+    
     def __init__(self, simulation, opt_model, timestep, optimization):
         '''
         Parameters
@@ -31,6 +37,8 @@ class Performance():
         self.timestep = timestep
         self.optimization = optimization
         self.runtime = list()
+        #plots are recorded in plot_queue and rendered on demand instead of drawn (optional)
+        self.plot_queue = None
 
     def calculate(self):        
         '''
@@ -52,15 +60,35 @@ class Performance():
         None
         '''   
         # Maximum & Minimum battery SoC every day
-        self.state_of_charge_dayarray = np.array_split(self.sim.battery_state_of_charge, 
-                                                  int((len(self.sim.battery_state_of_charge))/(24*(3600/self.timestep))))
+        self.state_of_charge_dayarray = self.get_day_arrays(self.sim.battery_state_of_charge)
         #Find max/min values of each day array
-        self.state_of_charge_day_max  = list()
-        self.state_of_charge_day_min  = list()
+        if isinstance(self.state_of_charge_dayarray, np.ndarray):
+            self.state_of_charge_day_max = self.state_of_charge_dayarray.max(axis=1).tolist()
+            self.state_of_charge_day_min = self.state_of_charge_dayarray.min(axis=1).tolist()
+        else:
+            self.state_of_charge_day_max = [day.max() for day in self.state_of_charge_dayarray]
+            self.state_of_charge_day_min = [day.min() for day in self.state_of_charge_dayarray]
+
 
-        for i in range(0,len(self.state_of_charge_dayarray)):
-            self.state_of_charge_day_max.append(max(self.state_of_charge_dayarray[i][:]))
-            self.state_of_charge_day_min.append(min(self.state_of_charge_dayarray[i][:]))
+    def get_day_arrays(self, timeseries):
+        '''
+        Splits a timeseries into its days
+        
+        Parameters
+        ----------
+        timeseries : list or array of floats. Timeseries of simulation
+        
+        Returns
+        -------
+        day_arrays : array (days, steps per day) if the timeseries consists of whole days,
+            list of day arrays of np.array_split otherwise
+        '''
+        timeseries = np.asarray(timeseries)
+        steps_per_day = 24*(3600/self.timestep)
+        days = int(len(timeseries)/steps_per_day)
+        if days > 0 and len(timeseries) % days == 0:
+            return timeseries.reshape(days, -1)
+        return np.array_split(timeseries, days)
 
 
     def technical_objectives(self):
@@ -77,85 +105,53 @@ class Performance():
         ----------
         None
         '''
-        self.loss_of_power_supply = list()
-        self.power_load_supplied = list()
         self.tot_power_bought = 0
         self.tot_power_sold = 0
-        self.power_pv_unused = list()
-        self.level_of_autonomy_list = list()
+        power_junction_power = np.asarray(self.sim.power_junction_power, dtype=float)
         
         #if model optimization active and already initialized
-        if self.optimization and self.opt_model.power_shortage_list:
-            ## Calculation of loss of power supply and pv energy not used
-            for i in range(0,len(self.sim.power_junction_power)):
-                
-                self.loss_of_power_supply.append(self.opt_model.power_shortage_list[i])
-                self.power_pv_unused.append(self.opt_model.pv_power_unused[i])
-                    
-                # Determination of level of autonomy
-                # Case loss of power supply - LA == 1
-                if self.loss_of_power_supply[i] > 0.0001:
-                    self.level_of_autonomy_list.append(1)  
-                # Case no loss of power supply - LA == 0
-                else:
-                    self.level_of_autonomy_list.append(0)  
-            
-            
-            # Loss of Load Probability
-            self.loss_of_load_probability = sum(self.loss_of_power_supply) / sum(self.sim.load_power_demand)
-    
-            # PV energy not used per day
-            self.energy_pv_unused_day = sum(self.power_pv_unused) \
-                                    / (len(self.power_pv_unused) / (24*(3600/self.timestep)))
-            
-            #power bought
-            if self.sim.grid_connected:
-                self.tot_power_bought = sum(self.sim.load_power_demand) - sum(self.sim.pv_charger_power) - self.energy_pv_unused_day
-            
-            # Level of autonomy
-            self.level_of_autonomy = 1 - (sum(self.level_of_autonomy_list)/np.count_nonzero(self.sim.load_power_demand)) 
+        optimized = self.optimization and len(self.opt_model.power_shortage_list) > 0
+        if optimized:
+            ## Loss of power supply and pv energy not used of optimization
+            loss_of_power_supply = np.asarray(self.opt_model.power_shortage_list, dtype=float)[:len(power_junction_power)]
+            power_pv_unused = np.asarray(self.opt_model.pv_power_unused, dtype=float)[:len(power_junction_power)]
         else:
             ## Calculation of loss of power supply and pv energy not used
-            for i in range(0,len(self.sim.power_junction_power)):
-                
-                # Battery discharge case
-                if self.sim.power_junction_power[i] < 0: 
-                    self.loss_of_power_supply.append(abs(self.sim.power_junction_power[i] \
-                                                     - self.sim.battery_management_power[i] * self.sim.battery_management_discharger_efficiency[i]))
-                    self.power_pv_unused.append(0)
-                    
-                # Battery charge case
-                elif self.sim.power_junction_power[i] > 0:
-                    self.loss_of_power_supply.append(0)
-                    # Check if bms efficeincy is > 0
-                    if self.sim.battery_management_charger_efficiency[i] > 0:
-                        self.power_pv_unused.append(abs(self.sim.power_junction_power[i] \
-                                                    - self.sim.battery_management_power[i] / self.sim.battery_management_charger_efficiency[i]))
-                    else:
-                        self.power_pv_unused.append(abs(self.sim.power_junction_power[i]))
-                
-                # Idle case       
-                else:
-                    self.loss_of_power_supply.append(0)
-                    self.power_pv_unused.append(0)
-    
-                # Determination of level of autonomy
-                # Case loss of power supply - LA == 1
-                if self.loss_of_power_supply[i] > 0.0001:
-                    self.level_of_autonomy_list.append(1)  
-                # Case no loss of power supply - LA == 0
-                else:
-                    self.level_of_autonomy_list.append(0)  
-                    
-            # Loss of Load Probability
-            self.loss_of_load_probability = sum(self.loss_of_power_supply) / sum(self.sim.load_power_demand)
-    
-            # PV energy not used per day
-            self.energy_pv_unused_day = sum(self.power_pv_unused) \
-                                    / (len(self.power_pv_unused) / (24*(3600/self.timestep)))
-    
-            # Level of autonomy
-            self.level_of_autonomy = 1 - (sum(self.level_of_autonomy_list)/np.count_nonzero(self.sim.load_power_demand)) 
+            battery_management_power = np.asarray(self.sim.battery_management_power, dtype=float)
+            discharger_efficiency = np.asarray(self.sim.battery_management_discharger_efficiency, dtype=float)
+            charger_efficiency = np.asarray(self.sim.battery_management_charger_efficiency, dtype=float)
+            # Battery discharge case
+            discharge = power_junction_power < 0
+            # Battery charge case, pv power not used depends on bms efficiency if > 0
+            charge = power_junction_power > 0
+            charger_power = np.divide(battery_management_power, charger_efficiency,
+                                      out=np.zeros_like(power_junction_power), where=charger_efficiency > 0)
+            # Idle case - no loss and no pv power not used
+            loss_of_power_supply = np.where(discharge, np.abs(power_junction_power - battery_management_power * discharger_efficiency), 0.)
+            power_pv_unused = np.where(charge, np.abs(power_junction_power - charger_power), 0.)
+
+        # Determination of level of autonomy
+        # Case loss of power supply - LA == 1, Case no loss of power supply - LA == 0
+        level_of_autonomy_list = (loss_of_power_supply > 0.0001).astype(int)
+
+        self.loss_of_power_supply = loss_of_power_supply.tolist()
+        self.power_load_supplied = list()
+        self.power_pv_unused = power_pv_unused.tolist()
+        self.level_of_autonomy_list = level_of_autonomy_list.tolist()
+
+        # Loss of Load Probability
+        self.loss_of_load_probability = sum(self.loss_of_power_supply) / sum(self.sim.load_power_demand)
+
+        # PV energy not used per day
+        self.energy_pv_unused_day = sum(self.power_pv_unused) \
+                                / (len(self.power_pv_unused) / (24*(3600/self.timestep)))
+
+        #power bought
+        if optimized and self.sim.grid_connected:
+            self.tot_power_bought = sum(self.sim.load_power_demand) - sum(self.sim.pv_charger_power) - self.energy_pv_unused_day
+
+        # Level of autonomy
+        self.level_of_autonomy = 1 - (sum(self.level_of_autonomy_list)/np.count_nonzero(self.sim.load_power_demand)) 
 
 
     def days_with_cut_offs(self):
@@ -167,14 +163,10 @@ class Performance():
         None
         '''
         # Day arrays of power cut offs
-        self.cut_off_day = np.array(np.split(np.array(self.level_of_autonomy_list), 
-                                             (len(self.level_of_autonomy_list)/(24*(3600/self.timestep)))
-                                             ))
+        self.cut_off_day = np.array(self.level_of_autonomy_list).reshape(-1, int(24*(3600/self.timestep)))
 
         # Number and percentage of days with cut offs
-        self.cut_off_day_list = list()
-        for i in range(0,len(self.cut_off_day)):
-            self.cut_off_day_list.append(max(self.cut_off_day[i,:]))
+        self.cut_off_day_list = self.cut_off_day.max(axis=1).tolist()
 
         self.cut_off_day_number = sum(self.cut_off_day_list) \
                                   / ((self.sim.simulation_steps*(self.timestep/3600))/8760)
@@ -182,11 +174,12 @@ class Performance():
 
         # Daily distribution of cut offs
         self.cut_off_day_distribution_daily = list()
+        cut_off_hour_sum = self.cut_off_day[:,:24].sum(axis=0)
         for i in range(0,24):
-            if sum(self.cut_off_day[:,i]) == 0:
+            if cut_off_hour_sum[i] == 0:
                 self.cut_off_day_distribution_daily.append(0)
             else:
-                self.cut_off_day_distribution_daily.append((self.cut_off_day[:,i]) / sum(self.cut_off_day[:,i]))
+                self.cut_off_day_distribution_daily.append((self.cut_off_day[:,i]) / cut_off_hour_sum[i])
 
     
     def figure_format(self):
@@ -202,6 +195,7 @@ class Performance():
         self.figsize = (5,3)
 
 
+    @recordable
     def plot_loss_of_power_supply(self):
         self.figure_format()
 
@@ -214,6 +208,7 @@ class Performance():
         plt.show()
 
 
+    @recordable
     def plot_soc_days(self):
         self.figure_format()
 
@@ -227,6 +222,7 @@ class Performance():
         plt.grid()
         plt.show()
         
+    @recordable
     def plot_cut_off_days(self):
         self.figure_format()
 
@@ -0,0 +1,228 @@
+import os
+import pickle
+import functools
+from types import SimpleNamespace
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+def recordable(plot_method):
+    '''
+    Decorator of plot methods: if the instance has a plot_queue, the plot is recorded in it instead of drawn
+    '''
+    @functools.wraps(plot_method)
+    def plot(self, *args, **kwargs):
+        if getattr(self, 'plot_queue', None) is not None:
+            return self.plot_queue.record(self, plot_method.__name__, *args, **kwargs)
+        return plot_method(self, *args, **kwargs)
+
+    return plot
+
+
+def render_request(request, file_path, formats, dpi):
+    '''
+    Renders one recorded plot with the Agg backend and writes its figures to files
+
+    Parameters
+    ----------
+    request : bytes. Pickled class, state, method name and arguments of the plot
+    file_path : string. File path without extension, figures after the first get their number appended
+    formats : list. File formats (e.g. png, svg)
+    dpi : int. Resolution of raster formats
+
+    Returns
+    -------
+    file_paths : list. Paths of written files
+    '''
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    import matplotlib.pyplot as plt
+
+    plot_class, state, method_name, args, kwargs = pickle.loads(request)
+    instance = plot_class.__new__(plot_class)
+    instance.__dict__.update(state)
+    plt.close('all')
+    getattr(instance, method_name)(*args, **kwargs)
+
+    file_paths = list()
+    for i, number in enumerate(plt.get_fignums()):
+        figure = plt.figure(number)
+        for file_format in formats:
+            figure_path = file_path + ('' if i == 0 else '_' + str(i)) + '.' + file_format
+            figure.savefig(figure_path, dpi=dpi, bbox_inches='tight')
+            file_paths.append(figure_path)
+    plt.close('all')
+
+    return file_paths
+
+
+class Plot_Queue():
+    '''
+    Headless, lazy plotting: plot methods of Graphics and Performance are recorded with a snapshot of the plotted data
+    instead of drawn during the run, and rendered on demand with the Agg backend by a process pool, which writes
+    the figures as PNG/SVG files in parallel to the running optimization.
+
+    Methods
+    -------
+    get_snapshot
+    record
+    render
+    wait
+    close
+
+    Note
+    ----
+    - plot methods decorated with recordable are recorded if the instance has a plot_queue
+    - the snapshot keeps plain data attributes of the instance (numbers, strings, arrays, lists, dicts) and, of the
+      simulation and optimization instances, the attributes listed in plot_attributes of the plotting class.
+      It is pickled at once, later changes of the run do not change the recorded plot
+    - render(wait=False) returns at once, the files are written in the background until wait or close
+    '''
+
+    plain_types = (bool, int, float, str, np.number, np.ndarray, list, tuple, dict, type(None))
+
+    def __init__(self,
+                 directory = 'data/Plots',
+                 formats = ['png'],
+                 workers = None,
+                 dpi = 150):
+        '''
+        Parameters
+        ----------
+        directory : string. Directory the figures are written to
+        formats : list. File formats of figures (png, svg, pdf)
+        workers : int. Number of worker processes (None: number of cpu cores, 0: rendered in this process)
+        dpi : int. Resolution of raster formats
+        '''
+        self.directory = directory
+        self.formats = list(formats)
+        self.workers = workers
+        self.dpi = dpi
+
+        #recorded plots not rendered yet as (label, pickled request)
+        self.requests = list()
+        #number of recorded plots, used for file names
+        self.count = 0
+        self.executor = None
+        self.futures = list()
+        self.file_paths = list()
+
+
+    def get_snapshot(self, instance):
+        '''
+        Method to get the plotted data of a plotting instance
+
+        Parameters
+        ----------
+        instance : class. Instance of plotting class (e.g. Graphics, Performance)
+
+        Returns
+        -------
+        state : dict. Plain data attributes and reduced simulation and optimization instances
+        '''
+        plot_attributes = getattr(instance, 'plot_attributes', dict())
+        state = dict()
+        for name, value in instance.__dict__.items():
+            if name in plot_attributes:
+                if value is None:
+                    state[name] = None
+                else:
+                    state[name] = SimpleNamespace(**{attribute: getattr(value, attribute) for attribute in plot_attributes[name]
+                                                     if hasattr(value, attribute)})
+            elif isinstance(value, self.plain_types):
+                state[name] = value
+        state['plot_queue'] = None
+
+        return state
+
+
+    def record(self, instance, method_name, *args, **kwargs):
+        '''
+        Method to record a plot
+
+        Parameters
+        ----------
+        instance : class. Instance of plotting class
+        method_name : string. Name of plot method
+        args, kwargs : arguments of plot method
+        '''
+        self.count += 1
+        label = str(self.count).zfill(3) + '_' + type(instance).__name__.lower() + '_' + method_name
+        request = pickle.dumps((type(instance), self.get_snapshot(instance), method_name, args, kwargs))
+        self.requests.append((label, request))
+
+
+    def render(self, wait = True):
+        '''
+        Method to render all recorded plots
+
+        Parameters
+        ----------
+        wait : boolean. Toggle whether the method returns after all files are written
+
+        Returns
+        -------
+        file_paths : list. Paths of written files (of all renders finished so far if wait is not set)
+        '''
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        requests = self.requests
+        self.requests = list()
+
+        if self.workers == 0:
+            for label, request in requests:
+                self.file_paths += render_request(request, os.path.join(self.directory, label), self.formats, self.dpi)
+            return self.file_paths
+
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        for label, request in requests:
+            self.futures.append(self.executor.submit(render_request, request, os.path.join(self.directory, label), self.formats, self.dpi))
+
+        if wait:
+            return self.wait()
+        return self.file_paths
+
+
+    def wait(self):
+        '''
+        Method to wait for the rendering of all submitted plots
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        file_paths : list. Paths of written files
+        '''
+        for future in self.futures:
+            try:
+                self.file_paths += future.result()
+            except Exception as error:
+                print('Plot_Queue: plot not rendered:', error)
+        self.futures = list()
+
+        return self.file_paths
+
+
+    def close(self):
+        '''
+        Method to render the remaining plots, wait for them and shut the worker processes down
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        file_paths : list. Paths of written files
+        '''
+        if len(self.requests):
+            self.render(wait=False)
+        file_paths = self.wait()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+        return file_paths
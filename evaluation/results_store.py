@@ -0,0 +1,204 @@
+import os
+import json
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+class Results_Store():
+    '''
+    Append-only SQLite store of the results of a sensitivity analysis: each sample is written with its inputs, sizes,
+    objective, runtime and technical and economic summary metrics as soon as it is finished, so that a crash
+    does not lose the finished samples and a partially completed sweep can be resumed by skipping them.
+
+    Methods
+    -------
+    connect
+    record
+    record_sample
+    get_finished_samples
+    get_results
+    close
+
+    Note
+    ----
+    - one row per sweep and sample, every record is committed at once (journal mode WAL)
+    - inputs, sizes and metrics are stored as json, get_results flattens them to one column per value
+      (lists, e.g. of several pv arrays, get one column per entry)
+    - recording a finished sample again replaces its row
+    '''
+
+    def __init__(self,
+                 path = 'data/Sens/sens_results.sqlite',
+                 sweep = 'sweep'):
+        '''
+        Parameters
+        ----------
+        path : string. Path of SQLite database file
+        sweep : string. Name of sensitivity sweep, several sweeps can share one database file
+        '''
+        self.path = path
+        self.sweep = sweep
+        self.connection = None
+
+
+    def __getstate__(self):
+        #database connections are bound to the process
+        state = self.__dict__.copy()
+        state['connection'] = None
+
+        return state
+
+
+    def connect(self):
+        '''
+        Method to open the database and create the table of samples if needed
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        connection : sqlite3 Connection
+        '''
+        if self.connection is None:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self.connection = sqlite3.connect(self.path)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS samples ('
+                                    'sweep TEXT NOT NULL, '
+                                    'sample INTEGER NOT NULL, '
+                                    'finished TEXT, '
+                                    'objective REAL, '
+                                    'runtime REAL, '
+                                    'inputs TEXT, '
+                                    'sizes TEXT, '
+                                    'metrics TEXT, '
+                                    'PRIMARY KEY (sweep, sample))')
+            self.connection.commit()
+
+        return self.connection
+
+
+    def record(self, sample, inputs, sizes, objective, runtime = None, metrics = None):
+        '''
+        Method to write the results of a finished sample
+
+        Parameters
+        ----------
+        sample : int. Sample number of sweep
+        inputs : dict. Varied input parameters of sample
+        sizes : dict. Component sizes of sample
+        objective : float. Optimization objective of sample
+        runtime : float. Runtime of sample in minutes
+        metrics : dict. Technical and economic summary metrics of sample
+        '''
+        connection = self.connect()
+        connection.execute('INSERT OR REPLACE INTO samples VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                           (self.sweep, int(sample), datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                            None if objective is None else float(objective),
+                            None if runtime is None else float(runtime),
+                            json.dumps(inputs, default=float),
+                            json.dumps(sizes, default=float),
+                            json.dumps(metrics or dict(), default=float)))
+        connection.commit()
+
+
+    def record_sample(self, sample, simulation, optimization, tech = None, factors = None, objective = None):
+        '''
+        Method to write the results of a finished sample from the simulation, optimization and performance instances
+
+        Parameters
+        ----------
+        sample : int. Sample number of sweep
+        simulation : class. Simulation instance of sample
+        optimization : class. Optimization_model instance of sample (None if not optimized)
+        tech : class. Performance instance (optional), runtime and technical metrics are taken from it
+        factors : dict. Parameter factors of the sample of a sample design (optional)
+        objective : float. Objective of sample if it is not optimized
+        '''
+        inputs = {'pv_inv_costs': [simulation.pv[i].investment_costs_specific for i in range(len(simulation.pv))],
+                  'battery_inv_costs': simulation.battery.investment_costs_specific,
+                  'total_load': sum(simulation.load_power_demand)}
+        if factors is not None:
+            inputs.update({'factor_' + name: value for name, value in factors.items()})
+        sizes = {'pv_peak': simulation.pv_tot_peak,
+                 'pv_peak_power': list(simulation.pv_peak_power),
+                 'batt_capa': simulation.battery_capacity}
+        metrics = {'pv_tot_used_energy': sum(sum(pv_power) for pv_power in simulation.pv_power)}
+        if optimization is not None:
+            objective = optimization.total_costs_new
+            metrics.update({'pv_LCOE': list(optimization.pv_LCOE),
+                            'bat_LCOE': optimization.bat_LCOE,
+                            'total_shortage_power': sum(optimization.power_shortage_list),
+                            'total_bought_power': sum(optimization.bought_power_list)})
+        runtime = None
+        if tech is not None:
+            metrics.update({'loss_of_load_probability': getattr(tech, 'loss_of_load_probability', None),
+                            'level_of_autonomy': getattr(tech, 'level_of_autonomy', None),
+                            'cut_off_day_number': getattr(tech, 'cut_off_day_number', None)})
+            if len(tech.runtime):
+                runtime = tech.runtime[-1]
+
+        self.record(sample, inputs, sizes, objective, runtime, metrics)
+
+
+    def get_finished_samples(self):
+        '''
+        Method to get the numbers of the finished samples of the sweep
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        samples : set of ints. Sample numbers
+        '''
+        rows = self.connect().execute('SELECT sample FROM samples WHERE sweep = ?', (self.sweep,)).fetchall()
+
+        return {row[0] for row in rows}
+
+
+    def get_results(self):
+        '''
+        Method to get the results of all finished samples of the sweep
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        results : DataFrame. One row per sample (sorted), one column per input, size and metric value
+        '''
+        rows = self.connect().execute('SELECT sample, finished, objective, runtime, inputs, sizes, metrics FROM samples '
+                                      'WHERE sweep = ? ORDER BY sample', (self.sweep,)).fetchall()
+        records = list()
+        for sample, finished, objective, runtime, inputs, sizes, metrics in rows:
+            record = {'sample': sample, 'finished': finished, 'opt_objective': objective, 'runtime': runtime}
+            for values in [json.loads(inputs), json.loads(sizes), json.loads(metrics)]:
+                for name, value in values.items():
+                    if isinstance(value, list):
+                        record.update({name + '_' + str(i): entry for i, entry in enumerate(value)})
+                    else:
+                        record[name] = value
+            records.append(record)
+
+        return pd.DataFrame(records)
+
+
+    def close(self):
+        '''
+        Method to close the database connection
+
+        Parameters
+        ----------
+        None
+        '''
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -1,5 +1,7 @@
-import random
+import numpy as np
 import pandas as pd
+from scipy.signal import lfilter
+from scipy.stats import qmc
 
 class Sensitivity_analysis():
     """Relevant methods for a sensitivity analysis of the optiization model.
@@ -9,17 +11,27 @@ class Sensitivity_analysis():
     ranomization_method: int. selection of randomization method
                             1:random distribution within a set range
                             2:gaussian distribution
+    seed: int. seed of the random generator of the random samples (optional)
 
     Note
     ----
+    - random samples of timeseries (e.g. the load) are drawn at once with a numpy Generator, independent per step or
+      structured: one global factor, one factor per day or AR(1) noise with the same standard deviation
+    - space-filling designs (Latin hypercube, Sobol, Saltelli) over a declared parameter space are generated with
+      generate_samples, first-order and total Sobol indices of the sweep outputs of a Saltelli design with calc_sobol_indices
     """
 
 
-    def __init__(self, simulation, optimization, randomize_method):
+    def __init__(self, simulation, optimization, randomize_method, seed = None):
         
         self.sim = simulation
         self.opt = optimization
         self.randomization_method = randomize_method
+        self.random_generator = np.random.default_rng(seed)
+        #number of steps per day of structured perturbations of timeseries
+        self.steps_per_day = 24
+        if simulation is not None:
+            self.steps_per_day = int(24*3600/simulation.timestep)
         
         self.iteration = 0
         
@@ -41,13 +53,37 @@ class Sensitivity_analysis():
         self.battery_SOC = list()
         self.battery_power = list()
         
+        #append-only store the results of each sample are written to as soon as it is finished (optional)
+        self.results_store = None
+        
+        #parameter space and sample design of space-filling sampling
+        self.parameter_names = list()
+        self.parameter_bounds = None
+        self.sampling_method = None
+        self.sample_design = None
+        #design row of the current sample, rows used and parameter factors of each finished sample (base case: factors 1)
+        self.current_row = None
+        self.used_rows = set()
+        self.sample_factors = list()
+        #surrogate model selecting the next design row of the sweep (optional)
+        self.surrogate = None
+        
 
-    def generate_random_sample(self, sample_input, max_deviation, standard_deviation = None):
+    def generate_random_sample(self, sample_input, max_deviation, standard_deviation = None, structure = 'independent', correlation = 0.9):
         """takes in the input variable to be varied according to the randomization method selected
 
         Parameters
         ----------
-        None : `None`
+        sample_input : `float` or `list`/`array`
+            input variable, e.g. investment costs or load timeseries
+        max_deviation : `float`
+            maximal relative deviation of random distribution
+        standard_deviation : `float`
+            standard deviation of gaussian distribution
+        structure : `string`
+            perturbation of timeseries: 'independent', 'global', 'daily' or 'ar1'
+        correlation : `float`
+            lag one correlation of 'ar1' perturbations
 
         Returns
         random sample of sample_input
@@ -55,13 +91,200 @@ class Sensitivity_analysis():
         """
     
         if self.randomization_method == 1:
-            return self.calc_random_distribution(sample_input, max_deviation)
+            return self.calc_random_distribution(sample_input, max_deviation, structure, correlation)
         elif self.randomization_method == 2:
-            return self.calc_gaussian_distribution(sample_input, standard_deviation)
+            return self.calc_gaussian_distribution(sample_input, standard_deviation, structure, correlation)
         elif self.randomization_method == 3:
             return self.load_data
         
     
+    def set_parameter_space(self, parameters):
+        """declares the parameters varied by the sample design and their ranges
+
+        Parameters
+        ----------
+        parameters : `dict`
+            lower and upper bound of each parameter by name, e.g. {'load': (0.8, 1.2)} for factors of the base values
+
+        Returns
+        -------
+        """
+        self.parameter_names = list(parameters)
+        self.parameter_bounds = np.array([parameters[name] for name in self.parameter_names], dtype=float)
+        
+    def generate_samples(self, n_samples, method = 'lhs', seed = None):
+        """generates a space-filling sample design over the declared parameter space
+
+        Parameters
+        ----------
+        n_samples : `int`
+            number of samples ('lhs', 'sobol') or of base samples N of the Saltelli design ('saltelli', N*(d+2) samples
+            for d parameters). Sobol based designs are balanced for powers of 2
+        method : `string`
+            'lhs': Latin hypercube, 'sobol': scrambled Sobol sequence, 'saltelli': matrices A, B and AB_i of the Saltelli
+            scheme for Sobol indices
+        seed : `int`
+            seed of the sampler (optional)
+
+        Returns
+        sample design : `array` (samples, parameters)
+        -------
+        """
+        dimension = len(self.parameter_names)
+        if method == 'lhs':
+            unit_samples = qmc.LatinHypercube(d=dimension, seed=seed).random(n_samples)
+        elif method == 'sobol':
+            unit_samples = qmc.Sobol(d=dimension, seed=seed).random(n_samples)
+        elif method == 'saltelli':
+            base_samples = qmc.Sobol(d=2*dimension, seed=seed).random(n_samples)
+            matrix_a = base_samples[:,:dimension]
+            matrix_b = base_samples[:,dimension:]
+            # AB_i: matrix A with column i of matrix B
+            matrix_ab = np.repeat(matrix_a[None,:,:], dimension, axis=0)
+            matrix_ab[np.arange(dimension),:,np.arange(dimension)] = matrix_b.T
+            unit_samples = np.concatenate([matrix_a, matrix_b, matrix_ab.reshape(-1, dimension)])
+        else:
+            print('sens class: sampling method', method, 'not known')
+            return None
+        
+        self.sampling_method = method
+        self.sample_design = qmc.scale(unit_samples, self.parameter_bounds[:,0], self.parameter_bounds[:,1])
+        
+        return self.sample_design
+    
+    def get_sample_values(self, sample):
+        """gives back the parameter values of a sample of the sample design
+
+        Parameters
+        ----------
+        sample : `int`
+            row of sample design
+
+        Returns
+        parameter values by name : `dict`
+        -------
+        """
+        return dict(zip(self.parameter_names, self.sample_design[sample].tolist()))
+    
+    def get_sample_inputs(self, sample, base_inputs):
+        """gives back the inputs of a sample of the sample design, parameters are factors of the base inputs
+
+        Parameters
+        ----------
+        sample : `int`
+            row of sample design
+        base_inputs : `dict`
+            base value (float or list, e.g. the load timeseries) of each parameter by name
+
+        Returns
+        sample inputs by name : `dict`
+        -------
+        """
+        values = self.get_sample_values(sample)
+        self.current_row = sample
+        self.used_rows.add(sample)
+        sample_inputs = dict()
+        for name, base_input in base_inputs.items():
+            if isinstance(base_input, (list, np.ndarray)):
+                sample_inputs[name] = (np.asarray(base_input, dtype=float) * values[name]).tolist()
+            else:
+                sample_inputs[name] = base_input * values[name]
+        
+        return sample_inputs
+    
+    def draw_sample_inputs(self, sample, base_inputs, initial_samples = 0, load_perturbation = 'independent'):
+        """gives back the inputs of the next sample of the sweep: the inputs of the next row of the sample design
+        (selected by the surrogate, if set) or randomized inputs
+
+        Parameters
+        ----------
+        sample : `int`
+            number of finished samples of the sweep (the unaltered base case is the first sample)
+        base_inputs : `dict`
+            base values of 'pv_investment_costs' (list of pv arrays), 'battery_investment_costs' and 'load'
+        initial_samples : `int`
+            number of finished samples before the surrogate selects the rows
+        load_perturbation : `string`
+            perturbation of the load timeseries of randomized samples: 'independent', 'global', 'daily' or 'ar1'
+
+        Returns
+        sample inputs by name : `dict`
+        -------
+        """
+        if self.sample_design is not None:
+            sample_row = self.get_next_sample_row(sample-1, initial_samples)
+            return self.get_sample_inputs(sample_row, base_inputs)
+        
+        sample_inputs = dict()
+        sample_inputs['pv_investment_costs'] = [self.generate_random_sample(sample_input=pv_investment_costs, max_deviation=0.2)
+                                                for pv_investment_costs in base_inputs['pv_investment_costs']]
+        sample_inputs['load'] = self.generate_random_sample(sample_input=base_inputs['load'],
+                                                            max_deviation=0.2,
+                                                            structure=load_perturbation)
+        sample_inputs['battery_investment_costs'] = self.generate_random_sample(sample_input=base_inputs['battery_investment_costs'],
+                                                                                max_deviation=0.5)
+        
+        return sample_inputs
+    
+    def get_next_sample_row(self, sample, initial_samples):
+        """gives back the design row of the next sample: rows in order for the first samples, then the row of the unused
+        candidate of the design the surrogate of the finished samples (objective, pv peak, battery capacity) is most uncertain about
+
+        Parameters
+        ----------
+        sample : `int`
+            row of the next sample if the rows are used in order
+        initial_samples : `int`
+            number of finished samples before the surrogate selects the rows
+
+        Returns
+        design row : `int`
+        -------
+        """
+        if self.surrogate is None or len(self.sample_factors) < initial_samples:
+            return sample
+        
+        x = [[factors[name] for name in self.parameter_names] for factors in self.sample_factors]
+        y = np.column_stack([self.opt_obj, self.pv_peak, self.batt_capa])
+        self.surrogate.fit(x, y)
+        candidates = [row for row in range(len(self.sample_design)) if row not in self.used_rows]
+        selected = self.surrogate.select_next_samples(self.sample_design[candidates])
+        
+        return candidates[selected[0]]
+    
+    def calc_sobol_indices(self, outputs):
+        """calculates first-order and total Sobol indices of the outputs of the samples of a Saltelli design
+        (estimators of Saltelli 2010 and Jansen 1999)
+
+        Parameters
+        ----------
+        outputs : `list`
+            output (e.g. optimization objective) of each sample of the Saltelli design, in order of the design
+
+        Returns
+        sobol indices : `DataFrame`
+            first-order (S1) and total (ST) index of each parameter
+        -------
+        """
+        dimension = len(self.parameter_names)
+        outputs = np.asarray(outputs, dtype=float).reshape(dimension+2, -1)
+        output_a = outputs[0]
+        output_b = outputs[1]
+        output_ab = outputs[2:]
+        variance = np.var(np.concatenate([output_a, output_b]))
+        
+        first_order = np.mean(output_b * (output_ab - output_a), axis=1) / variance
+        total = 0.5 * np.mean((output_a - output_ab)**2, axis=1) / variance
+        
+        return pd.DataFrame({'S1': first_order, 'ST': total}, index=self.parameter_names)
+    
+    def print_sobol_indices(self, sobol_indices):
+        
+        print('---------------------------------------------------------')
+        print('Sensitivity analysis - Sobol indices')
+        print('---------------------------------------------------------')
+        print(sobol_indices.round(4).to_string())
+
     def load_data(self, var_name):
         
         expr = self.sens_data[var_name].to_numpy()[self.iteration]
@@ -71,65 +294,112 @@ class Sensitivity_analysis():
         
         return expr
         
-    def calc_random_distribution(self, sample_input, max_deviation):
+    def get_perturbation(self, length, scale, distribution, structure = 'independent', correlation = 0.9):
+        """draws the perturbation of a timeseries (or of a single value) at once
+
+        Parameters
+        ----------
+        length : `int`
+            number of values
+        scale : `float`
+            half width of uniform distribution or standard deviation of normal distribution
+        distribution : `string`
+            'uniform' or 'normal'
+        structure : `string`
+            'independent': one draw per value, 'global': one draw for all values, 'daily': one draw per day,
+            'ar1': AR(1) noise with lag one correlation and the standard deviation of the draws
+        correlation : `float`
+            lag one correlation of 'ar1' perturbations
+
+        Returns
+        perturbation : `array`
+        -------
+        """
+        if distribution == 'uniform':
+            draw = lambda size: self.random_generator.uniform(-scale, scale, size)
+        else:
+            draw = lambda size: self.random_generator.normal(0., scale, size)
+        
+        if structure == 'global':
+            return np.repeat(draw(1), length)
+        elif structure == 'daily':
+            days = -(-length // self.steps_per_day)
+            return np.repeat(draw(days), self.steps_per_day)[:length]
+        elif structure == 'ar1':
+            #stationary AR(1): x_t = correlation*x_t-1 + sqrt(1-correlation^2)*e_t, starting from a draw of the stationary distribution
+            innovations = draw(length) * np.sqrt(1 - correlation**2)
+            innovations[:1] /= np.sqrt(1 - correlation**2)
+            return lfilter([1.], [1., -correlation], innovations)
+        elif structure != 'independent':
+            print('sens class: perturbation structure', structure, 'not known, independent draws are used')
+        
+        return draw(length)
+    
+    def calc_random_distribution(self, sample_input, max_deviation, structure = 'independent', correlation = 0.9):
         """gives back random value form a random distribution of input variable
 
         Parameters
         ----------
-        None : `None`
+        sample_input : `float` or `list`/`array`
+            input variable, each value is drawn within +-max_deviation of it
+        max_deviation : `float`
+            maximal relative deviation
+        structure : `string`
+            perturbation of timeseries ('independent', 'global', 'daily' or 'ar1', see get_perturbation)
+        correlation : `float`
+            lag one correlation of 'ar1' perturbations
 
         Returns
-        random sample of sample_input
+        random sample of sample_input : `float` or `array`
         -------
         """
-        if type(sample_input) in (float, int):
-            lower_bound = sample_input* (1-max_deviation)
-            upper_bound = sample_input* (1+max_deviation)            
-            random_sample = random.uniform(lower_bound, upper_bound)   
+        if np.ndim(sample_input) == 0 and isinstance(sample_input, (int, float, np.number)):
+            return float(sample_input * (1 + self.get_perturbation(1, max_deviation, 'uniform')[0]))
             
-        elif isinstance(sample_input, list):
-            random_sample = list()
-            for i in range(len(sample_input)): 
-                lower_bound = sample_input[i]* (1-max_deviation)
-                upper_bound = sample_input[i]* (1+max_deviation)
-                expr = random.uniform(lower_bound, upper_bound)   
-                random_sample.append(expr)
+        elif isinstance(sample_input, (list, np.ndarray)):
+            sample_input = np.asarray(sample_input, dtype=float)
+            return sample_input * (1 + self.get_perturbation(len(sample_input), max_deviation, 'uniform', structure, correlation))
                 
-        else:
-            print('sens class: wrong type of sample input passed')
-        return random_sample
+        print('sens class: wrong type of sample input passed')
         
-    def calc_gaussian_distribution(self, sample_input, standard_deviation):
+    def calc_gaussian_distribution(self, sample_input, standard_deviation, structure = 'independent', correlation = 0.9):
         """gives back random value form a gaussian distribution of input variable
 
         Parameters
         ----------
-        None : `None`
+        sample_input : `float` or `list`/`array`
+            input variable, mean of the gaussian distribution of each value
+        standard_deviation : `float`
+            standard deviation
+        structure : `string`
+            perturbation of timeseries ('independent', 'global', 'daily' or 'ar1', see get_perturbation)
+        correlation : `float`
+            lag one correlation of 'ar1' perturbations
 
         Returns
-        random sample of sample_input
+        random sample of sample_input : `float` or `array`
         -------
         """  
-        if type(sample_input) in (float, int):
-            random_sample = random.gauss(sample_input, standard_deviation)
+        if np.ndim(sample_input) == 0 and isinstance(sample_input, (int, float, np.number)):
+            return float(sample_input + self.get_perturbation(1, standard_deviation, 'normal')[0])
             
-        elif isinstance(sample_input, list):
-            random_sample = list()
-            for i in range(len(sample_input)): 
-                expr = random.gauss(sample_input[i], standard_deviation)   
-                random_sample.append(expr)
+        elif isinstance(sample_input, (list, np.ndarray)):
+            sample_input = np.asarray(sample_input, dtype=float)
+            return sample_input + self.get_perturbation(len(sample_input), standard_deviation, 'normal', structure, correlation)
                 
-        else:
-            print('sens class: wrong type of sample input passed')
-        
-        return random_sample
+        print('sens class: wrong type of sample input passed')
 
-    def save_sim_data(self,simulation, optimization):
+    def save_sim_data(self,simulation, optimization, sample = None, tech = None, objective = None):
         """saves simulation data after each iteration of simulation model and optimization with varied input variables
 
         Parameters
         ----------
-        None : `None`
+        sample : `int`
+            Sample number, the sample is recorded in results_store if set (optional)
+        tech : `class`
+            Performance instance of sample, runtime and technical metrics are recorded from it (optional)
+        objective : `float`
+            Objective of sample if it is not optimized (optimization None), e.g. total annuity costs
 
         Returns
         -------
@@ -137,7 +407,9 @@ class Sensitivity_analysis():
         self.sim = simulation
         self.opt = optimization
         
-        self.opt_obj.append(self.opt.total_costs_new)        
+        if self.opt is not None:
+            objective = self.opt.total_costs_new
+        self.opt_obj.append(objective)        
         self.pv_peak.append(self.sim.pv_tot_peak)
         self.batt_capa.append(self.sim.battery_capacity)
         
@@ -157,6 +429,50 @@ class Sensitivity_analysis():
         self.pv_tot_used_energy.append(pv_tot_power)
         
         self.battery_investment_costs.append(self.sim.battery.investment_costs_specific)
+        
+        #parameter factors of sample of the design
+        factors = None
+        if self.sample_design is not None:
+            if self.current_row is None:
+                factors = {name: 1. for name in self.parameter_names}
+            else:
+                factors = self.get_sample_values(self.current_row)
+            self.sample_factors.append(factors)
         # self.battery_SOC.append(self.sim.battery_state_of_charge)
-        # self.battery_power.append(self.sim.battery_power)                                  
-                                  
\ No newline at end of file
+        # self.battery_power.append(self.sim.battery_power)
+        
+        if self.results_store is not None and sample is not None:
+            self.results_store.record_sample(sample, self.sim, self.opt, tech, factors, objective)
+    
+    def load_results(self):
+        """restores the sample data of the finished samples of results_store, e.g. to resume a partially completed sweep
+
+        Parameters
+        ----------
+        None : `None`
+
+        Returns
+        finished samples : `set`
+        -------
+        """
+        results = self.results_store.get_results()
+        for i in range(len(results)):
+            row = results.iloc[i]
+            self.opt_obj.append(row['opt_objective'])
+            self.pv_peak.append(row['pv_peak'])
+            self.batt_capa.append(row['batt_capa'])
+            self.total_load.append(row['total_load'])
+            self.pv_tot_used_energy.append(row['pv_tot_used_energy'])
+            self.pv_investment_costs.extend(row[name] for name in results.columns if name.startswith('pv_inv_costs_'))
+            self.battery_investment_costs.append(row['battery_inv_costs'])
+            if all('factor_' + name in results.columns for name in self.parameter_names) and len(self.parameter_names):
+                self.sample_factors.append({name: row['factor_' + name] for name in self.parameter_names})
+        
+        #design rows of the restored samples are used, so that they are not selected again
+        if self.sample_design is not None:
+            for factors in self.sample_factors:
+                values = np.array([factors[name] for name in self.parameter_names], dtype=float)
+                rows = np.flatnonzero(np.all(np.isclose(self.sample_design, values), axis=1))
+                self.used_rows.update(rows.tolist())
+        
+        return set(results['sample']) if len(results) else set()
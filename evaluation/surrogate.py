@@ -0,0 +1,267 @@
+import numpy as np
+from scipy.linalg import cho_factor, cho_solve, solve_triangular
+from scipy.optimize import minimize
+
+class Surrogate_Model():
+    '''
+    Gaussian process regression surrogate of the simulate-optimize pipeline: trained on finished sensitivity samples
+    (e.g. investment cost and load factors -> objective, pv peak power, battery capacity), it predicts the outputs and their
+    uncertainty for new parameter values. Used to screen or densely interpolate the parameter space and to select the next
+    real sample where the surrogate is most uncertain (active learning).
+
+    Methods
+    -------
+    fit
+    predict
+    get_loo_error
+    select_next_samples
+
+    Note
+    ----
+    - one Gaussian process per output with squared exponential kernel, one length scale per parameter (ARD)
+    - inputs are scaled to the unit cube of the training data (or of bounds), outputs are standardized
+    - the length scales, signal and noise variance maximize the log marginal likelihood (L-BFGS-B)
+    - batches of samples are selected greedily: selected candidates are added with their predicted mean (kriging believer),
+      which reduces the uncertainty around them before the next candidate is selected
+    '''
+
+    def __init__(self,
+                 bounds = None,
+                 noise = 1e-4,
+                 optimize = True,
+                 restarts = 2,
+                 seed = None):
+        '''
+        Parameters
+        ----------
+        bounds : array of floats (parameters, 2). Lower and upper bound of each parameter, inputs are scaled with them (optional)
+        noise : float. Noise variance of the standardized outputs (start value if optimize is set)
+        optimize : boolean. Toggle whether the hyperparameters are fitted to the training data
+        restarts : int. Number of additional random starts of the hyperparameter fit
+        seed : int. Seed of the random starts
+        '''
+        self.bounds = None if bounds is None else np.asarray(bounds, dtype=float)
+        self.noise = noise
+        self.optimize = optimize
+        self.restarts = restarts
+        self.random_state = np.random.default_rng(seed)
+
+        #training data and fitted hyperparameters (log length scales, log signal variance, log noise variance) per output
+        self.x_train = None
+        self.y_train = None
+        self.hyperparameters = list()
+        self.factors = list()
+        self.alphas = list()
+
+
+    def scale_inputs(self, x):
+        '''
+        Method to scale inputs to the unit cube of the training data or bounds
+
+        Parameters
+        ----------
+        x : array of floats (samples, parameters). Parameter values
+
+        Returns
+        -------
+        x_scaled : array of floats (samples, parameters)
+        '''
+        return (np.atleast_2d(np.asarray(x, dtype=float)) - self.x_lower) / self.x_range
+
+
+    @staticmethod
+    def get_kernel(x1, x2, hyperparameters):
+        '''
+        Squared exponential kernel with one length scale per parameter
+
+        Parameters
+        ----------
+        x1 : array of floats (samples 1, parameters). Scaled inputs
+        x2 : array of floats (samples 2, parameters). Scaled inputs
+        hyperparameters : array of floats. Log length scales, log signal variance (and log noise variance)
+
+        Returns
+        -------
+        kernel : array of floats (samples 1, samples 2)
+        '''
+        dimension = x1.shape[1]
+        length_scales = np.exp(hyperparameters[:dimension])
+        distance = (((x1[:,None,:] - x2[None,:,:]) / length_scales)**2).sum(axis=2)
+
+        return np.exp(hyperparameters[dimension]) * np.exp(-0.5 * distance)
+
+
+    def get_negative_log_likelihood(self, hyperparameters, x, y):
+        '''
+        Negative log marginal likelihood of standardized outputs of one Gaussian process
+
+        Parameters
+        ----------
+        hyperparameters : array of floats. Log length scales, log signal variance and log noise variance
+        x : array of floats (samples, parameters). Scaled inputs
+        y : array of floats (samples,). Standardized outputs
+
+        Returns
+        -------
+        negative log likelihood : float
+        '''
+        kernel = self.get_kernel(x, x, hyperparameters) + (np.exp(hyperparameters[-1]) + 1e-10) * np.eye(len(x))
+        try:
+            factor = cho_factor(kernel, lower=True)
+        except np.linalg.LinAlgError:
+            return 1e10
+        alpha = cho_solve(factor, y)
+
+        return 0.5 * y @ alpha + np.log(np.diag(factor[0])).sum() + 0.5 * len(x) * np.log(2*np.pi)
+
+
+    def fit(self, x, y):
+        '''
+        Method to train the surrogate on finished samples
+
+        Parameters
+        ----------
+        x : array of floats (samples, parameters). Parameter values of finished samples
+        y : array of floats (samples, outputs) or (samples,). Outputs of finished samples
+
+        Returns
+        -------
+        self : class. Trained surrogate
+        '''
+        x = np.atleast_2d(np.asarray(x, dtype=float))
+        y = np.asarray(y, dtype=float)
+        self.single_output = y.ndim == 1
+        y = y.reshape(len(x), -1)
+        dimension = x.shape[1]
+
+        if self.bounds is not None:
+            self.x_lower = self.bounds[:,0]
+            self.x_range = self.bounds[:,1] - self.bounds[:,0]
+        else:
+            self.x_lower = x.min(axis=0)
+            self.x_range = x.max(axis=0) - self.x_lower
+        self.x_range = np.where(self.x_range > 0, self.x_range, 1.)
+        self.y_mean = y.mean(axis=0)
+        self.y_std = np.where(y.std(axis=0) > 0, y.std(axis=0), 1.)
+
+        self.x_train = x
+        self.y_train = y
+        x_scaled = self.scale_inputs(x)
+        y_scaled = (y - self.y_mean) / self.y_std
+
+        start = np.concatenate([np.full(dimension, np.log(0.5)), [0., np.log(self.noise)]])
+        limits = [(np.log(1e-2), np.log(1e2))]*dimension + [(np.log(1e-2), np.log(1e2)), (np.log(1e-8), np.log(1.))]
+        previous = self.hyperparameters if len(self.hyperparameters) == y.shape[1] else None
+        self.hyperparameters = list()
+        self.factors = list()
+        self.alphas = list()
+        for j in range(y.shape[1]):
+            hyperparameters = start if previous is None else previous[j]
+            if self.optimize and len(x) > 1:
+                starts = [hyperparameters] + [np.array([self.random_state.uniform(low, high) for low, high in limits])
+                                              for _ in range(self.restarts)]
+                results = [minimize(self.get_negative_log_likelihood, hyperparameter_start, args=(x_scaled, y_scaled[:,j]),
+                                    method='L-BFGS-B', bounds=limits) for hyperparameter_start in starts]
+                hyperparameters = min(results, key=lambda result: result.fun).x
+            kernel = self.get_kernel(x_scaled, x_scaled, hyperparameters) + (np.exp(hyperparameters[-1]) + 1e-10) * np.eye(len(x))
+            factor = cho_factor(kernel, lower=True)
+            self.hyperparameters.append(hyperparameters)
+            self.factors.append(factor)
+            self.alphas.append(cho_solve(factor, y_scaled[:,j]))
+
+        return self
+
+
+    def predict(self, x, return_std = False):
+        '''
+        Method to predict the outputs of parameter values
+
+        Parameters
+        ----------
+        x : array of floats (samples, parameters). Parameter values
+        return_std : boolean. Toggle whether the standard deviation of the prediction is returned as well
+
+        Returns
+        -------
+        mean : array of floats (samples, outputs). Predicted outputs ((samples,) if trained on one output)
+        std : array of floats (samples, outputs). Standard deviation of predicted outputs (if return_std)
+        '''
+        x_scaled = self.scale_inputs(x)
+        x_train_scaled = self.scale_inputs(self.x_train)
+        mean = np.empty((len(x_scaled), len(self.alphas)))
+        std = np.empty((len(x_scaled), len(self.alphas)))
+        for j in range(len(self.alphas)):
+            kernel_cross = self.get_kernel(x_train_scaled, x_scaled, self.hyperparameters[j])
+            mean[:,j] = kernel_cross.T @ self.alphas[j]
+            if return_std:
+                v = solve_triangular(self.factors[j][0], kernel_cross, lower=True)
+                variance = np.exp(self.hyperparameters[j][-2]) - (v**2).sum(axis=0)
+                std[:,j] = np.sqrt(np.maximum(variance, 0.))
+
+        mean = mean * self.y_std + self.y_mean
+        std = std * self.y_std
+        if self.single_output:
+            mean = mean[:,0]
+            std = std[:,0]
+
+        if return_std:
+            return mean, std
+        return mean
+
+
+    def get_loo_error(self):
+        '''
+        Method to get the leave-one-out error of the training samples (closed form, without refitting)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        rmse : array of floats (outputs,). Root mean squared leave-one-out error of each output
+        '''
+        rmse = np.empty(len(self.alphas))
+        for j in range(len(self.alphas)):
+            kernel_inverse = cho_solve(self.factors[j], np.eye(len(self.x_train)))
+            residuals = self.alphas[j] / np.diag(kernel_inverse)
+            rmse[j] = np.sqrt(np.mean(residuals**2)) * self.y_std[j]
+
+        return rmse
+
+
+    def select_next_samples(self, candidates, n_samples = 1):
+        '''
+        Method to select the candidates the surrogate is most uncertain about as next real samples
+
+        Parameters
+        ----------
+        candidates : array of floats (candidates, parameters). Parameter values of candidate samples, e.g. of a design
+        n_samples : int. Number of samples selected
+
+        Returns
+        -------
+        selected : list of ints. Indices of selected candidates
+        '''
+        candidates = np.atleast_2d(np.asarray(candidates, dtype=float))
+        surrogate = self
+        x_train = self.x_train
+        y_train = self.y_train
+        selected = list()
+        for i in range(min(n_samples, len(candidates))):
+            mean, std = surrogate.predict(candidates, return_std=True)
+            #uncertainty of all outputs relative to their spread
+            score = (std.reshape(len(candidates), -1) / self.y_std).sum(axis=1)
+            score[selected] = -np.inf
+            selected.append(int(np.argmax(score)))
+            if i < n_samples - 1:
+                #selected candidate is added with its predicted mean, hyperparameters are kept
+                x_train = np.vstack([x_train, candidates[selected[-1]]])
+                y_train = np.vstack([y_train, np.reshape(mean[selected[-1]], (1, -1))])
+                surrogate = Surrogate_Model(bounds=np.column_stack([self.x_lower, self.x_lower + self.x_range]),
+                                            optimize=False)
+                surrogate.hyperparameters = self.hyperparameters
+                surrogate.fit(x_train, y_train)
+                surrogate.single_output = self.single_output
+
+        return selected
@@ -7,8 +7,20 @@ Created on Wed May 19 15:49:50 2021
 import pyomo.environ as pyo
 import pyomo.gdp as gdp
 import numpy as np
+import pandas as pd
 from datetime import datetime
 import os
+import re
+import io
+import time
+import tempfile
+from contextlib import redirect_stdout
+from pyomo.common.errors import ApplicationError
+from pyomo.core.expr.calculus.derivatives import differentiate
+
+from checkpoint import Checkpoint
+from optimization.solver_backend import Solver_Backend
+from profiler import profile_phase
 
 class Optimization_model():
     """Relevant methods to optimize model.
@@ -34,13 +46,32 @@ class Optimization_model():
         self.opt_pv_size = opt_pv_size
         self.opt_batt_size = opt_batt_size
         #solver specifications
-        self.solver_type = 'ma57'                                               #solver to be used to solve the model (must be donloaded first)
+        self.solver_backend = Solver_Backend(linear_solver = 'ma57')            #solver selection and options: Ipopt linear solver (MUMPS if MA57 is not installed), LP solvers, persistent interfaces and warm start
+        #scaling
+        self.auto_scaling = True                                                #Toggle whether model scale and variable/constraint scaling factors are derived from the data magnitudes (Ipopt user-scaling)
+        self.order_of_magnitude = self.sim.order_of_magnitude                   #scale of powers [W] and prices [$/Wh] in the model, replaced by the power magnitude of the data if auto_scaling
+        self.scaling_factor_limits = (1e-6, 1e6)                                #bounds of automatic variable and constraint scaling factors
+        self.scaling_report = None                                              #Jacobian statistics before and after automatic scaling (set by set_scaling_factors)
+        #solver statistics
+        self.solver_stats = list()                                              #records of model size, timings and solver results of each solve (list can be shared between instances)
+        self.sample = 0                                                         #sensitivity analysis sample of the current model data, recorded in solver_stats
+        self.construction_time = None                                           #[s] time needed by init_model to build the model
+        self.scaling_time = None                                                #[s] time thereof needed to derive the scaling factors
+        self.check_infeasibility = False                                        #Toggle whether the largest constraint violation is computed by a scan of all constraints if the solver log does not report it (slow for long horizons)
         #fit efficiencies through polynomial fit
         self.poly_fit_eff = False                                               #Toggle whether efficiency are to be approximated by a polynomial fit: experimental and unstable
         self.exact_ch_eff = True                                                #Toggle whether to include a linear efficiency model for the battery
+        #linear programming formulation
+        self.linear_model = False                                               #Toggle whether a linearized model (fixed efficiencies of the last simulation pass, linear sizing) is solved with an LP solver
         
         self.deviation_threshold = 0.01                                         #maximal allowed deviation between two consecutive iterations
         self.low_dev_in_row = 1                                                 #number of consecutive deviations with acceptable deviation neede to exit 
+        self.checkpoint = None                                                  #Checkpoint instance to save optimizer iteration data (optional)
+        self.profiler = None                                                    #Profiler instance to record run time of solve and result extraction (optional)
+        self.fixed_point = None                                                 #Fixed_Point instance to accelerate the exchange of efficiency vectors with the simulation (optional)
+        self.decomposition = None                                               #Decomposition instance to solve the model in blocks of time steps in parallel (optional)
+        self.solver_cache = None                                                #Solver_Cache instance to reuse the solutions of solves of identical model data and options (optional)
+        self.horizon_steps = None                                               #number of time steps of the whole horizon, if the model covers a block of it only (decomposition)
         
         
         #%%initialize optimization model
@@ -52,6 +83,8 @@ class Optimization_model():
         #objective function result
         self.total_costs_new = 0
         self.total_costs_old = 0
+        #objectives of NLP and linear model on the same model data (set by compare_formulations)
+        self.formulation_comparison = None
         
         #power flows lists
         self.battery_flow = list()
@@ -63,6 +96,7 @@ class Optimization_model():
         self.bought_power_list = list()
         self.sold_power_list = list()
         self.power_shortage_list = list()        
+        self.pv_module_power = list()
         
         #save first pv power flows
         self.pv_max_power_start = list()
@@ -90,6 +124,10 @@ class Optimization_model():
         #demand 
         self.demand = self.sim.load_power_demand
         
+        #model scale of powers and prices
+        if self.auto_scaling:
+            self.order_of_magnitude = self.get_order_of_magnitude()
+        
         #buy and sell parameters
         self.buyprice = list()
         self.sellprice = list()
@@ -173,7 +211,7 @@ class Optimization_model():
         if self.sim.battery is not None:
             self.LCOE_battery_charge = self.sim.battery.LCOE_battery
             self.bat_total_LCOE_factor = eco_bat.total_LCOE_factor      
-            self.num_battery_arrays = 1                                         #-->later make based on # of wind arrays in simulation
+            self.num_battery_arrays = self.sim.battery_strings                  #parallel strings of equal capacity, sized together
             self.battery_array_nominal_capacity = self.sim.battery_capacity
             self.max_battery_capacity = self.sim.max_battery_capacity
             self.battery_capacity_current_wh = self.sim.battery_capacity_current_wh
@@ -197,13 +235,21 @@ class Optimization_model():
             self.SOC_start = self.sim.battery.state_of_charge_init
             self.SOC_min = self.sim.battery.end_of_discharge_b
             self.SOC_max = self.sim.battery.end_of_charge_b
+            #maximal battery power [W]: usable energy of the largest allowed battery per time step of the state of charge balance,
+            #charge power additionally covers battery charging and charger losses at this power
+            usable_capacity = (self.SOC_max - self.SOC_min) * self.max_battery_capacity
+            max_charging_efficiency = self.sim.battery.charge_power_efficiency_a * (self.SOC_max - self.SOC_min) + self.sim.battery.charge_power_efficiency_b
             self.battery_min_charge_power = 0   
-            self.battery_max_charge_power = 600    
+            self.battery_max_charge_power = usable_capacity / (max_charging_efficiency * max(min(self.battery_charger_efficiency), 0.5))
             self.battery_min_discharge_power = 0  
-            self.battery_max_discharge_power = 600
+            self.battery_max_discharge_power = usable_capacity
             
             self.battery_self_discharge = 3.8072e-09 *self.time_step
         
+        #accelerate the fixed point iteration of efficiency vectors between simulation and optimization
+        if self.fixed_point is not None:
+            self.fixed_point.update(self)
+        
         #set update flag 
         self.update = True
         
@@ -224,6 +270,15 @@ class Optimization_model():
         #go into next optimization model iteration
         self.iteration +=1       
         
+        #residual of the efficiency vectors the updated simulation returns for the current iteration
+        if self.fixed_point is not None:
+            print('relative residual of efficiency vectors:', self.fixed_point.evaluate(self))
+        
+        #convergence on the exchanged efficiency vectors instead of the total costs
+        if self.fixed_point is not None and self.fixed_point.convergence == 'vectors':
+            self.total_costs_old = self.total_costs_new
+            return not self.fixed_point.is_converged(self.iteration)
+        
         #check whether deviation is within acceptable bounds between iterations
         if self.deviation_threshold == 0:
             print('deviation threshold needs to be greater than 0')
@@ -270,9 +325,20 @@ class Optimization_model():
         None        
         '''
        
+        #block models are built by the decomposition
+        if self.decomposition is not None:
+            return
+        
         #%%declaration of model components
+        construction_start = time.perf_counter()
+        self.scaling_time = None
         self.model = pyo.ConcreteModel()
         
+        #linear model: efficiencies are fixed parameters of the last simulation pass and the size modifiers only scale variables linearly
+        linear = self.linear_model
+        poly_fit_eff = self.poly_fit_eff and not linear
+        exact_ch_eff = self.exact_ch_eff and not linear
+        
         #objective variables
         self.model.econ_opt = pyo.Var(initialize = 1)
         
@@ -280,40 +346,24 @@ class Optimization_model():
         self.model.S = pyo.Set(initialize = [1,])
         
         #timesteps 
-        self.model.sim_step = pyo.Param( initialize = self.simulation_steps)
+        self.model.sim_step = pyo.Param( initialize = self.horizon_steps or self.simulation_steps)
         self.model.simulation_steps = pyo.RangeSet(1,self.simulation_steps)
         self.model.time_step = pyo.Param(initialize = self.time_step)
         
+        #all timeseries are passed in bulk as pre-scaled dicts instead of per timestep rules
+        scale = 1 / self.order_of_magnitude
+        
         #demand curve data
-        def demand_init_rule(m,t):
-            return self.demand[t-1] / self.sim.order_of_magnitude
-        self.model.demand = pyo.Param(self.model.simulation_steps, initialize = demand_init_rule)
+        self.model.demand = pyo.Param(self.model.simulation_steps, initialize = self.get_init_data(self.demand, scale))
         
         
         #%%Grid Parameters
-        def buyprice_rule(m, t):
-            return self.buyprice[t-1] * self.sim.order_of_magnitude
-        self.model.grid_buyprice = pyo.Param(self.model.simulation_steps, initialize = buyprice_rule)
+        self.model.grid_buyprice = pyo.Param(self.model.simulation_steps, initialize = self.get_init_data(self.buyprice, self.order_of_magnitude))
+        self.model.grid_sellprice = pyo.Param(self.model.simulation_steps, initialize = self.get_init_data(self.sellprice, self.order_of_magnitude))
         
-        def sellprice_rule(m,t):
-            return self.sellprice[t-1] * self.sim.order_of_magnitude
-        self.model.grid_sellprice = pyo.Param(self.model.simulation_steps, initialize = sellprice_rule)
-        
-        def buy_rule(m,t):
-            if not self.bought_power_list:
-                return 0
-            else:
-                #init with old iteration values
-                return self.bought_power_list[t-1] / self.sim.order_of_magnitude
-        self.model.grid_current_bought_power = pyo.Var(self.model.simulation_steps, initialize = buy_rule, bounds = (0, self.max_buy))
-        
-        def sell_rule(m,t):
-            if not self.sold_power_list:
-                return 0
-            else:
-                #init with old iteration values
-                return self.sold_power_list[t-1] / self.sim.order_of_magnitude
-        self.model.grid_current_sold_power = pyo.Var(self.model.simulation_steps, initialize = sell_rule, bounds= (0, self.max_sell))
+        #init with old iteration values
+        self.model.grid_current_bought_power = pyo.Var(self.model.simulation_steps, initialize = self.get_init_data(self.bought_power_list, scale), bounds = (0, self.max_buy*scale))
+        self.model.grid_current_sold_power = pyo.Var(self.model.simulation_steps, initialize = self.get_init_data(self.sold_power_list, scale), bounds= (0, self.max_sell*scale))
         
         #%%shortage parameters
         def shortage_cost_rule(m, shortage_cost):
@@ -323,25 +373,20 @@ class Optimization_model():
             
             #set a shortage cost price higher than other energy costs if none specified
             if not shortage_cost:
-                shortage_cost = (max(expr) + 1) * self.sim.order_of_magnitude
+                shortage_cost = (max(expr) + 1) * self.order_of_magnitude
                 return shortage_cost
             #set the specified cost as self.model shortage cost
             else:
-                return shortage_cost * self.sim.order_of_magnitude
+                return shortage_cost * self.order_of_magnitude
             
         self.model.shortage_costs = pyo.Param(initialize = shortage_cost_rule(self.model,self.LCOE_shortage))
         
-        def shortage_power_rule(m,t):
-            if not self.power_shortage_list:
-                return 0
-            else:
-                #init with old iteration values
-                return self.power_shortage_list[t-1] / self.sim.order_of_magnitude
-        self.model.shortage_power = pyo.Var(self.model.simulation_steps, initialize = shortage_power_rule, bounds = (0, self.max_shortage_power))
+        #init with old iteration values
+        self.model.shortage_power = pyo.Var(self.model.simulation_steps, initialize = self.get_init_data(self.power_shortage_list, scale), bounds = (0, self.max_shortage_power*scale))
         
         #%%power components data
-        self.model.pvCharger_total_LCOE_factor = pyo.Param(initialize = self.pvCharger_total_LCOE_factor *self.sim.order_of_magnitude)
-        self.model.bms_total_LCOE_factor = pyo.Param(initialize = self.bms_total_LCOE_factor *self.sim.order_of_magnitude)
+        self.model.pvCharger_total_LCOE_factor = pyo.Param(initialize = self.pvCharger_total_LCOE_factor *self.order_of_magnitude)
+        self.model.bms_total_LCOE_factor = pyo.Param(initialize = self.bms_total_LCOE_factor *self.order_of_magnitude)
         
         #%%PV
         self.model.num_pv_sources = pyo.Param(initialize = self.num_pv_sources)
@@ -354,46 +399,52 @@ class Optimization_model():
         def pv_comp_rule (model_block, model_set):
             model_block.pv_sources_set = pyo.RangeSet(model_set)   #-->in case of use within other file
             
-            model_block.pv_total_LCOE_factor = pyo.Param(initialize = self.pv_total_LCOE_factor[model_set-1] *self.sim.order_of_magnitude)
+            model_block.pv_total_LCOE_factor = pyo.Param(initialize = self.pv_total_LCOE_factor[model_set-1] *self.order_of_magnitude)
             if self.iteration <=1:
-                model_block.pv_cost = pyo.Var( initialize = self.LCOE_pv[model_set-1] * self.sim.order_of_magnitude, within = pyo.NonNegativeReals)
+                model_block.pv_cost = pyo.Var( initialize = self.LCOE_pv[model_set-1] * self.order_of_magnitude, within = pyo.NonNegativeReals)
             else:
-                model_block.pv_cost = pyo.Var( initialize = self.LCOE_pv_old[model_set-1] * self.sim.order_of_magnitude, within = pyo.NonNegativeReals)
+                model_block.pv_cost = pyo.Var( initialize = self.LCOE_pv_old[model_set-1] / 1000 * self.order_of_magnitude, within = pyo.NonNegativeReals)
 
-            model_block.pv_array_kWp = pyo.Param( initialize = self.pv_array_kWp[model_set-1] / self.sim.order_of_magnitude)
-            model_block.max_pv_kWp = pyo.Param( initialize = self.max_pv_peak_power[model_set-1] / self.sim.order_of_magnitude)
+            model_block.pv_array_kWp = pyo.Param( initialize = self.pv_array_kWp[model_set-1] / self.order_of_magnitude)
+            model_block.max_pv_kWp = pyo.Param( initialize = self.max_pv_peak_power[model_set-1] / self.order_of_magnitude)
             
-            def pv_max_power_rule(_model_block, t):
-                return self.pv_max_power[model_set-1][t-1]/ self.sim.order_of_magnitude                       
-            model_block.pv_max_power = pyo.Param(self.model.simulation_steps, initialize = pv_max_power_rule)
+            model_block.pv_max_power = pyo.Param(self.model.simulation_steps, initialize = self.get_init_data(self.pv_max_power[model_set-1], scale))
             
             def pv_used_power_rule(m):
-                return self.pv_used_power_old[model_set-1]/self.sim.order_of_magnitude
+                return self.pv_used_power_old[model_set-1]/self.order_of_magnitude
             model_block.pv_used_power = pyo.Param(initialize = pv_used_power_rule)
             
-            def pv_power_rule(m,t):
-                if not self.pv_flow:
-                    return 0
-                else:
-                    #init with old iteration values
-                    return self.pv_flow[model_set-1][t-1]
-            model_block.pv_module_power = pyo.Var(self.model.simulation_steps, initialize = pv_power_rule, bounds = (0,1))
+            #init with old iteration values of the used share of pv power
+            if len(self.pv_module_power) == 0:
+                model_block.pv_module_power = pyo.Var(self.model.simulation_steps, initialize = 0, bounds = (0,1))
+            else:
+                model_block.pv_module_power = pyo.Var(self.model.simulation_steps, initialize = self.get_init_data(self.pv_module_power[model_set-1]), bounds = (0,1))
             
             if self.opt_pv_size == True and self.iteration >=1 :
                 model_block.pv_peak_mod = pyo.Var(self.model.S,initialize = 1, bounds = (0.01,10))
             else:
                 model_block.pv_peak_mod = pyo.Param(self.model.S, initialize = 1)
             
+            if linear:
+                #used pv power share multiplied with the peak power modifier (pv_module_power * pv_peak_mod) to keep sizing linear
+                model_block.pv_scaled_module_power = pyo.Var(self.model.simulation_steps, initialize = model_block.pv_module_power.extract_values(), bounds = (0,10))
+                #pv energy used at the last iteration, with which the pv LCOE is weighted in the objective
+                if len(self.pv_module_power) == 0:
+                    used_share = np.ones(self.simulation_steps)
+                else:
+                    used_share = np.asarray(self.pv_module_power[model_set-1], dtype=float)[:self.simulation_steps]
+                model_block.pv_reference_energy = pyo.Param(initialize = float(np.sum(np.asarray(self.pv_max_power[model_set-1], dtype=float)[:self.simulation_steps]\
+                                                                                        * used_share)) * scale)
+            
             def pv_eff_coeff_rule(_model_block, coeff_set):
                 return self.sim.pv_charger.eff_coeff_array[coeff_set-1]
             
-            def pv_charger_efficiency_rule(_model_block, t):
-                return self.pv_charger_efficiency[t-1]
-            if self.poly_fit_eff:
-                model_block.pv_charger_efficiency = pyo.Var(self.model.simulation_steps, initialize = pv_charger_efficiency_rule,bounds = (0,1))    
+            pv_charger_efficiency = self.get_init_data(self.pv_charger_efficiency)
+            if poly_fit_eff:
+                model_block.pv_charger_efficiency = pyo.Var(self.model.simulation_steps, initialize = pv_charger_efficiency,bounds = (0,1))    
                 model_block.ch_eff_param = pyo.Param(self.model.pv_charger_eff_coeff_set, initialize = pv_eff_coeff_rule)
             else:
-                model_block.pv_charger_efficiency = pyo.Param(self.model.simulation_steps, initialize = pv_charger_efficiency_rule)    
+                model_block.pv_charger_efficiency = pyo.Param(self.model.simulation_steps, initialize = pv_charger_efficiency)    
             
         self.model.pv_comp_block = pyo.Block(self.model.pv_sources_set, rule = pv_comp_rule)
         
@@ -404,120 +455,135 @@ class Optimization_model():
             self.model.battery_charger_eff_coeff_set = pyo.RangeSet(1,len(self.sim.battery_management.eff_coeff_array))
             self.model.batt_eff_fit_deg = pyo.Param(initialize = len(self.sim.battery_management.eff_coeff_array))
         
+        #battery strings share the capacity, power limits and power flows of the simulated battery equally
+        string_scale = scale / self.num_battery_arrays
+        
+        #one size modifier of all strings, as the simulation models them as one battery
+        if self.opt_batt_size == True and self.iteration >=1:
+            self.model.battery_peak_mod = pyo.Var(self.model.S, initialize = 1, bounds = (0.01,5))
+        else:
+            self.model.battery_peak_mod = pyo.Param(self.model.S, initialize = 1)
+        
         #block used for construction of battery model components
         def battery_comp_rule (model_block, model_set):
             model_block.battery_sources_set = pyo.RangeSet(model_set)   #-->in case of use within other file
             
-            model_block.bat_total_LCOE_factor = pyo.Param(initialize = self.bat_total_LCOE_factor *self.sim.order_of_magnitude )
-            model_block.battery_charge_cost = pyo.Var(initialize = self.LCOE_battery_charge*self.sim.order_of_magnitude, within = pyo.NonNegativeReals)
+            model_block.bat_total_LCOE_factor = pyo.Param(initialize = self.bat_total_LCOE_factor *self.order_of_magnitude )
+            model_block.battery_charge_cost = pyo.Var(initialize = self.LCOE_battery_charge*self.order_of_magnitude, within = pyo.NonNegativeReals)
             
-            model_block.bat_array_kWp = pyo.Param( initialize = self.battery_array_nominal_capacity/self.sim.order_of_magnitude)
-            model_block.max_battery_capacity = pyo.Param( initialize = self.max_battery_capacity/self.sim.order_of_magnitude)
+            model_block.bat_array_kWp = pyo.Param( initialize = self.battery_array_nominal_capacity * string_scale)
+            model_block.max_battery_capacity = pyo.Param( initialize = self.max_battery_capacity * string_scale)
             
-            if self.opt_batt_size == True and self.iteration >=1:
-                model_block.battery_peak_mod = pyo.Var(self.model.S, initialize = 1, bounds = (0.01,5))
-            else:
-                model_block.battery_peak_mod = pyo.Param(self.model.S, initialize = 1)
-            
-            def battery_discharge_rule(m,t):
-                if not self.battery_discharge_list:
-                    return 0
-                else:
-                    #init with old iteration values
-                    return self.battery_discharge_list[t-1] / self.sim.order_of_magnitude
-            model_block.battery_current_discharge_power = pyo.Var(self.model.simulation_steps, initialize = battery_discharge_rule, bounds = (self.battery_min_discharge_power,self.battery_max_discharge_power))
+            #init with old iteration values
+            model_block.battery_current_discharge_power = pyo.Var(self.model.simulation_steps, initialize = self.get_init_data(self.battery_discharge_list, string_scale), bounds = (self.battery_min_discharge_power*string_scale,self.battery_max_discharge_power*string_scale))
+            model_block.battery_current_charge_power = pyo.Var(self.model.simulation_steps, initialize = self.get_init_data(self.battery_charge_list, string_scale), bounds = (self.battery_min_charge_power*string_scale,self.battery_max_charge_power*string_scale))
             
-            def battery_charge_rule(m,t):
-                if not self.battery_charge_list:
-                    return 0
-                else:
-                    #init with old iteration values
-                    return self.battery_charge_list[t-1] / self.sim.order_of_magnitude
-            model_block.battery_current_charge_power = pyo.Var(self.model.simulation_steps, initialize = battery_charge_rule, bounds = (self.battery_min_charge_power,self.battery_max_charge_power))
-            
-            def battery_charged_power_rule(m,t):
-                return self.battery_charged_power[t-1] / self.sim.order_of_magnitude
-            model_block.battery_charged_power = pyo.Param(self.model.simulation_steps, initialize = battery_charged_power_rule)
-                
-            
-            def battery_array_capacity_rule(_model_block, t):
-                return self.battery_capacity_current_wh[t-1] / self.sim.order_of_magnitude
-            model_block.battery_capacity_current_wh = pyo.Param(self.model.simulation_steps, initialize = battery_array_capacity_rule)
+            model_block.battery_charged_power = pyo.Param(self.model.simulation_steps, initialize = self.get_init_data(self.battery_charged_power, string_scale))
+            model_block.battery_capacity_current_wh = pyo.Param(self.model.simulation_steps, initialize = self.get_init_data(self.battery_capacity_current_wh, string_scale))
             
             model_block.SOC_min = pyo.Param(initialize = self.SOC_min)
             model_block.SOC_max = pyo.Param(initialize = self.SOC_max)
             model_block.SOC_start = pyo.Param(initialize = self.SOC_start)
             model_block.battery_SOC = pyo.Var(self.model.simulation_steps, initialize = model_block.SOC_max, bounds = (self.SOC_min, self.SOC_max))
+            if linear:
+                #stored energy (battery_SOC * battery_peak_mod * battery_capacity_current_wh) to keep the state of charge balance linear
+                model_block.battery_energy = pyo.Var(self.model.simulation_steps, initialize = self.get_init_data(self.battery_capacity_current_wh, string_scale * self.SOC_max),
+                                                     within = pyo.NonNegativeReals)
             model_block.battery_self_discharge = pyo.Param(initialize = self.battery_self_discharge)
             
             #battery and battery management efficiencies
             def bat_eff_coeff_rule(_model_block, coeff_set):
                 return self.sim.battery_management.eff_coeff_array[coeff_set-1]
             
-            def battery_charger_efficiency_rule(_model_block, t):
-                return self.battery_charger_efficiency[t-1]
-            if self.poly_fit_eff:
-                model_block.battery_charger_efficiency = pyo.Var(self.model.simulation_steps, initialize = battery_charger_efficiency_rule, bounds = (0,1))   
+            battery_charger_efficiency = self.get_init_data(self.battery_charger_efficiency)
+            if poly_fit_eff:
+                model_block.battery_charger_efficiency = pyo.Var(self.model.simulation_steps, initialize = battery_charger_efficiency, bounds = (0,1))   
                 model_block.ch_eff_param = pyo.Param(self.model.battery_charger_eff_coeff_set, initialize = bat_eff_coeff_rule)
 
             else:
-                model_block.battery_charger_efficiency = pyo.Param(self.model.simulation_steps, initialize = battery_charger_efficiency_rule)   
+                model_block.battery_charger_efficiency = pyo.Param(self.model.simulation_steps, initialize = battery_charger_efficiency)   
             
-            def battery_discharger_efficiency_rule(_model_block, t):
-                return self.battery_discharger_efficiency[t-1]
-            if self.poly_fit_eff:
-                model_block.battery_discharger_efficiency = pyo.Var(self.model.simulation_steps, initialize = battery_discharger_efficiency_rule, bounds = (0,1))    
+            battery_discharger_efficiency = self.get_init_data(self.battery_discharger_efficiency)
+            if poly_fit_eff:
+                model_block.battery_discharger_efficiency = pyo.Var(self.model.simulation_steps, initialize = battery_discharger_efficiency, bounds = (0,1))    
                 model_block.power_self_consumption = pyo.Param(initialize = self.sim.battery_management.power_self_consumption)
                 model_block.voltage_loss = pyo.Param(initialize = self.sim.battery_management.voltage_loss)
                 model_block.resistance_loss = pyo.Param(initialize = self.sim.battery_management.resistance_loss)
             else:
-                model_block.battery_discharger_efficiency = pyo.Param(self.model.simulation_steps, initialize = battery_discharger_efficiency_rule)    
+                model_block.battery_discharger_efficiency = pyo.Param(self.model.simulation_steps, initialize = battery_discharger_efficiency)    
             
-            def battery_charging_efficiency_rule(_model_block, t):
-                return self.battery_charging_efficiency[t-1]
-            if self.exact_ch_eff:
+            battery_charging_efficiency = self.get_init_data(self.battery_charging_efficiency)
+            if exact_ch_eff:
                 model_block.charge_power_efficiency_a = pyo.Param(initialize = self.sim.battery.charge_power_efficiency_a)
                 model_block.charge_power_efficiency_b = pyo.Param(initialize = self.sim.battery.charge_power_efficiency_b)
-                model_block.battery_charging_efficiency = pyo.Var(self.model.simulation_steps, initialize = battery_charging_efficiency_rule, bounds = (0,1))
+                model_block.battery_charging_efficiency = pyo.Var(self.model.simulation_steps, initialize = battery_charging_efficiency, bounds = (0,1))
             else:
-                model_block.battery_charging_efficiency = pyo.Param(self.model.simulation_steps, initialize = battery_charging_efficiency_rule)
+                model_block.battery_charging_efficiency = pyo.Param(self.model.simulation_steps, initialize = battery_charging_efficiency)
             
-            def battery_discharging_efficiency_rule(_model_block, t):
-                return self.battery_discharging_efficiency[t-1]
-            if self.exact_ch_eff:
+            battery_discharging_efficiency = self.get_init_data(self.battery_discharging_efficiency)
+            if exact_ch_eff:
                 model_block.discharge_power_efficiency_a = pyo.Param(initialize = self.sim.battery.discharge_power_efficiency_a)
                 model_block.discharge_power_efficiency_b = pyo.Param(initialize = self.sim.battery.discharge_power_efficiency_b)
-                model_block.battery_discharging_efficiency = pyo.Var(self.model.simulation_steps, initialize = battery_discharging_efficiency_rule, bounds =(0,1))
+                model_block.battery_discharging_efficiency = pyo.Var(self.model.simulation_steps, initialize = battery_discharging_efficiency, bounds =(0,1))
             else:
-                model_block.battery_discharging_efficiency = pyo.Param(self.model.simulation_steps, initialize = battery_discharging_efficiency_rule)
+                model_block.battery_discharging_efficiency = pyo.Param(self.model.simulation_steps, initialize = battery_discharging_efficiency)
             
-            model_block.battery_min_charge_power = pyo.Param(initialize = self.battery_min_charge_power)
-            model_block.battery_min_discharge_power = pyo.Param(initialize = self.battery_min_discharge_power)
+            model_block.battery_min_charge_power = pyo.Param(initialize = self.battery_min_charge_power*string_scale)
+            model_block.battery_min_discharge_power = pyo.Param(initialize = self.battery_min_discharge_power*string_scale)
             
         self.model.battery_comp_block = pyo.Block(self.model.battery_arrays_set, rule = battery_comp_rule)
         
+        #%%Time series of model components
+        #bound once in time step order (Var data or Param values), so that constraints are constructed without per timestep component lookups
+        steps = range(self.simulation_steps)
+        pv_blocks = [self.model.pv_comp_block[b] for b in self.model.pv_sources_set]
+        pv_max_power = [self.get_component_data(block.pv_max_power) for block in pv_blocks]
+        pv_module_power = [self.get_component_data(block.pv_module_power) for block in pv_blocks]
+        pv_charger_efficiency = [self.get_component_data(block.pv_charger_efficiency) for block in pv_blocks]
+        pv_peak_mod = [block.pv_peak_mod[1] for block in pv_blocks]
+        if linear:
+            pv_scaled_module_power = [self.get_component_data(block.pv_scaled_module_power) for block in pv_blocks]
+        
+        bat_blocks = [self.model.battery_comp_block[b] for b in self.model.battery_arrays_set]
+        bat_discharge_power = [self.get_component_data(block.battery_current_discharge_power) for block in bat_blocks]
+        bat_charge_power = [self.get_component_data(block.battery_current_charge_power) for block in bat_blocks]
+        bat_discharging_efficiency = [self.get_component_data(block.battery_discharging_efficiency) for block in bat_blocks]
+        bat_discharger_efficiency = [self.get_component_data(block.battery_discharger_efficiency) for block in bat_blocks]
+        bat_charging_efficiency = [self.get_component_data(block.battery_charging_efficiency) for block in bat_blocks]
+        bat_charger_efficiency = [self.get_component_data(block.battery_charger_efficiency) for block in bat_blocks]
+        bat_capacity = [self.get_component_data(block.battery_capacity_current_wh) for block in bat_blocks]
+        bat_SOC = [self.get_component_data(block.battery_SOC) for block in bat_blocks]
+        bat_peak_mod = [self.model.battery_peak_mod[1] for block in bat_blocks]
+        if linear:
+            bat_energy = [self.get_component_data(block.battery_energy) for block in bat_blocks]
+        
+        shortage_power = self.get_component_data(self.model.shortage_power)
+        bought_power = self.get_component_data(self.model.grid_current_bought_power)
+        sold_power = self.get_component_data(self.model.grid_current_sold_power)
+        buyprice = self.get_component_data(self.model.grid_buyprice)
+        sellprice = self.get_component_data(self.model.grid_sellprice)
+        
         #%%Objective definitions
         #economical objective       
         def econ_obj_rule(m):
             expr = 0
             
             #summation of costs through different sources
-            for b in m.pv_sources_set:
+            for b in range(len(pv_blocks)):
                 #pv
-                expr += sum(m.pv_comp_block[b].pv_cost*m.pv_comp_block[b].pv_max_power[t]\
-                            *m.pv_comp_block[b].pv_module_power[t]*m.pv_comp_block[b].pv_peak_mod[1]\
-                            for t in m.simulation_steps)   
+                pv_cost = pv_blocks[b].pv_cost
+                if linear:
+                    expr += pv_cost*pv_blocks[b].pv_reference_energy
+                else:
+                    expr += pyo.quicksum((pv_cost*pv_max_power[b][t]*pv_module_power[b][t]*pv_peak_mod[b] for t in steps), linear=False)
             #   #battery
             # for b in m.battery_comp_block:
             #     expr += sum(m.battery_comp_block[b].battery_charge_cost*m.battery_comp_block[b].battery_current_charge_power[t]\
             #                 for t in m.simulation_steps)
             #shortage
-            expr += sum(m.shortage_costs*m.shortage_power[t]\
-                        for t in m.simulation_steps)
+            expr += pyo.quicksum((m.shortage_costs*shortage_power[t] for t in steps), linear=True)
             #grid        
-            expr += sum(m.grid_buyprice[t]*m.grid_current_bought_power[t]\
-                        - m.grid_sellprice[t]*m.grid_current_sold_power[t]\
-                        for t in m.simulation_steps)
+            expr += pyo.quicksum((buyprice[t]*bought_power[t] - sellprice[t]*sold_power[t] for t in steps), linear=True)
             
             return m.econ_opt == expr  
         
@@ -529,57 +595,69 @@ class Optimization_model():
         #%%
         #%%defining Constraints
         #constraint for meeting demand at all timesteps t
+        demand = self.get_component_data(self.model.demand)
+        
+        #power of all pv arrays and battery strings: terms over the (block, time step) product as object arrays of shape (blocks, steps),
+        #summed over the blocks once, so that the constraint rule does not loop over blocks
+        if linear:
+            pv_supply = np.array(pv_max_power, dtype=object) * np.array(pv_scaled_module_power, dtype=object) * np.array(pv_charger_efficiency, dtype=object)
+        else:
+            pv_supply = np.array(pv_max_power, dtype=object) * np.array(pv_module_power, dtype=object) * np.array(pv_charger_efficiency, dtype=object)\
+                * np.array(pv_peak_mod, dtype=object)[:,None]
+        battery_supply = np.array(bat_discharge_power, dtype=object) * np.array(bat_discharging_efficiency, dtype=object) * np.array(bat_discharger_efficiency, dtype=object)\
+            - np.array(bat_charge_power, dtype=object)
+        supply = pv_supply.sum(axis=0) + battery_supply.sum(axis=0)
+        
         def meet_demand_rule(m,t):
-            expr = 0
-            
-            #summation of power from different sources
-            #pv
-            for b in m.pv_comp_block:
-                expr += m.pv_comp_block[b].pv_max_power[t]*m.pv_comp_block[b].pv_module_power[t]*m.pv_comp_block[b].pv_charger_efficiency[t]\
-                    *m.pv_comp_block[b].pv_peak_mod[1]
-            
-            #battery  
-            for b in m.battery_comp_block:
-                expr += m.battery_comp_block[b].battery_current_discharge_power[t]\
-                    *m.battery_comp_block[b].battery_discharging_efficiency[t]*m.battery_comp_block[b].battery_discharger_efficiency[t]\
-                    - m.battery_comp_block[b].battery_current_charge_power[t]
+            t -= 1
             
-            #shortage
-            expr += m.shortage_power[t]
-            
-            #grid
-            expr += m.grid_current_bought_power[t]-m.grid_current_sold_power[t]
+            #pv and battery, shortage and grid
+            expr = supply[t] + shortage_power[t] + bought_power[t] - sold_power[t]
             
-            return expr == m.demand[t]
+            return expr == demand[t]
                 
         self.model.meet_demand_constr = pyo.Constraint(self.model.simulation_steps, rule = meet_demand_rule)
         
         #%%LCOE constraints
+        #annual costs of all battery strings, allotted to the pv arrays by their share of the installed pv peak power
+        self.model.battery_annual_costs = pyo.Expression(expr = pyo.quicksum(bat_peak_mod[b]*bat_blocks[b].bat_array_kWp\
+            *(bat_blocks[b].bat_total_LCOE_factor + self.model.bms_total_LCOE_factor) for b in range(len(bat_blocks))))
+        pv_share = (np.asarray(self.pv_array_kWp, dtype=float) / np.sum(self.pv_array_kWp)).tolist()
+        
         #pv
+        m = self.model
+        pv_LCOE = [((m.pvCharger_total_LCOE_factor + block.pv_total_LCOE_factor) * block.pv_array_kWp * block.pv_peak_mod[1]\
+                    + pv_share[b]*m.battery_annual_costs) / (1 + block.pv_used_power*(m.time_step/3600)/ (m.sim_step/8760))
+                   for b, block in enumerate(pv_blocks)]
+        
+        #pv costs start at the LCOE of the initial sizes, which also sets their scale
+        if self.auto_scaling:
+            for b, block in enumerate(pv_blocks):
+                block.pv_cost.set_value(pyo.value(pv_LCOE[b]))
+        
         def pv_LCOE_rule(m, b):
-            expr = 0
-            expr =  ((m.pvCharger_total_LCOE_factor + m.pv_comp_block[b].pv_total_LCOE_factor) * m.pv_comp_block[b].pv_array_kWp\
-                *m.pv_comp_block[b].pv_peak_mod[1] + m.battery_comp_block[b].battery_peak_mod[1]*m.battery_comp_block[b].bat_array_kWp \
-                *(m.battery_comp_block[b].bat_total_LCOE_factor + m.bms_total_LCOE_factor)) \
-                /(1 + m.pv_comp_block[b].pv_used_power*(m.time_step/3600)/ (m.sim_step/8760))
-            
-            
-            return m.pv_comp_block[b].pv_cost == expr
+            return m.pv_comp_block[b].pv_cost == pv_LCOE[b-1]
         self.model.pv_LCOE_constr = pyo.Constraint(self.model.pv_sources_set, rule = pv_LCOE_rule)
         
         #%%max peak power and capacity constraints
         def max_pv_peak_rule(m,b):
+            #no constraint needed as long as pv size is fixed (first iteration)
+            if m.pv_comp_block[b].pv_peak_mod.ctype is pyo.Param:
+                return pyo.Constraint.Skip
             expr = m.pv_comp_block[b].pv_array_kWp * m.pv_comp_block[b].pv_peak_mod[1]
             return expr <= m.pv_comp_block[b].max_pv_kWp
         self.model.max_pv_kWp_constr = pyo.Constraint(self.model.pv_sources_set, rule = max_pv_peak_rule)
         
-        def max_battery_capa_rule(m,b):
-            expr = m.battery_comp_block[b].bat_array_kWp * m.battery_comp_block[b].battery_peak_mod[1]
-            return expr <= m.battery_comp_block[b].max_battery_capacity
-        self.model.max_battery_capa_constr = pyo.Constraint(self.model.battery_arrays_set, rule = max_battery_capa_rule)
+        def max_battery_capa_rule(m):
+            #no constraint needed as long as battery size is fixed (first iteration)
+            if m.battery_peak_mod.ctype is pyo.Param:
+                return pyo.Constraint.Skip
+            expr = sum(block.bat_array_kWp for block in bat_blocks) * m.battery_peak_mod[1]
+            return expr <= sum(block.max_battery_capacity for block in bat_blocks)
+        self.model.max_battery_capa_constr = pyo.Constraint(rule = max_battery_capa_rule)
         
         #%%efficiency constraints
-        if self.poly_fit_eff:
+        if poly_fit_eff:
             def pv_charger_eff_rule(m,b,t):
                 expr = sum(m.pv_comp_block[b].ch_eff_param[i]*m.pv_comp_block[b].pv_module_power[t]**(m.pv_eff_fit_deg-i) \
                             for i in m.pv_charger_eff_coeff_set)
@@ -587,7 +665,7 @@ class Optimization_model():
             self.model.pv_charger_eff_const = pyo.Constraint(self.model.pv_sources_set, self.model.simulation_steps, rule = pv_charger_eff_rule)
 
             def battery_charger_eff_rule(m,b,t):
-                expr = sum((m.battery_comp_block[b].battery_current_discharge_power[t]/(m.battery_comp_block[b].battery_peak_mod[1] \
+                expr = sum((m.battery_comp_block[b].battery_current_discharge_power[t]/(m.battery_peak_mod[1] \
                             * m.battery_comp_block[b].battery_capacity_current_wh[t]))\
                             **(m.batt_eff_fit_deg-i)* m.battery_comp_block[b].ch_eff_param[i]\
                             for i in m.battery_charger_eff_coeff_set)
@@ -595,47 +673,61 @@ class Optimization_model():
             self.model.battery_charger_eff_const = pyo.Constraint(self.model.battery_arrays_set, self.model.simulation_steps, rule = battery_charger_eff_rule)
         
             def battery_discharger_eff_rule(m,b,t):
-                power_output = (m.battery_comp_block[b].battery_current_discharge_power[t]/(m.battery_comp_block[b].battery_peak_mod[1] \
+                power_output = (m.battery_comp_block[b].battery_current_discharge_power[t]/(m.battery_peak_mod[1] \
                             * m.battery_comp_block[b].battery_capacity_current_wh[t]))
                 expr = power_output / (power_output + m.battery_comp_block[b].power_self_consumption + (power_output * m.battery_comp_block[b].voltage_loss) \
                     + (power_output**2 * m.battery_comp_block[b].resistance_loss))
                 return m.battery_comp_block[b].battery_discharger_efficiency[t]== expr
             self.model.battery_discharger_eff_const = pyo.Constraint(self.model.battery_arrays_set, self.model.simulation_steps, rule = battery_discharger_eff_rule)
 
-        if self.exact_ch_eff:
+        if exact_ch_eff:
             def battery_charging_eff_rule(m,b,t):
-                expr = m.battery_comp_block[b].charge_power_efficiency_a * (m.battery_comp_block[b].battery_current_charge_power[t]/(m.battery_comp_block[b].battery_peak_mod[1] \
-                           * m.battery_comp_block[b].battery_capacity_current_wh[t]))\
-                    + m.battery_comp_block[b].charge_power_efficiency_b
-                return m.battery_comp_block[b].battery_charging_efficiency[t] == expr
+                block = bat_blocks[b-1]
+                b -= 1
+                t -= 1
+                expr = block.charge_power_efficiency_a * (bat_charge_power[b][t]/(bat_peak_mod[b] * bat_capacity[b][t]))\
+                    + block.charge_power_efficiency_b
+                return bat_charging_efficiency[b][t] == expr
             self.model.battery_charging_eff_const = pyo.Constraint(self.model.battery_arrays_set, self.model.simulation_steps, rule = battery_charging_eff_rule)
 
             def battery_discharging_eff_rule(m,b,t):
-                expr = m.battery_comp_block[b].discharge_power_efficiency_a*(m.battery_comp_block[b].battery_current_discharge_power[t]/(m.battery_comp_block[b].battery_peak_mod[1] \
-                    * m.battery_comp_block[b].battery_capacity_current_wh[t]))\
-                    + m.battery_comp_block[b].discharge_power_efficiency_b
+                block = bat_blocks[b-1]
+                b -= 1
+                t -= 1
+                expr = block.discharge_power_efficiency_a*(bat_discharge_power[b][t]/(bat_peak_mod[b] * bat_capacity[b][t]))\
+                    + block.discharge_power_efficiency_b
 
-                return m.battery_comp_block[b].battery_discharging_efficiency[t] == expr
+                return bat_discharging_efficiency[b][t] == expr
             self.model.battery_discharging_eff_const = pyo.Constraint(self.model.battery_arrays_set, self.model.simulation_steps, rule = battery_discharging_eff_rule)
 
         #%%Constraint for battery state of charge
+        if linear:
+            #LP solvers scale the model internally
+            self.init_linear_constraints(pv_scaled_module_power, pv_peak_mod, bat_blocks, bat_energy, bat_charge_power, bat_discharge_power,
+                                         bat_charging_efficiency, bat_charger_efficiency, bat_capacity, bat_peak_mod)
+            self.construction_time = time.perf_counter() - construction_start
+            return
+        
         def SOC_rule (m,b,t):
             expr = 0
+            block = bat_blocks[b-1]
+            b -= 1
+            #list position of time step t (time step t-1 is at position t-2)
+            i = t - 1
             if t == 1:
-                expr = m.battery_comp_block[b].SOC_start
+                expr = block.SOC_start
             elif t > 1 :
                 #negative battery current flow as flow into battery when battery current flo is negative
-                batt_total_capa = m.battery_comp_block[b].battery_peak_mod[1] * m.battery_comp_block[b].battery_capacity_current_wh[t-1]
-                expr = m.battery_comp_block[b].battery_SOC[t-1]\
-                    + (m.battery_comp_block[b].battery_current_charge_power[t-1]\
-                    *m.battery_comp_block[b].battery_charging_efficiency[t-1]*m.battery_comp_block[b].battery_charger_efficiency[t-1]\
-                    - m.battery_comp_block[b].battery_current_discharge_power[t-1])\
+                batt_total_capa = bat_peak_mod[b] * bat_capacity[b][i-1]
+                expr = bat_SOC[b][i-1]\
+                    + (bat_charge_power[b][i-1]*bat_charging_efficiency[b][i-1]*bat_charger_efficiency[b][i-1]\
+                    - bat_discharge_power[b][i-1])\
                     /batt_total_capa\
-                    - m.battery_comp_block[b].battery_self_discharge
+                    - block.battery_self_discharge
             else:
                 print ("SOC_Rule: t not in right bounds")
             
-            return m.battery_comp_block[b].battery_SOC[t] == expr
+            return bat_SOC[b][i] == expr
         
         self.model.SOC_constr = pyo.Constraint(self.model.battery_arrays_set, self.model.simulation_steps, rule = SOC_rule)
         
@@ -643,12 +735,508 @@ class Optimization_model():
         def last_discharge_rule(m, b):
             expr = 0
             expr += (m.battery_comp_block[b].battery_SOC[self.simulation_steps] - self.SOC_min)*m.battery_comp_block[b].battery_capacity_current_wh[self.simulation_steps]\
-                *m.battery_comp_block[b].battery_peak_mod[1]
+                *m.battery_peak_mod[1]
             return m.battery_comp_block[b].battery_current_discharge_power[self.simulation_steps] <= expr
         self.model.last_discharge_constr = pyo.Constraint(self.model.battery_arrays_set, rule = last_discharge_rule)
         
+        #%%scaling factors of variables and constraints
+        if self.auto_scaling:
+            scaling_start = time.perf_counter()
+            self.set_scaling_factors()
+            self.scaling_time = time.perf_counter() - scaling_start
+        
+        self.construction_time = time.perf_counter() - construction_start
+        
+    
+    def get_order_of_magnitude(self):
+        '''
+        Method to derive the model scale of powers and prices from the magnitude of the demand and pv power data
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        order_of_magnitude : float. Power of ten of the peak power [W], so that scaled powers are of order 1 to 10
+        '''
+        peak_power = np.max(np.abs(self.demand[:self.simulation_steps]))
+        for i in range(len(self.sim.pv)):
+            peak_power = max(peak_power, np.max(np.abs(self.sim.pv_power[i][:self.simulation_steps])))
+        
+        if not peak_power > 0:
+            return self.sim.order_of_magnitude
+        
+        return float(10**np.floor(np.log10(peak_power)))
+    
+    
+    def get_scaling_factor(self, magnitude):
+        '''
+        Method to get the scaling factors of magnitudes as powers of ten within scaling_factor_limits
+        
+        Parameters
+        ----------
+        magnitude : float or array of floats. Typical absolute value of a variable or the largest gradient of a constraint
+        
+        Returns
+        -------
+        scaling_factor : float or array of floats. Scaling factor, with which the magnitude becomes of order 1 (1 for zero magnitudes)
+        '''
+        magnitude = np.asarray(magnitude, dtype=float)
+        valid = (magnitude > 0) & np.isfinite(magnitude)
+        scaling_factor = np.ones(magnitude.shape)
+        scaling_factor[valid] = np.float_power(10., -np.round(np.log10(magnitude[valid])))
+        scaling_factor = np.clip(scaling_factor, self.scaling_factor_limits[0], self.scaling_factor_limits[1])
+        
+        return float(scaling_factor) if scaling_factor.ndim == 0 else scaling_factor
+    
+    
+    def set_scaling_factors(self):
+        '''
+        Method to derive scaling factors of variables, constraints and objective and pass them to the solver as scaling_factor suffix.
+        Variables are scaled with the magnitude of their initial values per component, constraints with the largest
+        gradient of the variable scaled Jacobian row at the initial point. Jacobian statistics before and after scaling are kept in scaling_report
+        
+        Parameters
+        ----------
+        None
+        '''
+        m = self.model
+        m.scaling_factor = pyo.Suffix(direction=pyo.Suffix.EXPORT)
+        
+        #objective variable starts at the costs of the initial point (econ_opt - costs == 0), which also sets its scale
+        m.econ_opt.set_value(pyo.value(m.econ_opt) - pyo.value(m.econ_obj_constr.body))
+        
+        #variables: one factor per (indexed) variable
+        var_factors = dict()
+        for var in m.component_objects(pyo.Var, active=True, descend_into=True):
+            values = [abs(var_data.value) for var_data in var.values() if var_data.value is not None]
+            #variables without nonzero initial values keep the model scale of order_of_magnitude
+            scaling_factor = self.get_scaling_factor(max(values) if values else 1)
+            m.scaling_factor.set_value(var, scaling_factor, expand=True)
+            for var_data in var.values():
+                var_factors[id(var_data)] = scaling_factor
+        
+        #Jacobian entries at the initial point with their row, derivatives with respect to parameters are skipped
+        constraints = list(m.component_data_objects(pyo.Constraint, active=True, descend_into=True))
+        rows = list()
+        entries = list()
+        var_scaled_entries = list()
+        for row, constr in enumerate(constraints):
+            for var, value in differentiate(constr.body, mode=differentiate.Modes.reverse_numeric).items():
+                var_factor = var_factors.get(id(var))
+                if var_factor is not None:
+                    rows.append(row)
+                    entries.append(abs(value))
+                    var_scaled_entries.append(abs(value) / var_factor)
+        rows = np.array(rows, dtype=int)
+        entries = np.array(entries)
+        var_scaled_entries = np.array(var_scaled_entries)
+        
+        #constraints: largest absolute gradient of row with respect to the scaled variables
+        row_max = np.zeros(len(constraints))
+        np.maximum.at(row_max, rows, var_scaled_entries)
+        constr_factors = self.get_scaling_factor(row_max)
+        for constr, scaling_factor in zip(constraints, constr_factors.tolist()):
+            m.scaling_factor[constr] = scaling_factor
+        
+        #objective: scale of objective variable
+        m.scaling_factor[m.econ_obj] = var_factors[id(m.econ_opt)]
+        
+        self.scaling_report = {'before': self.get_jacobian_statistics(entries, rows, len(constraints)),
+                               'after': self.get_jacobian_statistics(var_scaled_entries * constr_factors[rows], rows, len(constraints))}
+    
+    
+    @staticmethod
+    def get_jacobian_statistics(entries, rows, num_rows, max_gradient = 100):
+        '''
+        Method to get statistics of the absolute constraint Jacobian entries at the initial point
+        
+        Parameters
+        ----------
+        entries : array of floats. Absolute Jacobian entries
+        rows : array of ints. Constraint (row) index of each entry
+        num_rows : int. Number of constraints
+        max_gradient : float. Gradient above which Ipopt scales down a row (nlp_scaling_max_gradient)
+        
+        Returns
+        -------
+        statistics : dict. Number of nonzero entries, minimal and maximal entry, their ratio and number of rows with a gradient above max_gradient
+        '''
+        row_max = np.zeros(num_rows)
+        np.maximum.at(row_max, rows, entries)
+        entries = entries[entries > 0]
+        if len(entries) == 0:
+            return {'entries': 0, 'min': None, 'max': None, 'ratio': None, 'rows_above_max_gradient': 0}
+        
+        return {'entries': len(entries),
+                'min': float(np.min(entries)),
+                'max': float(np.max(entries)),
+                'ratio': float(np.max(entries) / np.min(entries)),
+                'rows_above_max_gradient': int(np.sum(row_max > max_gradient))}
+    
+    
+    def print_scaling_report(self):
+        '''
+        Method to print the Jacobian statistics before and after automatic scaling
+        
+        Parameters
+        ----------
+        None
+        '''
+        if self.scaling_report is None:
+            print('no scaling report available, automatic scaling disabled')
+            return
+        
+        print('-------Jacobian scaling-------')
+        for state in ['before', 'after']:
+            statistics = self.scaling_report[state]
+            if statistics['entries'] == 0:
+                print(state, 'scaling: no nonzero entries')
+                continue
+            print(state.ljust(6), 'scaling: entries', statistics['entries'], 'min', '%.2e' % statistics['min'], 'max', '%.2e' % statistics['max'],
+                  'ratio', '%.2e' % statistics['ratio'], 'rows above max gradient', statistics['rows_above_max_gradient'])
+        
+    
+    def init_linear_constraints(self, pv_scaled_module_power, pv_peak_mod, bat_blocks, bat_energy, bat_charge_power, bat_discharge_power,
+                                bat_charging_efficiency, bat_charger_efficiency, bat_capacity, bat_peak_mod):
+        '''
+        Method to declare the pv and battery constraints of the linear model. 
+        The state of charge balance is multiplied with the battery capacity, so that it is linear in the stored energy and the size modifier
+        
+        Parameters
+        ----------
+        pv_scaled_module_power : list. Var data of scaled used pv power share per pv array in time step order
+        pv_peak_mod : list. pv size modifier per pv array
+        bat_blocks : list. Battery blocks of model
+        bat_energy : list. Var data of stored battery energy per battery in time step order
+        bat_charge_power, bat_discharge_power : list. Var data of battery charge and discharge power per battery in time step order
+        bat_charging_efficiency, bat_charger_efficiency : list. Efficiencies of last simulation pass per battery in time step order
+        bat_capacity : list. Current battery capacity per battery in time step order
+        bat_peak_mod : list. Battery size modifier per battery
+        '''
+        #%%pv: used power share can not exceed the installed peak power
+        def pv_scaled_power_rule(m,b,t):
+            return pv_scaled_module_power[b-1][t-1] <= pv_peak_mod[b-1]
+        self.model.pv_scaled_power_constr = pyo.Constraint(self.model.pv_sources_set, self.model.simulation_steps, rule = pv_scaled_power_rule)
+        
+        #%%battery: stored energy within state of charge limits of the installed capacity
+        def battery_energy_min_rule(m,b,t):
+            return bat_energy[b-1][t-1] >= bat_blocks[b-1].SOC_min * bat_peak_mod[b-1] * bat_capacity[b-1][t-1]
+        self.model.battery_energy_min_constr = pyo.Constraint(self.model.battery_arrays_set, self.model.simulation_steps, rule = battery_energy_min_rule)
+        
+        def battery_energy_max_rule(m,b,t):
+            return bat_energy[b-1][t-1] <= bat_blocks[b-1].SOC_max * bat_peak_mod[b-1] * bat_capacity[b-1][t-1]
+        self.model.battery_energy_max_constr = pyo.Constraint(self.model.battery_arrays_set, self.model.simulation_steps, rule = battery_energy_max_rule)
+        
+        #state of charge balance of SOC_rule multiplied with battery_peak_mod * battery_capacity_current_wh[t-1]
+        def linear_SOC_rule(m,b,t):
+            block = bat_blocks[b-1]
+            b -= 1
+            i = t - 1
+            if t == 1:
+                return bat_energy[b][i] == block.SOC_start * bat_peak_mod[b] * bat_capacity[b][i]
+            
+            expr = bat_energy[b][i-1]\
+                + bat_charge_power[b][i-1]*bat_charging_efficiency[b][i-1]*bat_charger_efficiency[b][i-1]\
+                - bat_discharge_power[b][i-1]\
+                - block.battery_self_discharge * bat_peak_mod[b] * bat_capacity[b][i-1]
+            return bat_energy[b][i] * bat_capacity[b][i-1] / bat_capacity[b][i] == expr
+        self.model.SOC_constr = pyo.Constraint(self.model.battery_arrays_set, self.model.simulation_steps, rule = linear_SOC_rule)
+        
+        #Constraint for maximal discharge power at last time step
+        def last_discharge_rule(m, b):
+            b -= 1
+            return bat_discharge_power[b][-1] <= bat_energy[b][-1] - self.SOC_min * bat_capacity[b][-1] * bat_peak_mod[b]
+        self.model.last_discharge_constr = pyo.Constraint(self.model.battery_arrays_set, rule = last_discharge_rule)
+    
+    
+    def set_linear_values(self):
+        '''
+        Method to set the used pv power share and the battery state of charge of a solved linear model from its scaled variables,
+        so that results are extracted the same way as for the NLP
+        
+        Parameters
+        ----------
+        None
+        '''
+        for block in self.model.pv_comp_block.values():
+            pv_peak_mod = pyo.value(block.pv_peak_mod[1])
+            pv_module_power = np.clip(self.get_values(block.pv_scaled_module_power) / pv_peak_mod, 0, 1)
+            block.pv_module_power.set_values(dict(zip(self.model.simulation_steps, pv_module_power.tolist())))
+        
+        for block in self.model.battery_comp_block.values():
+            battery_capacity = pyo.value(self.model.battery_peak_mod[1]) * self.get_values(block.battery_capacity_current_wh)
+            battery_SOC = np.clip(self.get_values(block.battery_energy) / battery_capacity, self.SOC_min, self.SOC_max)
+            block.battery_SOC.set_values(dict(zip(self.model.simulation_steps, battery_SOC.tolist())))
+    
+    
+    def solve_model(self):
+        '''
+        Method to solve the model with Ipopt or, for the linear model, with the first available LP solver of solver_backend.
+        Model size, timings and solver results of the solve are appended to solver_stats.
+        With solver_cache, the solution of a cached solve of identical model data and options is set instead
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        solved : boolean. True if an optimal solution was found
+        '''
+        record = self.get_model_size()
+        record.update({'sample': self.sample,
+                       'iteration': self.iteration,
+                       'formulation': 'LP' if self.linear_model else 'NLP',
+                       'auto_scaling': self.auto_scaling and not self.linear_model,
+                       'exact_ch_eff': self.exact_ch_eff and not self.linear_model,
+                       'construction_time': self.construction_time,
+                       'scaling_time': self.scaling_time})
+        
+        #set the solution of a solve of identical model data and options, or a near solution as start point
+        if self.solver_cache is not None:
+            lookup_start = time.perf_counter()
+            with profile_phase(self.profiler, 'solver cache'):
+                cached = self.solver_cache.load(self)
+                if cached is None and self.solver_cache.warm_start:
+                    record['cache'] = 'warm start' if self.solver_cache.set_warm_start(self) else 'miss'
+                else:
+                    record['cache'] = 'miss' if cached is None else 'hit'
+            if cached is not None:
+                record.update(cached)
+                record['solve_time'] = time.perf_counter() - lookup_start
+                self.add_solver_record(record)
+                return True
+        
+        #solver output is written to a temporary log file and the timing report of Pyomo is captured to be recorded
+        #(not supported by the persistent appsi interfaces)
+        log_file, log_path = tempfile.mkstemp(suffix='.log')
+        os.close(log_file)
+        timing_report = io.StringIO()
+        #use the scaling_factor suffix of automatic scaling, otherwise scale by Ipopt's gradient based method
+        nlp_scaling_method = 'user-scaling' if self.auto_scaling else 'gradient-based'
+        results = None
+        solve_start = time.perf_counter()
+        with profile_phase(self.profiler, 'solve'):
+            try:
+                with redirect_stdout(timing_report):
+                    results = self.solver_backend.solve(self.model, self.linear_model, nlp_scaling_method,
+                                                        {'report_timing': True, 'logfile': log_path})
+            except (ValueError, RuntimeError) as error:
+                print('--------------------------------------------------------------------------------------------')
+                print('Error solving optimization model:', error)
+                print('--------------------------------------------------------------------------------------------')
+                record['error'] = str(error)
+            except ApplicationError as error:
+                print('Error solving optimization model:', error)
+                record['error'] = str(error)
+        record['solve_time'] = time.perf_counter() - solve_start
+        
+        record.update(self.read_timing_report(timing_report.getvalue()))
+        record.update(self.read_solver_log(log_path))
+        os.remove(log_path)
+        #solver, warm start and, for solvers without log file, iterations of the solver backend
+        record.update(self.solver_backend.solve_info)
+        if self.linear_model and record['solver'] is None:
+            print('No LP solver of', self.solver_backend.lp_solvers, 'available to solve linear model')
+            record['error'] = 'no LP solver available'
+        
+        solved = False
+        if results is not None:
+            record['termination_condition'] = str(results.solver.termination_condition)
+            record['solver_status'] = str(results.solver.status)
+            solved = pyo.check_optimal_termination(results)
+            if self.linear_model:
+                self.set_linear_values()
+            if record['infeasibility'] is None and self.check_infeasibility:
+                record['infeasibility'] = self.get_max_infeasibility()
+            record['objective'] = pyo.value(self.model.econ_obj, exception=False)
+        if solved and self.solver_cache is not None:
+            self.solver_cache.save(self, record)
+        
+        self.add_solver_record(record)
+        
+        return solved
+    
+    
+    def get_model_size(self):
+        '''
+        Method to get the number of variables and constraints of the model without traversing the constraint expressions.
+        The constraint Jacobian nonzeros are read from the solver log after the solve (Ipopt)
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        model_size : dict. Number of variables, constraints and nonzeros (None until read from the solver log)
+        '''
+        return {'variables': self.model.nvariables(), 'constraints': self.model.nconstraints(), 'nonzeros': None}
+    
+    
+    @staticmethod
+    def read_timing_report(timing_report):
+        '''
+        Method to read the problem (NL) file write, solver and result load (postsolve) times from the timing report of a Pyomo solve
+        
+        Parameters
+        ----------
+        timing_report : string. Captured output of solve with report_timing
+        
+        Returns
+        -------
+        timings : dict. Write, solver and load time [s], None if not reported
+        '''
+        timings = dict()
+        for key, phase in [('write_time', 'to write file'), ('solver_time', 'for solver'), ('load_time', 'for postsolve')]:
+            match = re.search(r'([\d.]+) seconds required ' + phase + r'\b', timing_report)
+            timings[key] = float(match.group(1)) if match else None
+        
+        return timings
+    
+    
+    @staticmethod
+    def read_solver_log(log_path):
+        '''
+        Method to read iteration count, final (unscaled) constraint violation and solver time from an Ipopt log file
+        
+        Parameters
+        ----------
+        log_path : string. Path of solver log file
+        
+        Returns
+        -------
+        solver_log : dict. Iterations, constraint Jacobian nonzeros, infeasibility and Ipopt time [s], None if not found in log
+        '''
+        solver_log = {'iterations': None, 'nonzeros': None, 'infeasibility': None, 'ipopt_time': None}
+        if not os.path.exists(log_path):
+            return solver_log
+        with open(log_path) as log_file:
+            log = log_file.read()
+        
+        match = re.search(r'Number of Iterations\.*:\s*(\d+)', log)
+        if match:
+            solver_log['iterations'] = int(match.group(1))
+        nonzeros = re.findall(r'Number of nonzeros in (?:equality|inequality) constraint Jacobian\.*:\s*(\d+)', log)
+        if nonzeros:
+            solver_log['nonzeros'] = sum(int(value) for value in nonzeros)
+        match = re.search(r'Constraint violation\.*:\s*(\S+)\s+(\S+)', log)
+        if match:
+            solver_log['infeasibility'] = float(match.group(2))
+        match = re.search(r'Total seconds in IPOPT\s*=\s*([\d.]+)', log)
+        if match:
+            solver_log['ipopt_time'] = float(match.group(1))
+        else:
+            #Ipopt versions before 3.14 report CPU times only
+            times = re.findall(r'Total CPU secs in (?:IPOPT \(w/o function evaluations\)|NLP function evaluations)\s*=\s*([\d.]+)', log)
+            if times:
+                solver_log['ipopt_time'] = sum(float(value) for value in times)
+        
+        return solver_log
+    
+    
+    def get_max_infeasibility(self):
+        '''
+        Method to get the largest absolute constraint violation of the current variable values
+        
+        Parameters
+        ----------
+        None
         
-      
+        Returns
+        -------
+        infeasibility : float. Largest violation of a constraint bound
+        '''
+        infeasibility = 0.
+        for constr in self.model.component_data_objects(pyo.Constraint, active=True, descend_into=True):
+            body = pyo.value(constr.body, exception=False)
+            if body is None:
+                continue
+            if constr.has_lb():
+                infeasibility = max(infeasibility, pyo.value(constr.lower) - body)
+            if constr.has_ub():
+                infeasibility = max(infeasibility, body - pyo.value(constr.upper))
+        
+        return infeasibility
+    
+    
+    def add_solver_record(self, record):
+        '''
+        Method to append a solve record to solver_stats, entries not set are None
+        
+        Parameters
+        ----------
+        record : dict. Model size, timings and solver results of one solve
+        '''
+        columns = ['sample', 'iteration', 'block', 'formulation', 'auto_scaling', 'exact_ch_eff', 'solver', 'linear_solver',
+                   'warm_start', 'cache', 'variables', 'constraints', 'nonzeros', 'construction_time', 'scaling_time', 'write_time', 'solver_time',
+                   'load_time', 'solve_time', 'ipopt_time', 'iterations', 'termination_condition', 'solver_status',
+                   'infeasibility', 'objective', 'error']
+        self.solver_stats.append({column: record.get(column) for column in columns})
+    
+    
+    def get_solver_stats(self):
+        '''
+        Method to get the solve records of all outer iterations and sensitivity samples as table
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        solver_stats : DataFrame. One row per solve with model size, construction, write and solver times [s], 
+            iteration count, termination condition, final infeasibility and objective
+        '''
+        return pd.DataFrame(self.solver_stats)
+    
+    
+    def compare_formulations(self):
+        '''
+        Method to solve the NLP and the linear model on the same model data and report the objective difference.
+        The model of the selected formulation is rebuilt afterwards (unsolved)
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        comparison : dict. Objective and solve time [s] per formulation, absolute and relative objective difference
+        '''
+        linear_model = self.linear_model
+        comparison = dict()
+        
+        for formulation, linear in [('NLP', False), ('LP', True)]:
+            self.linear_model = linear
+            start = datetime.now()
+            self.init_model()
+            solved = self.solve_model()
+            comparison[formulation] = {'objective': pyo.value(self.model.econ_obj) if solved else None,
+                                       'time': (datetime.now() - start).total_seconds(),
+                                       'variables': self.model.nvariables(),
+                                       'constraints': self.model.nconstraints()}
+        
+        self.linear_model = linear_model
+        self.init_model()
+        
+        print('-------Formulation comparison-------')
+        for formulation in ['NLP', 'LP']:
+            print(formulation, 'objective:', comparison[formulation]['objective'], 'time [s]:', round(comparison[formulation]['time'],3))
+        if comparison['NLP']['objective'] is not None and comparison['LP']['objective'] is not None:
+            comparison['difference'] = comparison['LP']['objective'] - comparison['NLP']['objective']
+            comparison['relative_difference'] = comparison['difference'] / abs(comparison['NLP']['objective']) if comparison['NLP']['objective'] else None
+            print('objective difference (LP - NLP):', round(comparison['difference'],4))
+        else:
+            print('objective difference not available, formulation not solved')
+        
+        self.formulation_comparison = comparison
+        
+        return comparison
+    
+    
     def optimize_model(self):
         '''
         Central callable model optimization method which starts the model optimization
@@ -681,16 +1269,25 @@ class Optimization_model():
         #     self.opt = pyo.SolverFactory('couenne')
         # results = self.opt.solve(self.model, tee = True)  
         
-         # solve with non-linear solver ipopt 
-        opt = pyo.SolverFactory('ipopt',solver_io='python')
-        opt.options['max_iter']= 100 #number of iterations you wish
-        opt.options['linear_solver'] = self.solver_type
-        try:
-            results = opt.solve(self.model, tee=False)   #set tee to True if solver output needs to be printed
-        except (ValueError) as error:
-            print('--------------------------------------------------------------------------------------------')
-            print('Error solving optimization model: Cannot load a SolverResults object with bad status: error')
-            print('--------------------------------------------------------------------------------------------')
+        #solve blocks of time steps in parallel, which sets the results as well
+        #if the decomposition is aborted, the model of the whole horizon is built and solved instead
+        if self.decomposition is not None:
+            if self.decomposition.optimize(self):
+                return
+            print('Decomposition failed, solving the model of the whole horizon')
+            decomposition = self.decomposition
+            self.decomposition = None
+            self.init_model()
+            self.decomposition = decomposition
+        
+        if self.auto_scaling and not self.linear_model:
+            self.print_scaling_report()
+        
+        #solve with ipopt (NLP) or an LP solver (linear model)
+        self.solve_model()
+        record = self.solver_stats[-1]
+        print('Solver:', record['solver'], 'termination:', record['termination_condition'], 'iterations:', record['iterations'],
+              'solve time [s]:', round(record['solve_time'],3), 'infeasibility:', record['infeasibility'])
         
         # self.model.pprint()        #Enable to print a detailed description of the formulated model
         
@@ -703,18 +1300,18 @@ class Optimization_model():
         #get total costs
         self.total_costs_new = pyo.value(self.model.econ_obj)
                 
-        b=1
+        #LCOE of all pv arrays and battery strings
         print('-------Economical data-------')
-        print('pvLCOE:',round(pyo.value(self.model.pv_comp_block[b].pv_cost)*1000/self.sim.order_of_magnitude,4))
-        print('battery LCOE', round(pyo.value(self.model.battery_comp_block[b].battery_charge_cost)*1000/self.sim.order_of_magnitude,4))
-        print('buy cost:', pyo.value(self.model.grid_buyprice[1])*1000/self.sim.order_of_magnitude)
-        print('shortage LCOE:',round(pyo.value(self.model.shortage_costs)*1000/self.sim.order_of_magnitude,4))
+        print('pvLCOE:', [round(pyo.value(block.pv_cost)*1000/self.order_of_magnitude,4) for block in self.model.pv_comp_block.values()])
+        print('battery LCOE', [round(pyo.value(block.battery_charge_cost)*1000/self.order_of_magnitude,4) for block in self.model.battery_comp_block.values()])
+        print('buy cost:', pyo.value(self.model.grid_buyprice[1])*1000/self.order_of_magnitude)
+        print('shortage LCOE:',round(pyo.value(self.model.shortage_costs)*1000/self.order_of_magnitude,4))
         print('total costs:',round(self.total_costs_new,4)) 
 
         self.pv_peak_mod_list = list()
         for i in range(len(self.sim.pv)):
             self.pv_peak_mod_list.append(pyo.value(self.model.pv_comp_block[i+1].pv_peak_mod[1]))
-        self.batt_peak_mod = pyo.value(self.model.battery_comp_block[b].battery_peak_mod[1]) 
+        self.batt_peak_mod = self.get_battery_peak_mod()
         print('-------Size modifiers-------')
         print('pv_peak_mod:', self.pv_peak_mod_list)
         print('battery_peak_mod:',round(self.batt_peak_mod,2))
@@ -727,7 +1324,8 @@ class Optimization_model():
             for j in range(len(self.pv_max_possible_power[i])):
                 self.pv_max_possible_power[i][j]*mult_workaround
         
-        self.get_opt_values()
+        with profile_phase(self.profiler, 'get_opt_values'):
+            self.get_opt_values()
         
         #check whether energy generation is 
         energy_creation = 0
@@ -737,9 +1335,10 @@ class Optimization_model():
                 energy_creation += pyo.value(self.model.pv_comp_block[j].pv_max_power[t]*self.model.pv_comp_block[j].pv_module_power[t]*self.model.pv_comp_block[j].pv_charger_efficiency[t]\
                                              *self.model.pv_comp_block[j].pv_peak_mod[1])
             
-            energy_creation += pyo.value(self.model.battery_comp_block[b].battery_current_discharge_power[t]*self.model.battery_comp_block[b].battery_discharging_efficiency[t] *self.model.battery_comp_block[b].battery_discharger_efficiency[t]\
-                -self.model.battery_comp_block[b].battery_current_charge_power[t]\
-                +self.model.grid_current_bought_power[t]- self.model.grid_current_sold_power[t]\
+            for bat_block in self.model.battery_comp_block.values():
+                energy_creation += pyo.value(bat_block.battery_current_discharge_power[t]*bat_block.battery_discharging_efficiency[t] *bat_block.battery_discharger_efficiency[t]\
+                    -bat_block.battery_current_charge_power[t])
+            energy_creation += pyo.value(self.model.grid_current_bought_power[t]- self.model.grid_current_sold_power[t]\
                 -self.model.demand[t])    
                 
         if energy_creation >= (0.001*(sum(pyo.value(self.model.demand[t]) for t in self.model.simulation_steps))):
@@ -754,66 +1353,159 @@ class Optimization_model():
         ----------
         None        
         '''
-        b = 1
+        m = self.model
+        bat_blocks = list(m.battery_comp_block.values())
         #get LCOEs
         self.pv_LCOE = list()
         self.LCOE_pv_old = list()
         
         for i in range(len(self.sim.pv)):
-            self.pv_LCOE.append(round(pyo.value(self.model.pv_comp_block[b].pv_cost)*1000 /self.sim.order_of_magnitude,4))
-            self.LCOE_pv_old.append(round(pyo.value(self.model.pv_comp_block[b].pv_cost)*1000 /self.sim.order_of_magnitude,4))
-        self.bat_LCOE = round(pyo.value(self.model.battery_comp_block[b].battery_charge_cost)*1000/self.sim.order_of_magnitude,4)
-        #get power flows
-        self.battery_state_of_charge = list()
-        self.battery_flow = list()
-        self.battery_charge_list = list()
-        self.battery_discharge_list = list()
-        self.pv_flow = list()
-        for i in range(len(self.sim.pv)):
-            self.pv_flow.append([])
-        self.pv_power_unused = list()
-        self.power_junct_flow =list()
-        self.bought_power_list = list()
-        self.sold_power_list = list()
-        self.power_shortage_list = list()
+            self.pv_LCOE.append(round(pyo.value(self.model.pv_comp_block[i+1].pv_cost)*1000 /self.order_of_magnitude,4))
+            self.LCOE_pv_old.append(round(pyo.value(self.model.pv_comp_block[i+1].pv_cost)*1000 /self.order_of_magnitude,4))
+        self.bat_LCOE = round(np.mean([pyo.value(block.battery_charge_cost) for block in bat_blocks])*1000/self.order_of_magnitude,4)
+        #get power flows: values of indexed components are extracted in bulk in time step order
+        pv_peak_mod = np.array([pyo.value(m.pv_comp_block[i+1].pv_peak_mod[1]) for i in range(len(self.sim.pv))])
+        pv_max_power = np.array([self.get_values(m.pv_comp_block[i+1].pv_max_power) for i in range(len(self.sim.pv))])
+        pv_module_power = np.array([self.get_values(m.pv_comp_block[i+1].pv_module_power) for i in range(len(self.sim.pv))])
+        pv_charger_efficiency = np.array([self.get_values(m.pv_comp_block[i+1].pv_charger_efficiency) for i in range(len(self.sim.pv))])
+        
+        #battery: arrays with shape (number of battery strings, simulation steps)
+        battery_capacity = np.array([self.get_values(block.battery_capacity_current_wh) for block in bat_blocks]) * pyo.value(m.battery_peak_mod[1])
+        battery_SOC = np.array([self.get_values(block.battery_SOC) for block in bat_blocks])
+        battery_charge_power = np.array([self.get_values(block.battery_current_charge_power) for block in bat_blocks])
+        battery_discharge_power = np.array([self.get_values(block.battery_current_discharge_power) for block in bat_blocks])
+        battery_discharger_efficiency = np.array([self.get_values(block.battery_discharger_efficiency) for block in bat_blocks])
+        battery_discharging_efficiency = np.array([self.get_values(block.battery_discharging_efficiency) for block in bat_blocks])
+        
+        bought_power = self.get_values(m.grid_current_bought_power)
+        sold_power = self.get_values(m.grid_current_sold_power)
+        demand = self.get_values(m.demand)
+        
+        #pv: arrays with shape (number of pv arrays, simulation steps)
+        self.pv_flow = pv_peak_mod[:,None] * pv_max_power * pv_module_power * self.order_of_magnitude
+        
+        #unused pv power
+        self.pv_power_unused = np.sum(pv_peak_mod[:,None] * pv_max_power * (1 - pv_module_power), axis=0) * self.order_of_magnitude
+        
+        #battery: sum of the strings, state of charge weighted with the string capacities
+        self.battery_state_of_charge = np.sum(battery_SOC * battery_capacity, axis=0) / np.sum(battery_capacity, axis=0)
+        self.battery_flow = np.sum(battery_charge_power - battery_discharge_power * battery_discharger_efficiency * battery_discharging_efficiency, axis=0)\
+                             * self.order_of_magnitude
+        self.battery_charge_list = np.sum(battery_charge_power, axis=0) * self.order_of_magnitude
+        self.battery_discharge_list = np.sum(battery_discharge_power, axis=0) * self.order_of_magnitude
+        
+        #power junction
+        self.power_junct_flow = (np.sum(pv_max_power * pv_module_power * pv_charger_efficiency, axis=0) \
+                                 + bought_power - sold_power - demand) * self.order_of_magnitude
+        
+        #bought and sold amounts
+        self.bought_power_list = bought_power * self.order_of_magnitude
+        self.sold_power_list = sold_power * self.order_of_magnitude
+        
+        #power shortage
+        self.power_shortage_list = self.get_values(m.shortage_power) * self.order_of_magnitude
+        
+        #used share of pv power to initialize next iteration
+        self.pv_module_power = pv_module_power
+    
+    
+    def get_battery_peak_mod(self):
+        '''
+        Method to get the size modifier of the simulated battery
         
-        for t in self.model.simulation_steps:
-            #pv
-            for i in range(len(self.sim.pv)):
-                peak_mod_workaround = [pyo.value(self.model.pv_comp_block[i+1].pv_peak_mod[1])]
-                expr=peak_mod_workaround[0]*pyo.value(self.model.pv_comp_block[i+1].pv_max_power[t]*self.model.pv_comp_block[i+1].pv_module_power[t])*self.sim.order_of_magnitude
-                self.pv_flow[i].append(expr)
-                
-            #unused pv power    
-            expr = sum(pyo.value((self.model.pv_comp_block[j+1].pv_peak_mod[1]*self.model.pv_comp_block[j+1].pv_max_power[t] \
-                             -self.model.pv_comp_block[j+1].pv_max_power[t]*self.model.pv_comp_block[j+1].pv_module_power[t]\
-                             *self.model.pv_comp_block[j+1].pv_peak_mod[1]))*self.sim.order_of_magnitude for j in range(len(self.sim.pv)))                    
-            self.pv_power_unused.append(expr)
-            
-            #battery
-            self.battery_state_of_charge.append(pyo.value(self.model.battery_comp_block[b].battery_SOC[t]))            
-            expr = pyo.value(self.model.battery_comp_block[b].battery_current_charge_power[t] - self.model.battery_comp_block[b].battery_current_discharge_power[t]\
-                             *self.model.battery_comp_block[b].battery_discharger_efficiency[t] *self.model.battery_comp_block[b].battery_discharging_efficiency[t])\
-                             *self.sim.order_of_magnitude
-            self.battery_flow.append(expr)            
-            self.battery_charge_list.append(pyo.value(self.model.battery_comp_block[b].battery_current_charge_power[t])*self.sim.order_of_magnitude)
-            self.battery_discharge_list.append(pyo.value(self.model.battery_comp_block[b].battery_current_discharge_power[t])*self.sim.order_of_magnitude)
-            
-            #power junction
-            expr = sum(pyo.value(self.model.pv_comp_block[j+1].pv_max_power[t]*self.model.pv_comp_block[j+1].pv_module_power[t]\
-                                 *self.model.pv_comp_block[j+1].pv_charger_efficiency[t])*self.sim.order_of_magnitude\
-                                   for j in range(len(self.sim.pv)))\
-                             + pyo.value(self.model.grid_current_bought_power[t]- self.model.grid_current_sold_power[t]\
-                             -self.model.demand[t])*self.sim.order_of_magnitude
-            self.power_junct_flow.append(expr)
-            
-            #bought and sold amounts
-            expr = pyo.value(self.model.grid_current_bought_power[t]) * self.sim.order_of_magnitude
-            self.bought_power_list.append(expr)
-            expr = pyo.value(self.model.grid_current_sold_power[t]) * self.sim.order_of_magnitude
-            self.sold_power_list.append(expr)
-            
-            #power shortage
-            expr = pyo.value(self.model.shortage_power[t]) * self.sim.order_of_magnitude
-            self.power_shortage_list.append(expr)
-            
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        batt_peak_mod : float. Size modifier shared by all battery strings
+        '''
+        return float(pyo.value(self.model.battery_peak_mod[1]))
+    
+    
+    def get_init_data(self, values, scale = 1):
+        '''
+        Method to convert a timeseries into the initialization data of a Var or Param indexed over the simulation steps
+        
+        Parameters
+        ----------
+        values : list or array of floats. Timeseries with one value per simulation step (empty if no values exist yet)
+        scale : float. Factor all values are multiplied with
+        
+        Returns
+        -------
+        init_data : dict or float. Scaled values with simulation steps as keys, 0 if no values are given
+        '''
+        if len(values) == 0:
+            return 0
+        
+        values = np.asarray(values, dtype=float)[:self.simulation_steps] * scale
+        return dict(zip(range(1, self.simulation_steps + 1), values.tolist()))
+    
+    
+    def get_component_data(self, component):
+        '''
+        Method to bind the data of a Var or Param indexed over the simulation steps once in time step order
+        
+        Parameters
+        ----------
+        component : Pyomo Var or Param indexed by model.simulation_steps
+        
+        Returns
+        -------
+        component_data : list. Var data objects of Vars or values of (immutable) Params, position t-1 holds time step t
+        '''
+        if component.ctype is pyo.Var:
+            return [component[t] for t in self.model.simulation_steps]
+        
+        values = component.extract_values()
+        return [values[t] for t in self.model.simulation_steps]
+    
+    
+    def get_values(self, component):
+        '''
+        Method to extract the values of a Var or Param indexed over the simulation steps in bulk
+        
+        Parameters
+        ----------
+        component : Pyomo Var or Param indexed by model.simulation_steps
+        
+        Returns
+        -------
+        values : array of floats. Component values in time step order
+        '''
+        values = component.extract_values()
+        return np.fromiter((values[t] for t in self.model.simulation_steps), dtype=float, count=self.simulation_steps)
+    
+    
+    def save_checkpoint(self, label):
+        '''
+        Method to save optimizer iteration data (iteration counters, costs, power flows, LCOEs and size modifiers) to checkpoint.
+        The Pyomo model itself is not saved, as it is rebuilt in every iteration by init_model()
+        
+        Parameters
+        ----------
+        label : string. Name of checkpoint
+        '''
+        self.checkpoint.save(label, Checkpoint.get_state(self))
+        
+    
+    def load_checkpoint(self, label):
+        '''
+        Method to restore optimizer iteration data from checkpoint
+        
+        Parameters
+        ----------
+        label : string. Name of checkpoint
+        
+        Returns
+        -------
+        restored : boolean. True if checkpoint was found and restored
+        '''
+        state = self.checkpoint.load(label)
+        if state is None:
+            return False
+        
+        Checkpoint.set_state(self, state)
+        return True
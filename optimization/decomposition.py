@@ -0,0 +1,601 @@
+import os
+import copy
+import time
+import pickle
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyomo.environ as pyo
+
+#optimization model data the blocks are cut from, its version and block models built by the current (worker) process
+_worker_template = None
+_worker_version = None
+_worker_blocks = dict()
+
+
+def _init_worker(template, version):
+    '''
+    Sets the optimization model data all blocks are cut from in the current (worker) process.
+    Block models of an other version of the data are dropped
+
+    Parameters
+    ----------
+    template : class. Optimization_model instance without Pyomo model (see Decomposition.get_template)
+    version : string. Hash of the pickled template
+    '''
+    global _worker_template, _worker_version
+    _worker_template = template
+    _worker_version = version
+    _worker_blocks.clear()
+
+
+def _evaluate_block(task):
+    '''
+    Task of worker processes to solve one block with fixed linking values.
+    Block models are built on first use and kept for the following master iterations and optimize calls
+    as long as the model data does not change
+
+    Parameters
+    ----------
+    task : tuple. Version and pickled template (None if not sent) of the model data, block index,
+        first and last (excluded) time step, number of blocks and linking values
+
+    Returns
+    -------
+    result : dict. Results of Decomposition.evaluate_block, or only block index and stale flag
+        if the worker has an other version of the model data and the template was not sent
+    '''
+    version, template, block, start, stop, num_blocks, values = task
+    if version != _worker_version:
+        if template is None:
+            return {'block': block, 'stale': True}
+        _init_worker(pickle.loads(template), version)
+    if block not in _worker_blocks:
+        _worker_blocks[block] = Decomposition.get_block_model(_worker_template, block, start, stop, num_blocks)
+
+    return Decomposition.evaluate_block(_worker_blocks[block], values)
+
+
+class Decomposition():
+    '''
+    Temporal decomposition of the optimization model into blocks of consecutive time steps (e.g. months),
+    which are solved in parallel worker processes and coordinated by a Benders master problem.
+
+    Methods
+    -------
+    optimize
+    get_block_ranges
+    get_template
+    get_block_model
+    evaluate_block
+    evaluate
+    solve_master
+    set_results
+    report
+    print_report
+    close
+
+    Note
+    ----
+    - the battery state of charge is the only coupling between time steps, the size modifiers (pv_peak_mod per pv array,
+      battery_peak_mod of all battery strings) couple all time steps
+    - blocks are linked by the state of charge at their boundaries (stored energy divided by the current battery capacity in the linear model)
+    - size modifiers and boundary states of charge are set by a master LP of cuts from the block objectives and the duals of the linking constraints,
+      stabilized by a box trust region around the best point found, which is halved if a master step does not improve the costs
+    - deviations from the boundary states of charge are priced with boundary_penalty times the shortage costs, so that every block
+      is feasible and a deviation always costs more than the shortage it replaces. The decomposition is only converged
+      if the gap is closed and the boundary states of charge of the best point match (no deviation)
+    - cuts are exact for the linear model (the gap is measured against the master without trust region, which bounds the costs
+      of the whole range from below), for the NLP the master only converges to a local solution
+    - the worker processes are kept across optimize calls until close. The model data is sent with the first master
+      iteration of a call, block models are only rebuilt if it changed
+    '''
+
+    #time series of Optimization_model cut into blocks
+    series_attributes = ['demand', 'buyprice', 'sellprice', 'bought_power_list', 'sold_power_list', 'power_shortage_list',
+                         'pv_charger_efficiency', 'battery_charge_list', 'battery_discharge_list', 'battery_charged_power',
+                         'battery_capacity_current_wh', 'battery_charger_efficiency', 'battery_discharger_efficiency',
+                         'battery_charging_efficiency', 'battery_discharging_efficiency']
+    #time series per pv array
+    pv_series_attributes = ['pv_max_power', 'pv_module_power']
+    #results of Optimization_model.get_opt_values joined from the blocks
+    result_attributes = ['pv_flow', 'pv_power_unused', 'battery_state_of_charge', 'battery_flow', 'battery_charge_list',
+                         'battery_discharge_list', 'power_junct_flow', 'bought_power_list', 'sold_power_list',
+                         'power_shortage_list', 'pv_module_power']
+    #factor of the shortage costs deviations from the boundary states of charge are priced with
+    boundary_penalty = 10.
+    #total deviation from the boundary states of charge below which they are matched
+    boundary_tolerance = 1e-6
+
+    def __init__(self,
+                 blocks = 'month',
+                 workers = None,
+                 max_iterations = 30,
+                 tolerance = 1e-4,
+                 trust_region = 0.5):
+        '''
+        Parameters
+        ----------
+        blocks : string or int. 'month' to split the horizon at month ends of the simulation time index or number of blocks of equal length
+        workers : int. Number of worker processes (number of cpu cores if None, blocks are solved in the main process if 1)
+        max_iterations : int. Maximal number of master iterations
+        tolerance : float. Relative gap between best costs and master lower bound below which the decomposition is converged
+        trust_region : float. Initial half width of the box around the best point as share of the range of each linking value
+        '''
+        self.blocks = blocks
+        self.workers = workers
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        self.trust_region = trust_region
+
+        #upper bound, master lower bound and gap of each master iteration
+        self.history = list()
+        self.block_ranges = list()
+        self.solve_time = None
+        self.converged = False
+        self.executor = None
+        self.executor_workers = None
+        #hash and pickle of the model data of the current optimize call
+        self.version = None
+        self.template = None
+
+
+    def get_block_ranges(self, opt_model):
+        '''
+        Method to split the simulation steps of the optimization model into blocks
+
+        Parameters
+        ----------
+        opt_model : class. Optimization_model instance
+
+        Returns
+        -------
+        block_ranges : list. Tuples of first and last (excluded) time step of each block
+        '''
+        steps = opt_model.simulation_steps
+        if self.blocks == 'month' and len(opt_model.sim.timeindex) >= steps:
+            time_index = pd.DatetimeIndex(opt_model.sim.timeindex[:steps])
+            months = np.asarray(time_index.year * 12 + time_index.month)
+            starts = [0] + (np.flatnonzero(np.diff(months)) + 1).tolist()
+        else:
+            num_blocks = 12 if self.blocks == 'month' else int(self.blocks)
+            starts = [int(split[0]) for split in np.array_split(np.arange(steps), num_blocks) if len(split)]
+
+        return list(zip(starts, starts[1:] + [steps]))
+
+
+    @staticmethod
+    def get_template(opt_model):
+        '''
+        Method to get the optimization model data all blocks are cut from, without Pyomo model and run helpers
+
+        Parameters
+        ----------
+        opt_model : class. Optimization_model instance after update_model_data
+
+        Returns
+        -------
+        template : class. Shallow copy of opt_model
+        '''
+        template = copy.copy(opt_model)
+        template.model = None
+        template.opt = None
+        template.decomposition = None
+        template.fixed_point = None
+        template.profiler = None
+        template.checkpoint = None
+        #block solves change with the linking values of every iteration and need the duals of the linking constraints
+        template.solver_cache = None
+        template.solver_stats = list()
+        #LCOE and costs refer to the whole horizon
+        template.horizon_steps = opt_model.simulation_steps
+
+        return template
+
+
+    @staticmethod
+    def get_block_model(template, block, start, stop, num_blocks):
+        '''
+        Method to build the optimization model of one block with linking constraints for the size modifiers
+        and the boundary states of charge, whose values are set by the master problem
+
+        Parameters
+        ----------
+        template : class. Optimization_model data of the whole horizon (see get_template)
+        block : int. Index of block
+        start, stop : int. First and last (excluded) time step of block
+        num_blocks : int. Number of blocks
+
+        Returns
+        -------
+        block_model : class. Optimization_model instance of block with built Pyomo model
+        '''
+        block_model = copy.copy(template)
+        block_model.simulation_steps = stop - start
+        block_model.solver_stats = list()
+        #own persistent solver instances per block
+        block_model.solver_backend = copy.copy(template.solver_backend)
+        for name in Decomposition.series_attributes:
+            values = getattr(template, name)
+            setattr(block_model, name, values[start:stop] if len(values) else values)
+        for name in Decomposition.pv_series_attributes:
+            setattr(block_model, name, [values[start:stop] if len(values) else values for values in getattr(template, name)])
+
+        block_model.init_model()
+        m = block_model.model
+        linear = block_model.linear_model
+        n = block_model.simulation_steps
+
+        #linked quantities: key, expression, soft (boundary states of charge) and bounds of master variable
+        linking = list()
+        for b in m.pv_sources_set:
+            pv_block = m.pv_comp_block[b]
+            if pv_block.pv_peak_mod.ctype is pyo.Var:
+                upper = min(pv_block.pv_peak_mod[1].ub, pyo.value(pv_block.max_pv_kWp / pv_block.pv_array_kWp))
+                linking.append((('pv_peak_mod', b), pv_block.pv_peak_mod[1], False, (pv_block.pv_peak_mod[1].lb, upper)))
+        battery_peak_mod = m.battery_peak_mod[1]
+        if m.battery_peak_mod.ctype is pyo.Var:
+            bat_block = m.battery_comp_block[1]
+            upper = min(battery_peak_mod.ub, pyo.value(bat_block.max_battery_capacity / bat_block.bat_array_kWp))
+            linking.append((('battery_peak_mod', 1), battery_peak_mod, False, (battery_peak_mod.lb, upper)))
+
+        for b in m.battery_arrays_set:
+            bat_block = m.battery_comp_block[b]
+            capacity = block_model.get_values(bat_block.battery_capacity_current_wh)
+            soc_bounds = (template.SOC_min, template.SOC_max)
+            if linear and m.battery_peak_mod.ctype is pyo.Var:
+                soc_bounds = (template.SOC_min * battery_peak_mod.lb, template.SOC_max * battery_peak_mod.ub)
+            #start of block: state of charge of first time step replaces SOC_start
+            if block > 0:
+                m.SOC_constr[b, 1].deactivate()
+                if linear:
+                    #stored energy is divided by the capacity of the last time step of the previous block, as at its end
+                    capacity_series = template.battery_capacity_current_wh
+                    expr = bat_block.battery_energy[1] / (capacity[0] * capacity_series[start-1] / capacity_series[start])
+                else:
+                    expr = bat_block.battery_SOC[1]
+                linking.append((('boundary', b, block), expr, True, soc_bounds))
+            #end of block: state of charge after last time step is the start of the next block
+            if block < num_blocks - 1:
+                m.last_discharge_constr[b].deactivate()
+                charged_power = bat_block.battery_current_charge_power[n] * bat_block.battery_charging_efficiency[n] * bat_block.battery_charger_efficiency[n]
+                if linear:
+                    expr = (bat_block.battery_energy[n] + charged_power - bat_block.battery_current_discharge_power[n]) / capacity[-1] \
+                        - bat_block.battery_self_discharge * battery_peak_mod
+                else:
+                    expr = bat_block.battery_SOC[n] + (charged_power - bat_block.battery_current_discharge_power[n]) \
+                        / (battery_peak_mod * capacity[-1]) - bat_block.battery_self_discharge
+                linking.append((('boundary', b, block + 1), expr, True, soc_bounds))
+
+        #linking constraints with values set by the master problem, their duals are the cut gradients
+        m.linking_set = pyo.RangeSet(1, len(linking))
+        m.linking_value = pyo.Param(m.linking_set, initialize = {i+1: pyo.value(link[1]) for i, link in enumerate(linking)}, mutable = True)
+        m.linking_slack_up = pyo.Var(m.linking_set, initialize = 0, within = pyo.NonNegativeReals)
+        m.linking_slack_down = pyo.Var(m.linking_set, initialize = 0, within = pyo.NonNegativeReals)
+        def linking_rule(m, i):
+            key, expr, soft, bounds = linking[i-1]
+            if not soft:
+                m.linking_slack_up[i].fix(0)
+                m.linking_slack_down[i].fix(0)
+            return expr + m.linking_slack_up[i] - m.linking_slack_down[i] == m.linking_value[i]
+        m.linking_constr = pyo.Constraint(m.linking_set, rule = linking_rule)
+
+        #missing stored energy at a boundary is priced above shortage of the battery capacity
+        shortage_costs = Decomposition.boundary_penalty * pyo.value(m.shortage_costs)
+        capacity = {link[0]: block_model.get_values(m.battery_comp_block[link[0][1]].battery_capacity_current_wh) for link in linking if link[2]}
+        penalty = [shortage_costs * (capacity[link[0]][0] if link[0][2] == block else capacity[link[0]][-1]) if link[2] else 0 for link in linking]
+        m.econ_obj.deactivate()
+        m.linking_obj = pyo.Objective(expr = m.econ_opt + sum(penalty[i-1] * (m.linking_slack_up[i] + m.linking_slack_down[i]) for i in m.linking_set),
+                                      sense = pyo.minimize)
+        if block_model.auto_scaling and not linear:
+            m.scaling_factor[m.linking_obj] = m.scaling_factor[m.econ_obj]
+        m.dual = pyo.Suffix(direction = pyo.Suffix.IMPORT)
+
+        block_model.block = block
+        block_model.linking_keys = [link[0] for link in linking]
+        block_model.linking_bounds = {link[0]: link[3] for link in linking}
+
+        return block_model
+
+
+    @staticmethod
+    def evaluate_block(block_model, values):
+        '''
+        Method to solve the block model with fixed linking values
+
+        Parameters
+        ----------
+        block_model : class. Optimization_model instance of block (see get_block_model)
+        values : dict. Linking values with linking keys (size modifiers and boundaries), keys not given keep their last value
+
+        Returns
+        -------
+        result : dict. Solved flag, objective (with boundary penalties), costs, deviation from the boundary states of charge,
+            linking values and cut gradients, solve record and the results of get_opt_values
+        '''
+        m = block_model.model
+        for i, key in enumerate(block_model.linking_keys):
+            if key in values:
+                m.linking_value[i+1] = values[key]
+
+        solved = block_model.solve_model()
+        record = block_model.solver_stats[-1]
+        record['block'] = block_model.block
+        result = {'block': block_model.block,
+                  'solved': solved,
+                  'record': record,
+                  'bounds': block_model.linking_bounds}
+        if not solved:
+            return result
+
+        block_model.get_opt_values()
+        result.update({'objective': pyo.value(m.linking_obj),
+                       'costs': pyo.value(m.econ_opt),
+                       'deviation': sum(pyo.value(m.linking_slack_up[i] + m.linking_slack_down[i]) for i in m.linking_set),
+                       'values': {key: pyo.value(m.linking_value[i+1]) for i, key in enumerate(block_model.linking_keys)},
+                       'gradient': {key: m.dual.get(m.linking_constr[i+1], 0.) for i, key in enumerate(block_model.linking_keys)},
+                       'results': {name: getattr(block_model, name) for name in Decomposition.result_attributes},
+                       'pv_LCOE': block_model.pv_LCOE,
+                       'bat_LCOE': block_model.bat_LCOE})
+
+        return result
+
+
+    def evaluate(self, values, send_template = False):
+        '''
+        Method to solve all blocks with fixed linking values, in worker processes if available
+
+        Parameters
+        ----------
+        values : dict. Linking values with linking keys
+        send_template : boolean. Toggle whether the model data is sent with all tasks (first master iteration),
+            otherwise it is only sent again to workers which did not get it yet
+
+        Returns
+        -------
+        results : list. Results of evaluate_block in block order
+        '''
+        num_blocks = len(self.block_ranges)
+        template = self.template if send_template else None
+        tasks = [(self.version, template, block, start, stop, num_blocks, values) for block, (start, stop) in enumerate(self.block_ranges)]
+        if self.executor is None:
+            return [_evaluate_block(task) for task in tasks]
+
+        results = list(self.executor.map(_evaluate_block, tasks))
+        stale = [result['block'] for result in results if result.get('stale')]
+        if stale:
+            tasks = [(self.version, self.template) + tasks[block][2:] for block in stale]
+            for block, result in zip(stale, self.executor.map(_evaluate_block, tasks)):
+                results[block] = result
+
+        return results
+
+
+    def solve_master(self, cuts, center, radius, bounds, opt_model):
+        '''
+        Method to solve the master LP: minimal sum of the block cut models within the trust region
+
+        Parameters
+        ----------
+        cuts : list. Results of evaluate_block of all solved evaluations
+        center : dict. Linking values of the best point
+        radius : dict. Half width of trust region per linking key (None: whole range of the linking values)
+        bounds : dict. Bounds of linking values
+        opt_model : class. Optimization_model instance
+
+        Returns
+        -------
+        lower_bound : float. Master objective (lower bound of the costs within the trust region, of all costs without trust region)
+        values : dict. Linking values of master solution
+        '''
+        keys = list(bounds)
+        index = {key: i+1 for i, key in enumerate(keys)}
+        master = pyo.ConcreteModel()
+        master.linking_set = pyo.RangeSet(1, len(keys))
+        master.block_set = pyo.RangeSet(0, len(self.block_ranges) - 1)
+        def x_bounds(m, i):
+            key = keys[i-1]
+            if radius is None:
+                return bounds[key]
+            return (max(bounds[key][0], center[key] - radius[key]), min(bounds[key][1], center[key] + radius[key]))
+        master.x = pyo.Var(master.linking_set, bounds = x_bounds, initialize = {index[key]: center[key] for key in keys})
+        master.theta = pyo.Var(master.block_set)
+
+        master.cuts = pyo.ConstraintList()
+        for result in cuts:
+            master.cuts.add(master.theta[result['block']] >= result['objective'] \
+                            + sum(result['gradient'][key] * (master.x[index[key]] - result['values'][key]) for key in result['gradient']))
+
+        #linear model: stored energy at boundaries within the state of charge limits of the battery size
+        master.soc_constr = pyo.ConstraintList()
+        for key in keys:
+            size_key = ('battery_peak_mod', 1)
+            if key[0] == 'boundary' and opt_model.linear_model:
+                size = master.x[index[size_key]] if size_key in index else 1
+                master.soc_constr.add(master.x[index[key]] >= opt_model.SOC_min * size)
+                master.soc_constr.add(master.x[index[key]] <= opt_model.SOC_max * size)
+
+        master.obj = pyo.Objective(expr = sum(master.theta[k] for k in master.block_set), sense = pyo.minimize)
+        pyo.SolverFactory(opt_model.solver_backend.get_lp_solver() or 'ipopt').solve(master)
+
+        return pyo.value(master.obj), {key: pyo.value(master.x[index[key]]) for key in keys}
+
+
+    def optimize(self, opt_model):
+        '''
+        Method to optimize the model by temporal decomposition and set its results as Optimization_model.optimize_model does
+
+        Parameters
+        ----------
+        opt_model : class. Optimization_model instance after update_model_data
+
+        Returns
+        -------
+        solved : boolean. True if all blocks were solved and their results are set (see converged for the gap)
+        '''
+        print('---------------------------------------------------------')
+        print('Decomposed optimization procedure start')
+        print('---------------------------------------------------------')
+        start_time = time.perf_counter()
+        self.block_ranges = self.get_block_ranges(opt_model)
+        self.history = list()
+        self.converged = False
+        self.template = pickle.dumps(self.get_template(opt_model))
+        self.version = hashlib.sha1(self.template).hexdigest()
+
+        #worker processes are started on first use and kept, unless the number of workers changes
+        workers = min(self.workers or os.cpu_count() or 1, len(self.block_ranges))
+        if self.executor is not None and self.executor_workers != workers:
+            self.close()
+        if workers > 1 and self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+            self.executor_workers = workers
+        elif workers == 1 and self.version != _worker_version:
+            _init_worker(pickle.loads(self.template), self.version)
+        print('blocks:', len(self.block_ranges), 'workers:', workers)
+
+        #start at the current sizes and the simulated states of charge at the block boundaries
+        values = dict()
+        soc = opt_model.sim.battery_state_of_charge
+        for block, (start, stop) in enumerate(self.block_ranges[1:]):
+            for b in range(1, opt_model.num_battery_arrays + 1):
+                values[('boundary', b, block + 1)] = soc[start] if len(soc) > start else opt_model.SOC_start
+
+        best = None
+        best_costs = np.inf
+        cuts = list()
+        for iteration in range(self.max_iterations):
+            results = self.evaluate(values, send_template = iteration == 0)
+            for result in results:
+                opt_model.add_solver_record(result['record'])
+
+            solved = all(result['solved'] for result in results)
+            if not solved and best is None:
+                print('Decomposition aborted: blocks', [result['block'] for result in results if not result['solved']], 'not solved at start point')
+                return False
+
+            #trust region moves to improved points and shrinks otherwise
+            upper_bound = sum(result['objective'] for result in results) if solved else np.inf
+            if best is None:
+                bounds = dict()
+                for result in results:
+                    bounds.update(result['bounds'])
+                center = dict()
+                for result in results:
+                    center.update(result['values'])
+                radius = {key: self.trust_region * (upper - lower) for key, (lower, upper) in bounds.items()}
+            if upper_bound < best_costs:
+                best = results
+                best_costs = upper_bound
+                for result in results:
+                    center.update(result['values'])
+            else:
+                radius = {key: value / 2 for key, value in radius.items()}
+            if solved:
+                cuts.extend(results)
+
+            if bounds:
+                #the step stays within the trust region, the gap is measured against the lower bound of the whole range
+                _, values = self.solve_master(cuts, center, radius, bounds, opt_model)
+                lower_bound, _ = self.solve_master(cuts, center, None, bounds, opt_model)
+            else:
+                lower_bound = best_costs
+            gap = best_costs - lower_bound
+            deviation = sum(result['deviation'] for result in best)
+            self.history.append({'iteration': iteration + 1, 'upper_bound': upper_bound, 'best': best_costs,
+                                 'lower_bound': lower_bound, 'gap': gap, 'deviation': deviation})
+            print('decomposition iteration', iteration + 1, 'costs', round(upper_bound, 4), 'best', round(best_costs, 4),
+                  'master', round(lower_bound, 4), 'gap', round(gap, 6))
+
+            #gap closed: converged if the blocks of the best point match at their boundaries
+            if gap <= self.tolerance * max(abs(best_costs), 1):
+                self.converged = deviation <= self.boundary_tolerance
+                if not self.converged:
+                    print('Warning: decomposition gap closed, but boundary states of charge deviate by', deviation)
+                break
+
+        if not self.converged and gap > self.tolerance * max(abs(best_costs), 1):
+            print('Warning: decomposition not converged after', self.max_iterations, 'iterations, gap', round(gap, 6),
+                  '- results of the best point found are set')
+        self.set_results(opt_model, best)
+        self.solve_time = time.perf_counter() - start_time
+        self.print_report()
+
+        return True
+
+
+    def set_results(self, opt_model, results):
+        '''
+        Method to set the joined block results to the optimization model
+
+        Parameters
+        ----------
+        opt_model : class. Optimization_model instance
+        results : list. Results of evaluate_block of the best point in block order
+        '''
+        for name in self.result_attributes:
+            setattr(opt_model, name, np.concatenate([np.asarray(result['results'][name]) for result in results], axis=-1))
+
+        #objective of the blocks including the boundary penalties, equal to the costs if the boundaries match
+        opt_model.total_costs_new = sum(result['objective'] for result in results)
+        opt_model.pv_LCOE = results[0]['pv_LCOE']
+        opt_model.LCOE_pv_old = list(results[0]['pv_LCOE'])
+        opt_model.bat_LCOE = results[0]['bat_LCOE']
+
+        values = dict()
+        for result in results:
+            values.update(result['values'])
+        opt_model.pv_peak_mod_list = [values.get(('pv_peak_mod', i+1), 1.) for i in range(len(opt_model.sim.pv))]
+        opt_model.batt_peak_mod = values.get(('battery_peak_mod', 1), 1.)
+        opt_model.pv_max_possible_power = list(opt_model.pv_max_power_start)
+
+
+    def report(self):
+        '''
+        Method to get the convergence report of the decomposition
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        report : dict. Number of blocks, iterations, convergence, best costs, final gap, deviation from the boundary states of charge and time [s]
+        '''
+        return {'blocks': len(self.block_ranges),
+                'iterations': len(self.history),
+                'converged': self.converged,
+                'costs': self.history[-1]['best'] if self.history else None,
+                'gap': self.history[-1]['gap'] if self.history else None,
+                'deviation': self.history[-1]['deviation'] if self.history else None,
+                'solve_time': self.solve_time}
+
+
+    def print_report(self):
+        '''
+        Method to print the convergence report of the decomposition
+
+        Parameters
+        ----------
+        None
+        '''
+        report = self.report()
+        print('-------Temporal decomposition-------')
+        print('blocks:', report['blocks'], 'iterations:', report['iterations'], 'converged:', report['converged'])
+        print('total costs:', report['costs'], 'gap:', report['gap'], 'boundary deviation:', report['deviation'], 'time [s]:', report['solve_time'])
+
+
+    def close(self):
+        '''
+        Method to shut the worker processes down
+
+        Parameters
+        ----------
+        None
+        '''
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+            self.executor_workers = None
@@ -0,0 +1,295 @@
+import numpy as np
+
+class Fixed_Point():
+    '''
+    Convergence acceleration of the fixed point iteration between Simulation and Optimization_model.
+    The efficiency vectors which the simulation returns for the optimization results of an iteration (x_k+1 = G(x_k))
+    are replaced by relaxed or Anderson accelerated vectors before the next optimization model is built.
+
+    Methods
+    -------
+    evaluate
+    update
+    is_converged
+    get_residual
+    get_anderson_step
+    report
+    print_report
+
+    Note
+    ----
+    - plain: keeps the iteration x_k+1 = G(x_k) and only monitors the residuals
+    - relaxation: x_k+1 = (1 - relaxation) * x_k + relaxation * G(x_k)
+    - anderson: type II Anderson acceleration with memory of the last iterations and damping with relaxation.
+      The history is restarted with a plain step whenever the residual grows
+    - the residual of an iteration is evaluated as soon as the simulation is updated with its optimization results,
+      so that convergence is checked on the vectors of the current iteration
+    - only efficiencies are blended: capacities (e.g. battery_capacity_current_wh) depend on the sizes of the last optimization
+      run and are passed unchanged
+    - vectors are normalized with their magnitude
+    '''
+
+    #efficiency vectors exchanged between Simulation and Optimization_model with their bounds
+    vector_bounds = {'pv_charger_efficiency': (0, 1),
+                     'battery_charger_efficiency': (0, 1),
+                     'battery_discharger_efficiency': (0, 1),
+                     'battery_charging_efficiency': (0, 1),
+                     'battery_discharging_efficiency': (0, 1)}
+    #simulation attributes the vectors of Optimization_model are updated from
+    simulation_attributes = {'pv_charger_efficiency': 'pv_charger_efficiency',
+                             'battery_charger_efficiency': 'battery_management_charger_efficiency',
+                             'battery_discharger_efficiency': 'battery_management_discharger_efficiency',
+                             'battery_charging_efficiency': 'battery_charging_efficiency',
+                             'battery_discharging_efficiency': 'battery_discharging_efficiency'}
+
+    def __init__(self,
+                 strategy = 'plain',
+                 relaxation = 0.7,
+                 memory = 3,
+                 tolerance = 1e-3,
+                 convergence = 'cost',
+                 min_iterations = 2,
+                 reference_iterations = None):
+        '''
+        Parameters
+        ----------
+        strategy : string. Acceleration strategy: 'plain' (no acceleration), 'relaxation' or 'anderson'
+        relaxation : float. Relaxation (damping) factor between 0 and 1
+        memory : int. Number of previous iterations used by Anderson acceleration
+        tolerance : float. Relative residual norm of the exchanged vectors below which the iteration is converged
+        convergence : string. Convergence criterion of Optimization_model.check_iteration_deviation: 'vectors' or 'cost' (total costs only)
+        min_iterations : int. Minimal number of optimization iterations before convergence on the vectors is accepted
+        reference_iterations : int. Number of iterations of a run of the same case without acceleration (cost criterion) to report the iterations saved (optional)
+        '''
+        self.strategy = strategy
+        self.relaxation = relaxation
+        self.memory = memory
+        self.tolerance = tolerance
+        self.convergence = convergence
+        self.min_iterations = min_iterations
+        self.reference_iterations = reference_iterations
+
+        #normalized vectors used by the optimization model (x_k) and returned by the simulation (G(x_k))
+        self.x_history = list()
+        self.g_history = list()
+        #relative residual norm of each iteration
+        self.residuals = list()
+        #number of restarts of the Anderson history
+        self.restarts = 0
+        #vector returned by the simulation whose residual is evaluated, but which is not used by update yet
+        self.evaluated_vector = None
+        #vector lengths and normalization magnitudes
+        self.layout = None
+
+
+    def get_vectors(self, opt_model, simulation = None):
+        '''
+        Method to get the exchanged vectors of the optimization model (or of the simulation) as one normalized array
+
+        Parameters
+        ----------
+        opt_model : class. Optimization_model instance after update_model_data
+        simulation : class. Simulation instance to get the vectors from instead of the optimization model (optional)
+
+        Returns
+        -------
+        vector : array of floats. Concatenated normalized vectors
+        '''
+        if simulation is None:
+            vectors = [np.asarray(getattr(opt_model, name), dtype=float)[:opt_model.simulation_steps] for name in self.vector_bounds]
+        else:
+            vectors = [np.asarray(getattr(simulation, self.simulation_attributes[name]), dtype=float)[:opt_model.simulation_steps]
+                       for name in self.vector_bounds]
+        if self.layout is None:
+            self.layout = [(name, len(vector), max(np.max(np.abs(vector)), 1e-12)) for name, vector in zip(self.vector_bounds, vectors)]
+
+        return np.concatenate([vector / magnitude for vector, (name, length, magnitude) in zip(vectors, self.layout)])
+
+
+    def set_vectors(self, opt_model, vector):
+        '''
+        Method to set the exchanged vectors of the optimization model from one normalized array, within their bounds
+
+        Parameters
+        ----------
+        opt_model : class. Optimization_model instance
+        vector : array of floats. Concatenated normalized vectors
+        '''
+        start = 0
+        for name, length, magnitude in self.layout:
+            values = vector[start:start+length] * magnitude
+            lower, upper = self.vector_bounds[name]
+            values = np.clip(values, lower, upper)
+            setattr(opt_model, name, values)
+            start += length
+
+
+    def evaluate(self, opt_model):
+        '''
+        Method to get the residual of the vectors which the simulation returns for the optimization results of the last iteration.
+        Called by Optimization_model.check_iteration_deviation after the simulation is updated, before convergence is checked
+
+        Parameters
+        ----------
+        opt_model : class. Optimization_model instance with updated simulation
+
+        Returns
+        -------
+        residual : float. Relative residual norm of the last iteration (None before the first optimization run)
+        '''
+        if len(self.x_history) == 0:
+            return None
+
+        self.evaluated_vector = self.get_vectors(opt_model, opt_model.sim)
+        self.residuals.append(self.get_residual(self.x_history[-1], self.evaluated_vector))
+
+        return self.residuals[-1]
+
+
+    def update(self, opt_model):
+        '''
+        Method to replace the vectors returned by the simulation by the accelerated vectors of the next iteration.
+        Called by Optimization_model.update_model_data
+
+        Parameters
+        ----------
+        opt_model : class. Optimization_model instance after update_model_data
+        '''
+        vector = self.get_vectors(opt_model)
+
+        #first model is built with the start vectors: nothing to accelerate yet
+        if len(self.x_history) == 0:
+            self.x_history.append(vector)
+            return
+
+        x = self.x_history[-1]
+        g = vector
+        self.g_history.append(g)
+        #residual of the iteration is evaluated already, if the convergence was checked after the simulation update
+        if self.evaluated_vector is None:
+            self.residuals.append(self.get_residual(x, g))
+        self.evaluated_vector = None
+
+        #safeguard: restart Anderson history if the residual grows, as the optimization results are not smooth in the vectors
+        if self.strategy == 'anderson' and len(self.residuals) > 1 and self.residuals[-1] > self.residuals[-2]:
+            self.x_history = [x]
+            self.g_history = [g]
+            self.restarts += 1
+
+        if self.strategy == 'relaxation':
+            x_new = (1 - self.relaxation) * x + self.relaxation * g
+        elif self.strategy == 'anderson' and len(self.g_history) > 1:
+            x_new = self.get_anderson_step()
+        elif self.strategy == 'anderson' and self.restarts:
+            #plain step after restart
+            x_new = g
+        elif self.strategy == 'anderson':
+            #first step is a relaxed step, as no history exists
+            x_new = (1 - self.relaxation) * x + self.relaxation * g
+        else:
+            x_new = g
+
+        self.x_history.append(x_new)
+        self.set_vectors(opt_model, x_new)
+        #only the last iterations are needed
+        self.x_history = self.x_history[-(self.memory+2):]
+        self.g_history = self.g_history[-(self.memory+1):]
+
+
+    @staticmethod
+    def get_residual(x, g):
+        '''
+        Method to get the relative residual norm of a fixed point iteration
+
+        Parameters
+        ----------
+        x : array of floats. Vector used by the optimization model
+        g : array of floats. Vector returned by the simulation
+
+        Returns
+        -------
+        residual : float. ||G(x) - x|| / ||x||
+        '''
+        return float(np.linalg.norm(g - x) / max(np.linalg.norm(x), 1e-12))
+
+
+    def get_anderson_step(self):
+        '''
+        Method to get the next vector by Anderson acceleration (type II) with the last memory iterations
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        x_new : array of floats. Accelerated normalized vector
+        '''
+        depth = min(self.memory, len(self.g_history) - 1)
+        # x and G(x) of the last depth+1 iterations
+        x = np.array(self.x_history[-(depth+1):])
+        g = np.array(self.g_history[-(depth+1):])
+        f = g - x
+
+        delta_f = np.diff(f, axis=0).T
+        delta_x = np.diff(x, axis=0).T
+        gamma = np.linalg.lstsq(delta_f, f[-1], rcond=None)[0]
+
+        x_new = x[-1] - delta_x @ gamma + self.relaxation * (f[-1] - delta_f @ gamma)
+
+        return x_new
+
+
+    def is_converged(self, iteration):
+        '''
+        Method to check whether the exchanged vectors have converged
+
+        Parameters
+        ----------
+        iteration : int. Number of finished optimization iterations
+
+        Returns
+        -------
+        converged : boolean. True if the last relative residual is below tolerance
+        '''
+        return iteration >= self.min_iterations and len(self.residuals) > 0 and self.residuals[-1] < self.tolerance
+
+
+    def report(self):
+        '''
+        Method to get the convergence report of the fixed point iteration
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        report : dict. Strategy, iterations, residuals, Anderson restarts, convergence and iterations saved compared to the reference run
+        '''
+        #the residual of every optimization run is evaluated
+        iterations = len(self.residuals)
+
+        return {'strategy': self.strategy,
+                'iterations': iterations,
+                'residuals': self.residuals,
+                'restarts': self.restarts,
+                'converged': len(self.residuals) > 0 and self.residuals[-1] < self.tolerance,
+                'reference_iterations': self.reference_iterations,
+                'iterations_saved': self.reference_iterations - iterations if self.reference_iterations is not None else None}
+
+
+    def print_report(self):
+        '''
+        Method to print the convergence report of the fixed point iteration
+
+        Parameters
+        ----------
+        None
+        '''
+        report = self.report()
+        print('-------Fixed point iteration-------')
+        print('strategy:', report['strategy'], 'iterations:', report['iterations'], 'converged:', report['converged'], 'restarts:', report['restarts'])
+        print('relative residuals:', [round(residual, 6) for residual in report['residuals']])
+        if report['iterations_saved'] is not None:
+            print('iterations saved:', report['iterations_saved'], 'reference iterations:', report['reference_iterations'])
@@ -0,0 +1,398 @@
+import pyomo.environ as pyo
+from pyomo.common.errors import ApplicationError
+
+class Solver_Backend():
+    '''
+    Solver layer of Optimization_model: selects the NLP and LP solver, configures their options in one place
+    and keeps persistent (appsi) solver instances, so that repeated solves of the same model only pass the changes to the solver.
+
+    Methods
+    -------
+    is_available
+    get_linear_solver
+    get_nlp_solver
+    get_lp_solver
+    get_solver
+    get_layout
+    set_warm_start
+    set_lp_warm_start
+    get_solution
+    solve
+
+    Note
+    ----
+    - appsi solvers are persistent: a re-solve of the same model object (e.g. a decomposition block with new linking values)
+      updates the solver instance instead of writing and presolving the model again
+    - appsi_ipopt does not pass the scaling_factor suffix to Ipopt, so models with user scaling are solved with the NL file interface of ipopt
+    - the linear solver of Ipopt is checked once with a test problem, MA57 (HSL) falls back to MUMPS if it is not installed
+    - warm start: solves of a model with the same layout as the last solved model (e.g. the model rebuilt by init_model
+      in the next iteration of the simulation and optimization loop) start from the last solution. Ipopt (NL file interface)
+      gets the last primal values and bound and constraint multipliers, appsi_highs the last simplex basis
+    '''
+
+    #availability of Ipopt linear solvers, checked once per process
+    linear_solver_status = dict()
+
+    def __init__(self,
+                 linear_solver = 'ma57',
+                 fallback_linear_solver = 'mumps',
+                 nlp_solvers = None,
+                 lp_solvers = None,
+                 options = None,
+                 lp_options = None,
+                 persistent = True,
+                 warm_start = True):
+        '''
+        Parameters
+        ----------
+        linear_solver : string. Linear solver of Ipopt (ma27, ma57, ma86, ma97 of HSL or mumps)
+        fallback_linear_solver : string. Linear solver of Ipopt used if linear_solver is not installed
+        nlp_solvers : list. NLP solvers in order of preference, the first locally available one is used (None: appsi_ipopt, ipopt)
+        lp_solvers : list. LP solvers in order of preference, the first locally available one is used (None: appsi_highs, highs, glpk, cbc)
+        options : dict. Ipopt options, e.g. max_iter, tol, acceptable_tol (None: max_iter 100)
+        lp_options : dict. Options of the LP solver
+        persistent : boolean. Toggle whether persistent (appsi) solver interfaces are used where available
+        warm_start : boolean. Toggle whether solves of a model with the layout of the last solved model start from its solution
+        '''
+        self.linear_solver = linear_solver
+        self.fallback_linear_solver = fallback_linear_solver
+        self.nlp_solvers = ['appsi_ipopt', 'ipopt'] if nlp_solvers is None else list(nlp_solvers)
+        self.lp_solvers = ['appsi_highs', 'highs', 'glpk', 'cbc'] if lp_solvers is None else list(lp_solvers)
+        self.options = {'max_iter': 100} if options is None else dict(options)
+        self.lp_options = dict() if lp_options is None else dict(lp_options)
+        self.persistent = persistent
+        self.warm_start = warm_start
+
+        #persistent solver instances by solver name and availability of solvers
+        self.solvers = dict()
+        self.solver_status = dict()
+        #solver name and layout of the model of the last solve and its solution, to warm start solves of models with the same layout
+        self.last_solver = None
+        self.last_layout = None
+        self.last_solution = None
+        #solver and linear solver used by the last solve and whether it was warm started
+        self.solve_info = dict()
+
+
+    def __copy__(self):
+        '''
+        Copies keep the settings, but not the persistent solver instances (e.g. one backend per decomposition block)
+        '''
+        backend = Solver_Backend.__new__(Solver_Backend)
+        backend.__dict__.update(self.__dict__)
+        backend.options = dict(self.options)
+        backend.lp_options = dict(self.lp_options)
+        backend.solvers = dict()
+        backend.last_solver = None
+        backend.last_layout = None
+        backend.last_solution = None
+        backend.solve_info = dict()
+
+        return backend
+
+
+    def __getstate__(self):
+        #persistent solver instances are bound to the process
+        state = self.__dict__.copy()
+        state['solvers'] = dict()
+        state['last_solver'] = None
+        state['last_layout'] = None
+        state['last_solution'] = None
+
+        return state
+
+
+    def is_available(self, solver_name):
+        '''
+        Method to check whether a solver is locally available
+
+        Parameters
+        ----------
+        solver_name : string. Name of Pyomo solver
+
+        Returns
+        -------
+        available : boolean. True if solver is available
+        '''
+        if solver_name not in self.solver_status:
+            try:
+                self.solver_status[solver_name] = bool(pyo.SolverFactory(solver_name).available(exception_flag=False))
+            except Exception:
+                self.solver_status[solver_name] = False
+
+        return self.solver_status[solver_name]
+
+
+    def get_linear_solver(self):
+        '''
+        Method to get the linear solver of Ipopt: linear_solver if Ipopt solves a test problem with it, fallback_linear_solver otherwise
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        linear_solver : string. Name of linear solver
+        '''
+        if self.linear_solver == self.fallback_linear_solver or not self.is_available('ipopt'):
+            return self.linear_solver
+
+        if self.linear_solver not in Solver_Backend.linear_solver_status:
+            test_model = pyo.ConcreteModel()
+            test_model.x = pyo.Var(initialize = 0)
+            test_model.obj = pyo.Objective(expr = (test_model.x - 1)**2)
+            opt = pyo.SolverFactory('ipopt')
+            opt.options['linear_solver'] = self.linear_solver
+            try:
+                results = opt.solve(test_model, load_solutions = False)
+                available = results.solver.termination_condition == pyo.TerminationCondition.optimal
+            except (ApplicationError, ValueError, RuntimeError):
+                available = False
+            Solver_Backend.linear_solver_status[self.linear_solver] = available
+            if not available:
+                print('Ipopt linear solver', self.linear_solver, 'not available, using', self.fallback_linear_solver)
+
+        if Solver_Backend.linear_solver_status[self.linear_solver]:
+            return self.linear_solver
+
+        return self.fallback_linear_solver
+
+
+    def get_nlp_solver(self, model):
+        '''
+        Method to get the first locally available NLP solver of nlp_solvers which supports the model
+
+        Parameters
+        ----------
+        model : Pyomo model to be solved
+
+        Returns
+        -------
+        solver_name : string. Name of NLP solver (ipopt if none is available, to report the error at solve)
+        '''
+        for solver_name in self.nlp_solvers:
+            if solver_name.startswith('appsi') and (not self.persistent or hasattr(model, 'scaling_factor')):
+                continue
+            if self.is_available(solver_name):
+                return solver_name
+
+        return 'ipopt'
+
+
+    def get_lp_solver(self):
+        '''
+        Method to get the first locally available LP solver of lp_solvers
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        solver_name : string. Name of LP solver, None if no LP solver is available
+        '''
+        for solver_name in self.lp_solvers:
+            if solver_name.startswith('appsi') and not self.persistent:
+                continue
+            if self.is_available(solver_name):
+                return solver_name
+
+        return None
+
+
+    def get_solver(self, solver_name):
+        '''
+        Method to get the solver instance, appsi instances are kept for re-solves
+
+        Parameters
+        ----------
+        solver_name : string. Name of Pyomo solver
+
+        Returns
+        -------
+        opt : Pyomo solver instance
+        '''
+        if not solver_name.startswith('appsi'):
+            return pyo.SolverFactory(solver_name)
+
+        if solver_name not in self.solvers:
+            self.solvers[solver_name] = pyo.SolverFactory(solver_name)
+
+        return self.solvers[solver_name]
+
+
+    @staticmethod
+    def get_layout(model):
+        '''
+        Method to get the layout of the model, which is equal for models rebuilt from data of the same size and settings
+
+        Parameters
+        ----------
+        model : Pyomo model
+
+        Returns
+        -------
+        layout : tuple. Name, type and number of indices of each active variable and constraint component
+        '''
+        return tuple((component.name, component.ctype.__name__, len(component))
+                     for component in model.component_objects((pyo.Var, pyo.Constraint), active=True, descend_into=True))
+
+
+    def set_warm_start(self, model, opt, warm):
+        '''
+        Method to pass the primal values and bound and constraint multipliers of the last solve to Ipopt (NL file interface)
+
+        Parameters
+        ----------
+        model : Pyomo model to be solved
+        opt : Pyomo solver instance of ipopt
+        warm : boolean. True if the last solved model has the layout of model
+        '''
+        #multipliers are imported on every solve and exported on warm started solves
+        for name in ['ipopt_zL_out', 'ipopt_zU_out']:
+            if not hasattr(model, name):
+                setattr(model, name, pyo.Suffix(direction=pyo.Suffix.IMPORT))
+        for name in ['ipopt_zL_in', 'ipopt_zU_in']:
+            if not hasattr(model, name):
+                setattr(model, name, pyo.Suffix(direction=pyo.Suffix.EXPORT))
+        if not hasattr(model, 'dual'):
+            model.dual = pyo.Suffix(direction=pyo.Suffix.IMPORT_EXPORT)
+        else:
+            model.dual.set_direction(pyo.Suffix.IMPORT_EXPORT)
+
+        for name in ['warm_start_init_point', 'warm_start_bound_push', 'warm_start_mult_bound_push', 'mu_init']:
+            opt.options.pop(name, None)
+        if not warm:
+            return
+
+        #components of models with equal layout are iterated in the same order
+        values, lower_multipliers, upper_multipliers, duals = self.last_solution
+        for var, value, lower, upper in zip(model.component_data_objects(pyo.Var, active=True, descend_into=True),
+                                            values, lower_multipliers, upper_multipliers):
+            if not var.fixed and value is not None:
+                var.set_value(value, skip_validation=True)
+            if lower is not None:
+                model.ipopt_zL_in[var] = lower
+            if upper is not None:
+                model.ipopt_zU_in[var] = upper
+        for constr, dual in zip(model.component_data_objects(pyo.Constraint, active=True, descend_into=True), duals):
+            if dual is not None:
+                model.dual[constr] = dual
+        opt.options['warm_start_init_point'] = 'yes'
+        opt.options['warm_start_bound_push'] = 1e-6
+        opt.options['warm_start_mult_bound_push'] = 1e-6
+        opt.options['mu_init'] = 1e-6
+
+
+    def set_lp_warm_start(self, model, opt, warm):
+        '''
+        Method to pass the simplex basis of the last solve to HiGHS (appsi_highs)
+
+        Parameters
+        ----------
+        model : Pyomo model to be solved
+        opt : Pyomo solver instance of appsi_highs
+        warm : boolean. True if the last solved model has the layout of model
+
+        Returns
+        -------
+        warm_start : boolean. True if the basis was accepted by HiGHS
+        '''
+        #re-solve of the same model: the persistent instance keeps the basis of the last solve
+        if model is getattr(opt, '_model', None):
+            return warm
+        if not warm:
+            return False
+
+        #columns and rows of models with equal layout are added in the same order
+        opt.set_instance(model)
+        return str(opt._solver_model.setBasis(self.last_solution)) == 'HighsStatus.kOk'
+
+
+    def get_solution(self, model, solver_name, opt):
+        '''
+        Method to get the solution of the last solve to warm start the next solve
+
+        Parameters
+        ----------
+        model : Pyomo model solved
+        solver_name : string. Name of Pyomo solver
+        opt : Pyomo solver instance
+
+        Returns
+        -------
+        solution : simplex basis (appsi_highs) or primal values, bound multipliers and duals in component order (ipopt), None otherwise
+        '''
+        if solver_name == 'appsi_highs':
+            return opt._solver_model.getBasis()
+        if solver_name != 'ipopt':
+            return None
+
+        variables = list(model.component_data_objects(pyo.Var, active=True, descend_into=True))
+        constraints = model.component_data_objects(pyo.Constraint, active=True, descend_into=True)
+        return ([var.value for var in variables],
+                [model.ipopt_zL_out.get(var) for var in variables],
+                [model.ipopt_zU_out.get(var) for var in variables],
+                [model.dual.get(constr) for constr in constraints])
+
+
+    def solve(self, model, linear = False, nlp_scaling_method = 'gradient-based', solve_options = None):
+        '''
+        Method to solve the model with the NLP or the LP solver and the configured options
+
+        Parameters
+        ----------
+        model : Pyomo model to be solved
+        linear : boolean. True if the model is solved with an LP solver
+        nlp_scaling_method : string. Scaling method of Ipopt (user-scaling for models with scaling_factor suffix)
+        solve_options : dict. Keyword arguments of solve of non persistent solvers (e.g. logfile, report_timing)
+
+        Returns
+        -------
+        results : SolverResults of solve, None if no LP solver is available
+
+        Note
+        ----
+        - raises the errors of the solver interfaces (ApplicationError, ValueError, RuntimeError)
+        - solver and linear solver used and whether the solve was warm started are kept in solve_info
+        '''
+        layout = self.get_layout(model) if self.warm_start else None
+        if linear:
+            solver_name = self.get_lp_solver()
+            self.solve_info = {'solver': solver_name, 'linear_solver': None, 'warm_start': False}
+            if solver_name is None:
+                return None
+            opt = self.get_solver(solver_name)
+            options = self.lp_options
+        else:
+            solver_name = self.get_nlp_solver(model)
+            linear_solver = self.get_linear_solver()
+            self.solve_info = {'solver': solver_name, 'linear_solver': linear_solver, 'warm_start': False}
+            opt = self.get_solver(solver_name)
+            options = dict(self.options)
+            options.update({'linear_solver': linear_solver, 'nlp_scaling_method': nlp_scaling_method})
+        for key, value in options.items():
+            opt.options[key] = value
+
+        warm = self.warm_start and solver_name == self.last_solver and layout == self.last_layout and self.last_solution is not None
+        if solver_name == 'ipopt' and self.warm_start:
+            self.set_warm_start(model, opt, warm)
+            self.solve_info['warm_start'] = warm
+        elif solver_name == 'appsi_highs' and self.warm_start:
+            self.solve_info['warm_start'] = self.set_lp_warm_start(model, opt, warm)
+
+        #appsi interfaces do not support log files and timing reports of the NL file interfaces
+        if solver_name.startswith('appsi') or solve_options is None:
+            solve_options = dict()
+
+        self.last_solver = None
+        results = opt.solve(model, **solve_options)
+        if self.warm_start and pyo.check_optimal_termination(results):
+            self.last_solver = solver_name
+            self.last_layout = layout
+            self.last_solution = self.get_solution(model, solver_name, opt)
+        if solver_name == 'appsi_highs':
+            self.solve_info['iterations'] = opt._solver_model.getInfo().simplex_iteration_count
+
+        return results
@@ -0,0 +1,303 @@
+import os
+import glob
+import json
+import hashlib
+import numpy as np
+import pyomo.environ as pyo
+
+class Solver_Cache():
+    '''
+    On-disk cache of the solutions of Optimization_model: repeated solves of identical model data and options
+    (e.g. the same load slice, prices, efficiencies and LCOE factors in sensitivity runs or repeated experiments)
+    return the variable values and the objective of the cached solve instead of calling the solver.
+
+    Methods
+    -------
+    get_fingerprint
+    get_model_data
+    load
+    set_warm_start
+    save
+    report
+    print_report
+
+    Note
+    ----
+    - the fingerprint is the sha256 hash of the scaled parameter values and variable bounds of the built model,
+      its component layout and the model and solver options
+    - the start values of the variables are not part of the fingerprint unless include_start_values is set,
+      so NLP results are reused regardless of the start point the local optimum was found from
+    - only optimal solves are cached, one compressed npz file per fingerprint, the least recently used files are removed above max_entries
+    - warm start (optional): without an exact match, the variable values of the cached solve of the same model layout with the closest
+      data within warm_start_tolerance are set as start point. Only Ipopt uses it, LP solvers start from their own basis
+    '''
+
+    #options of Optimization_model which change the model beyond its parameter values
+    setting_attributes = ['linear_model', 'exact_ch_eff', 'poly_fit_eff', 'auto_scaling', 'opt_pv_size', 'opt_batt_size',
+                          'order_of_magnitude', 'SOC_min', 'SOC_max']
+    #solver results restored with the cached solution
+    record_attributes = ['solver', 'linear_solver', 'iterations', 'termination_condition', 'solver_status', 'infeasibility', 'objective']
+
+    def __init__(self,
+                 directory = 'data/SolverCache',
+                 warm_start = False,
+                 warm_start_tolerance = 0.05,
+                 warm_start_candidates = 20,
+                 include_start_values = False,
+                 max_entries = 1000):
+        '''
+        Parameters
+        ----------
+        directory : string. Directory the cached solutions are stored in
+        warm_start : boolean. Toggle whether the solution of the closest cached model data is used as start point if no exact match exists
+        warm_start_tolerance : float. Maximal relative distance of the model data of a cached solve to be used as warm start
+        warm_start_candidates : int. Number of most recently used cached solves compared for warm start
+        include_start_values : boolean. Toggle whether the start values of the variables are part of the fingerprint
+        max_entries : int. Maximal number of cached solves (None: unlimited)
+        '''
+        self.directory = directory
+        self.warm_start = warm_start
+        self.warm_start_tolerance = warm_start_tolerance
+        self.warm_start_candidates = warm_start_candidates
+        self.include_start_values = include_start_values
+        self.max_entries = max_entries
+
+        #fingerprint of the layout (options and components) and of the whole model of the last lookup
+        self.layout_fingerprint = None
+        self.fingerprint = None
+        #scaled model data of the last lookup, stored to find near matches
+        self.data = None
+        #lookup statistics
+        self.hits = 0
+        self.misses = 0
+        self.warm_starts = 0
+
+
+    def file_path(self, fingerprint):
+        '''
+        Method to get the file path of a cached solve, files of the same model layout share the prefix
+
+        Parameters
+        ----------
+        fingerprint : string. Fingerprint of model data and options
+
+        Returns
+        -------
+        file_path : string. Path of npz file
+        '''
+        return os.path.join(self.directory, self.layout_fingerprint[:16] + '_' + fingerprint[:32] + '.npz')
+
+
+    def get_model_data(self, model):
+        '''
+        Method to get the component layout and the scaled data (parameter values, variable bounds) of a Pyomo model
+
+        Parameters
+        ----------
+        model : Pyomo model to be solved
+
+        Returns
+        -------
+        layout : list. Name, type and size of the parameters, variables, constraints and objectives
+        data : array of floats. Concatenated parameter values and variable bounds (nan for no bound)
+        '''
+        layout = list()
+        data = list()
+        for param in model.component_objects(pyo.Param, active=True, descend_into=True):
+            values = param.extract_values()
+            layout.append((param.name, 'Param', len(values)))
+            data.append(np.fromiter((pyo.value(value) for value in values.values()), dtype=float, count=len(values)))
+
+        for var in model.component_objects(pyo.Var, active=True, descend_into=True):
+            layout.append((var.name, 'Var', len(var)))
+            data.append(np.fromiter((np.nan if var_data.lb is None else var_data.lb for var_data in var.values()), dtype=float, count=len(var)))
+            data.append(np.fromiter((np.nan if var_data.ub is None else var_data.ub for var_data in var.values()), dtype=float, count=len(var)))
+            data.append(np.fromiter((var_data.fixed for var_data in var.values()), dtype=float, count=len(var)))
+            if self.include_start_values:
+                data.append(np.fromiter((np.nan if var_data.value is None else var_data.value for var_data in var.values()), dtype=float, count=len(var)))
+
+        for component_type in [pyo.Constraint, pyo.Objective]:
+            for component in model.component_objects(component_type, active=True, descend_into=True):
+                layout.append((component.name, component_type.__name__, len(component)))
+
+        return layout, np.concatenate(data)
+
+
+    def get_fingerprint(self, opt_model):
+        '''
+        Method to compute the fingerprint of the scaled model data and options of the built model
+
+        Parameters
+        ----------
+        opt_model : class. Optimization_model instance after init_model
+
+        Returns
+        -------
+        fingerprint : string. sha256 hex digest
+        '''
+        backend = opt_model.solver_backend
+        settings = {name: getattr(opt_model, name, None) for name in self.setting_attributes}
+        settings.update({'options': backend.options if not opt_model.linear_model else backend.lp_options,
+                         'solvers': backend.nlp_solvers if not opt_model.linear_model else backend.lp_solvers,
+                         'linear_solver': backend.linear_solver if not opt_model.linear_model else None})
+        layout, self.data = self.get_model_data(opt_model.model)
+
+        self.layout_fingerprint = hashlib.sha256(json.dumps([settings, layout], sort_keys=True, default=str).encode()).hexdigest()
+        self.fingerprint = hashlib.sha256(self.layout_fingerprint.encode() + np.nan_to_num(self.data, nan=np.inf).tobytes()).hexdigest()
+
+        return self.fingerprint
+
+
+    @staticmethod
+    def set_values(model, entry):
+        '''
+        Method to set the variable values of a cached solve, fixed variables are kept
+
+        Parameters
+        ----------
+        model : Pyomo model to be solved
+        entry : NpzFile. Cached solve
+        '''
+        for var in model.component_objects(pyo.Var, active=True, descend_into=True):
+            values = entry['var:' + var.name]
+            for var_data, value in zip(var.values(), values.tolist()):
+                if not var_data.fixed:
+                    var_data.set_value(None if np.isnan(value) else value, skip_validation=True)
+
+
+    def load(self, opt_model):
+        '''
+        Method to look up the solve of identical model data and options and set its variable values
+
+        Parameters
+        ----------
+        opt_model : class. Optimization_model instance after init_model
+
+        Returns
+        -------
+        record : dict. Solver results of the cached solve, None if no solve is cached
+        '''
+        fingerprint = self.get_fingerprint(opt_model)
+        file_path = self.file_path(fingerprint)
+        if not os.path.exists(file_path):
+            self.misses += 1
+            return None
+
+        try:
+            with np.load(file_path) as entry:
+                self.set_values(opt_model.model, entry)
+                record = json.loads(str(entry['record']))
+        except (OSError, ValueError, KeyError) as error:
+            print('Solver cache entry', file_path, 'not readable:', error)
+            self.misses += 1
+            return None
+        #least recently used entries are removed first
+        os.utime(file_path)
+        self.hits += 1
+
+        return record
+
+
+    def set_warm_start(self, opt_model):
+        '''
+        Method to set the variable values of the cached solve of the same model layout with the closest model data as start point.
+        Called after load found no exact match
+
+        Parameters
+        ----------
+        opt_model : class. Optimization_model instance after init_model
+
+        Returns
+        -------
+        warm_start : boolean. True if a cached solve within warm_start_tolerance was found
+        '''
+        file_paths = glob.glob(os.path.join(self.directory, self.layout_fingerprint[:16] + '_*.npz'))
+        file_paths = sorted(file_paths, key=os.path.getmtime, reverse=True)[:self.warm_start_candidates]
+        norm = max(np.linalg.norm(np.nan_to_num(self.data)), 1e-12)
+        closest_path = None
+        closest_distance = self.warm_start_tolerance
+        for file_path in file_paths:
+            try:
+                with np.load(file_path) as entry:
+                    data = entry['data']
+            except (OSError, ValueError, KeyError):
+                continue
+            if data.shape != self.data.shape:
+                continue
+            distance = np.linalg.norm(np.nan_to_num(self.data - data)) / norm
+            if distance <= closest_distance:
+                closest_path = file_path
+                closest_distance = distance
+
+        if closest_path is None:
+            return False
+
+        with np.load(closest_path) as entry:
+            self.set_values(opt_model.model, entry)
+        self.warm_starts += 1
+
+        return True
+
+
+    def save(self, opt_model, record):
+        '''
+        Method to store the variable values and solver results of the last solve under the fingerprint of its lookup
+
+        Parameters
+        ----------
+        opt_model : class. Optimization_model instance after solve_model
+        record : dict. Solver results of the solve
+        '''
+        if self.fingerprint is None:
+            return
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+
+        entry = {'record': np.array(json.dumps({name: record.get(name) for name in self.record_attributes}, default=str)),
+                 'data': self.data}
+        for var in opt_model.model.component_objects(pyo.Var, active=True, descend_into=True):
+            entry['var:' + var.name] = np.fromiter((np.nan if var_data.value is None else var_data.value for var_data in var.values()),
+                                                   dtype=float, count=len(var))
+
+        #replaced atomically, as parallel runs may share the directory
+        file_path = self.file_path(self.fingerprint)
+        temp_path = file_path + '.' + str(os.getpid()) + '.tmp'
+        with open(temp_path, 'wb') as cache_file:
+            np.savez_compressed(cache_file, **entry)
+        os.replace(temp_path, file_path)
+        self.fingerprint = None
+
+        if self.max_entries is not None:
+            file_paths = sorted(glob.glob(os.path.join(self.directory, '*.npz')), key=os.path.getmtime)
+            for old_file_path in file_paths[:max(len(file_paths) - self.max_entries, 0)]:
+                os.remove(old_file_path)
+
+
+    def report(self):
+        '''
+        Method to get the lookup statistics of the cache
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        report : dict. Number of hits, misses and warm starts
+        '''
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'warm_starts': self.warm_starts}
+
+
+    def print_report(self):
+        '''
+        Method to print the lookup statistics of the cache
+
+        Parameters
+        ----------
+        None
+        '''
+        report = self.report()
+        print('-------Solver cache-------')
+        print('hits:', report['hits'], 'misses:', report['misses'], 'warm starts:', report['warm_starts'], 'directory:', self.directory)
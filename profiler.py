@@ -0,0 +1,461 @@
+import os
+import sys
+import json
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+class Profiler:
+    """Collects cumulative run time and call counts of simulation phases
+    (data load, environment, simulate, economics, init_model, solve, ...) and of simulatable components.
+    In memory mode, resident set size and tracemalloc allocations are recorded per phase as well.
+
+    Parameters
+    ----------
+    memory : `boolean`
+        Enables memory accounting of phases (opt-in, tracemalloc slows down execution considerably).
+    top_allocations : `int`
+        Number of code lines with the largest allocation growth reported per phase in memory mode.
+
+    Note
+    ----
+    - Phases are timed with the context manager phase(), e.g.
+        - with profiler.phase('solve'):
+              opt.solve(model)
+    - Simulatable childs are timed in Simulatable.update() if a profiler is set for their parent.
+      Memory is only accounted for phases, not for single component updates.
+      Memory phases should not be nested, as the tracemalloc peak is reset at the start of each phase.
+    - Times are measured with time.perf_counter() in seconds.
+    - On Linux, the peak RSS of a phase is read from VmHWM of /proc/self/status, which is reset at the start
+      of each phase by writing 5 to /proc/self/clear_refs. Elsewhere only the RSS delta of phases is recorded.
+    - The peak RSS of the process is taken from resource.getrusage() (Linux/macOS) or psutil (if installed)
+      before each reset, it is reported separately as process_peak_rss.
+    - Estimated bytes held by simulation results, optimization model and environment data
+      are added to the report with estimate_memory().
+    """
+
+    def __init__(self,
+                 memory=False,
+                 top_allocations=5):
+
+        self.memory = memory
+        self.top_allocations = top_allocations
+        # Records of run time, call counts and memory, with group (phases/components) and name as keys
+        self.records = OrderedDict()
+        # Estimated bytes of simulation and optimization data structures
+        self.memory_estimates = OrderedDict()
+        # [B] Peak resident set size of process (resetting the high water mark of phases lowers ru_maxrss on Linux)
+        self.process_peak_rss = 0
+
+
+    def get_record(self, name, group):
+        """Returns record of phase or component, new records are initialized with zero.
+
+        Parameters
+        ----------
+        name : `string`
+            Name of phase or component.
+        group : `string`
+            Record group, e.g. phases or components.
+        """
+
+        if group not in self.records:
+            self.records[group] = OrderedDict()
+        if name not in self.records[group]:
+            self.records[group][name] = {'time': 0., 'calls': 0}
+
+        return self.records[group][name]
+
+
+    def add(self, name, elapsed_time, group='phases'):
+        """Adds run time of one call to record.
+
+        Parameters
+        ----------
+        name : `string`
+            Name of phase or component.
+        elapsed_time : `float`
+            [s] Run time of call.
+        group : `string`
+            Record group, e.g. phases or components.
+        """
+
+        record = self.get_record(name, group)
+        record['time'] += elapsed_time
+        record['calls'] += 1
+
+
+    @contextmanager
+    def phase(self, name, group='phases'):
+        """Context manager to record run time (and memory in memory mode) of a code block.
+
+        Parameters
+        ----------
+        name : `string`
+            Name of phase.
+        group : `string`
+            Record group.
+        """
+
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            memory_start = tracemalloc.get_traced_memory()[0]
+            snapshot_start = tracemalloc.take_snapshot()
+            self.process_peak_rss = max(self.process_peak_rss, self.get_peak_rss())
+            rss_reset = self.reset_peak_rss()
+            rss_start = self.get_rss()
+
+        time_start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add(name, time.perf_counter() - time_start, group)
+            if self.memory:
+                self.add_memory(name, group, memory_start, snapshot_start, rss_start, rss_reset)
+
+
+    def add_memory(self, name, group, memory_start, snapshot_start, rss_start=0, rss_reset=False):
+        """Adds memory usage of one phase call to record.
+
+        Parameters
+        ----------
+        name : `string`
+            Name of phase.
+        group : `string`
+            Record group.
+        memory_start : `int`
+            [B] Traced memory at start of phase.
+        snapshot_start : `tracemalloc.Snapshot`
+            Tracemalloc snapshot at start of phase.
+        rss_start : `int`
+            [B] Resident set size at start of phase.
+        rss_reset : `boolean`
+            True if the RSS high water mark was reset at start of phase.
+        """
+
+        memory_end, memory_peak = tracemalloc.get_traced_memory()
+        statistics = tracemalloc.take_snapshot().compare_to(snapshot_start, 'lineno')
+
+        record = self.get_record(name, group)
+        # [B] Allocation peak above memory at phase start and memory still held after phase
+        record['traced_peak'] = max(record.get('traced_peak', 0), memory_peak - memory_start)
+        record['traced_delta'] = record.get('traced_delta', 0) + memory_end - memory_start
+        # [B] Peak RSS within phase (Linux only), RSS still held after phase and peak RSS of process up to now
+        if rss_reset:
+            record['phase_peak_rss'] = max(record.get('phase_peak_rss', 0), self.get_phase_peak_rss())
+        record['rss_delta'] = record.get('rss_delta', 0) + self.get_rss() - rss_start
+        self.process_peak_rss = max(self.process_peak_rss, self.get_peak_rss())
+        record['process_peak_rss'] = self.process_peak_rss
+        record['top_allocations'] = [{'line': str(statistic.traceback), 'size_diff': statistic.size_diff, 'count_diff': statistic.count_diff}
+                                     for statistic in statistics[:self.top_allocations]]
+
+
+    @staticmethod
+    def get_peak_rss():
+        """Returns peak resident set size of process in bytes (0 if not measurable).
+
+        Parameters
+        ----------
+        None : `None`
+        """
+
+        if resource is not None:
+            peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # ru_maxrss is given in kilobytes on Linux and in bytes on macOS
+            if sys.platform != 'darwin':
+                peak_rss *= 1024
+            return peak_rss
+        if psutil is not None:
+            memory_info = psutil.Process().memory_info()
+            return getattr(memory_info, 'peak_wset', memory_info.rss)
+
+        return 0
+
+
+    @staticmethod
+    def read_proc_status(key):
+        """Returns value of key in /proc/self/status in bytes (None if not readable, e.g. not on Linux).
+
+        Parameters
+        ----------
+        key : `string`
+            Key of status line, e.g. VmRSS or VmHWM.
+        """
+
+        try:
+            with open('/proc/self/status') as status_file:
+                for line in status_file:
+                    if line.startswith(key + ':'):
+                        # Values are given in kilobytes
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+
+        return None
+
+
+    @staticmethod
+    def reset_peak_rss():
+        """Resets the RSS high water mark (VmHWM) of the process, returns True if it was reset (Linux only).
+
+        Parameters
+        ----------
+        None : `None`
+        """
+
+        try:
+            with open('/proc/self/clear_refs', 'w') as clear_refs:
+                clear_refs.write('5')
+            return True
+        except OSError:
+            return False
+
+
+    @staticmethod
+    def get_phase_peak_rss():
+        """Returns RSS high water mark since the last reset_peak_rss() in bytes (0 if not measurable).
+
+        Parameters
+        ----------
+        None : `None`
+        """
+
+        peak_rss = Profiler.read_proc_status('VmHWM')
+
+        return peak_rss if peak_rss is not None else 0
+
+
+    @staticmethod
+    def get_rss():
+        """Returns current resident set size of process in bytes (0 if not measurable).
+
+        Parameters
+        ----------
+        None : `None`
+        """
+
+        rss = Profiler.read_proc_status('VmRSS')
+        if rss is not None:
+            return rss
+        if psutil is not None:
+            return psutil.Process().memory_info().rss
+
+        return 0
+
+
+    @staticmethod
+    def get_size(value):
+        """Returns estimated bytes held by value, lists and tuples are followed one level deep.
+
+        Parameters
+        ----------
+        value : `object`
+            Value whose size is estimated.
+        """
+
+        if isinstance(value, np.ndarray):
+            return value.nbytes
+        if isinstance(value, (pd.Series, pd.DataFrame)):
+            return int(np.sum(value.memory_usage(deep=True)))
+        if isinstance(value, (list, tuple)):
+            size = sys.getsizeof(value)
+            for entry in value:
+                if isinstance(entry, (list, tuple)):
+                    size += sys.getsizeof(entry) + sum(sys.getsizeof(sub_entry) for sub_entry in entry)
+                else:
+                    size += Profiler.get_size(entry)
+            return size
+
+        return sys.getsizeof(value)
+
+
+    def estimate_memory(self, sim=None, opt_model=None):
+        """Estimates bytes held by simulation result series, environment data and optimization model
+        and adds them to report.
+
+        Parameters
+        ----------
+        sim : `class`
+            Simulation instance (optional).
+        opt_model : `class`
+            Optimization_model instance (optional).
+
+        Returns
+        -------
+        memory_estimates : `dict`
+            Estimated bytes per data structure and totals per group.
+        """
+
+        if sim is not None:
+            # Result series of simulation (lists and arrays)
+            series = OrderedDict()
+            for name, value in sim.__dict__.items():
+                if isinstance(value, (list, np.ndarray)) and len(value) and name not in ['pv', 'childs']:
+                    series[name] = self.get_size(value)
+            self.memory_estimates['simulation_series'] = series
+
+            # Pandas data of environment, pv arrays and load
+            frames = OrderedDict()
+            sources = [('env', sim.env), ('load', sim.load)] + [('pv_' + str(i), sim.pv[i]) for i in range(len(sim.pv))]
+            for source_name, source in sources:
+                for name, value in source.__dict__.items():
+                    if isinstance(value, (pd.Series, pd.DataFrame)):
+                        frames[source_name + '.' + name] = self.get_size(value)
+            self.memory_estimates['environment_frames'] = frames
+
+        if opt_model is not None:
+            # Result series of optimization model
+            series = OrderedDict()
+            for name, value in opt_model.__dict__.items():
+                if isinstance(value, (list, np.ndarray)) and len(value):
+                    series[name] = self.get_size(value)
+            self.memory_estimates['optimization_series'] = series
+
+            # Number of Pyomo model components
+            if getattr(opt_model, 'model', None) is not None:
+                import pyomo.environ as pyo
+                model = opt_model.model
+                self.memory_estimates['pyomo_model'] = OrderedDict([
+                    ('variables', model.nvariables()),
+                    ('constraints', model.nconstraints()),
+                    ('parameters', sum(1 for _ in model.component_data_objects(pyo.Param, descend_into=True))),
+                    ('blocks', sum(1 for _ in model.block_data_objects(descend_into=True)))])
+
+        return self.memory_estimates
+
+
+    def reset(self):
+        """Deletes all records and memory estimates.
+
+        Parameters
+        ----------
+        None : `None`
+        """
+
+        self.records = OrderedDict()
+        self.memory_estimates = OrderedDict()
+        self.process_peak_rss = 0
+
+
+    def report(self):
+        """Returns structured report of all records.
+
+        Parameters
+        ----------
+        None : `None`
+
+        Returns
+        -------
+        report : `dict`
+            Cumulative time [s], call count, mean time per call [s] and share of group time [-]
+            for each phase and component, memory records [B] in memory mode and memory estimates [B].
+        """
+
+        report = OrderedDict()
+        for group, records in self.records.items():
+            group_time = sum(record['time'] for record in records.values())
+            report[group] = OrderedDict()
+            for name, record in records.items():
+                report[group][name] = dict(record)
+                report[group][name]['mean_time'] = record['time'] / record['calls'] if record['calls'] else 0.
+                report[group][name]['share'] = record['time'] / group_time if group_time else 0.
+
+        if self.memory_estimates:
+            report['memory_estimates'] = OrderedDict()
+            for group, estimates in self.memory_estimates.items():
+                report['memory_estimates'][group] = dict(estimates)
+                if group != 'pyomo_model':
+                    report['memory_estimates'][group]['total'] = sum(estimates.values())
+
+        return report
+
+
+    def print_report(self):
+        """Prints report sorted by cumulative time for each group.
+
+        Parameters
+        ----------
+        None : `None`
+        """
+
+        report = self.report()
+        for group, records in report.items():
+            if group == 'memory_estimates':
+                continue
+            print('-----------Profile:', group, '-----------')
+            for name, record in sorted(records.items(), key=lambda item: item[1]['time'], reverse=True):
+                print(name.ljust(30), 'time [s]', round(record['time'], 4), 'calls', record['calls'],
+                      'share', round(record['share'], 3))
+                if 'rss_delta' in record:
+                    if 'phase_peak_rss' in record:
+                        print(''.ljust(30), 'phase peak RSS [MB]', round(record['phase_peak_rss']/1e6, 1), end=' ')
+                    else:
+                        print(''.ljust(30), end=' ')
+                    print('RSS delta [MB]', round(record['rss_delta']/1e6, 1),
+                          'process peak RSS [MB]', round(record['process_peak_rss']/1e6, 1),
+                          'traced peak [MB]', round(record['traced_peak']/1e6, 2),
+                          'traced delta [MB]', round(record['traced_delta']/1e6, 2))
+
+        if 'memory_estimates' in report:
+            print('-----------Profile: memory estimates -----------')
+            for group, estimates in report['memory_estimates'].items():
+                if group == 'pyomo_model':
+                    print(group.ljust(30), estimates)
+                else:
+                    print(group.ljust(30), 'total [MB]', round(estimates['total']/1e6, 2))
+                    largest = sorted(((name, size) for name, size in estimates.items() if name != 'total'),
+                                     key=lambda item: item[1], reverse=True)
+                    for name, size in largest[:5]:
+                        print(''.ljust(30), name, '[MB]', round(size/1e6, 2))
+
+
+    def dump(self, file_path):
+        """Writes report to json file.
+
+        Parameters
+        ----------
+        file_path : `string`
+            Path of json file.
+        """
+
+        directory = os.path.dirname(file_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        with open(file_path, 'w') as json_file:
+            json.dump(self.report(), json_file, indent=4)
+
+
+def profile_phase(profiler, name, group='phases'):
+    """Returns phase context manager of profiler or an empty context if no profiler is set.
+
+    Parameters
+    ----------
+    profiler : `class`
+        Profiler instance or None.
+    name : `string`
+        Name of phase.
+    group : `string`
+        Record group.
+    """
+
+    if profiler is None:
+        return nullcontext()
+    return profiler.phase(name, group)
@@ -1,3 +1,5 @@
+import time
+
 class Simulatable:
     """Most central methods to make simulation "simulatable", which means that
     timestep proceeds after the calculation of all component performance of the current timestep.
@@ -19,6 +21,10 @@ class Simulatable:
         
         self.time = -1
         self.childs = list(childs)
+        # Profiler to record run time and call counts of childs (optional)
+        self.profiler = None
+        # Name under which run time is recorded by the profiler of the parent
+        self.profile_name = type(self).__name__
 
 
     def calculate(self):
@@ -83,10 +89,27 @@ class Simulatable:
         # Calls update method for all simulatable childs
         for child in self.childs:
             if isinstance(child, Simulatable):
-                child.update()
+                self.update_child(child)
             elif isinstance(child, list):
                 for i in range(len(child)):
-                    child[i].update()
+                    self.update_child(child[i])
+
+
+    def update_child(self, child):
+        """Method, which updates child and records its run time and call count if a profiler is set.
+
+        Parameters
+        ----------
+        child : `class`
+            Simulatable child to be updated
+        """
+
+        if self.profiler is None:
+            child.update()
+        else:
+            time_start = time.perf_counter()
+            child.update()
+            self.profiler.add(child.profile_name, time.perf_counter() - time_start, group='components')
         
 
 
@@ -1,6 +1,7 @@
 import sys # Define the absolute path for loading other modules
 sys.path.insert(0,'../..')
 
+import numpy as np
 import pvlib
 from datetime import datetime
 
@@ -12,6 +13,8 @@ from components.photovoltaic import Photovoltaic
 from components.power_component import Power_Component
 from components.power_junction import Power_Junction
 from components.battery import Battery
+from checkpoint import Checkpoint
+from profiler import profile_phase
 
 class Simulation(Simulatable):
     '''
@@ -29,7 +32,12 @@ class Simulation(Simulatable):
     
     def __init__(self,
                  simulation_steps,
-                 timestep):
+                 timestep,
+                 profiler = None,
+                 irradiation_file = 'data/env/irradiation-89c990c4-62ac-11ec-a6f1-bc97e153e1e6.csv',
+                 weather_file = 'data/env/SoDa_MERRA2_lat41.965_lon12.795_2000-01-01_2020-01-01_790723248.csv',
+                 load_file = 'data/load/Load_Data.csv',
+                 market_file = None):
         '''
         Parameters can be defined externally or inside class
         ----------
@@ -43,6 +51,12 @@ class Simulation(Simulatable):
             2. tuble entry system latitude in degrees [°]
         simulation_steps : int. Number of simulation steps
         timestep: int. Simulation timestep in seconds
+        profiler : class. Profiler instance to record run time of phases and components (optional)
+        irradiation_file : string. File path of CAMS irradiation timeseries
+        weather_file : string. File path of MERRA weather timeseries
+        load_file : string. File path of load demand profile
+        market_file : string. File path of day ahead market prices or of fixed buy and sell costs 
+            (default: data/market/day_ahead_DE.csv or data/market/consumer_price_list.csv)
         '''
         
         #%% Define simulation settings
@@ -62,6 +76,8 @@ class Simulation(Simulatable):
         self.battery_capacity = 900000
         self.battery_capacity_start = self.battery_capacity 
         self.max_battery_capacity = 3000000
+        # Number of parallel battery strings of equal capacity, sized together by the optimization model
+        self.battery_strings = 1
         #  PV orientation : tuble of floats. PV oriantation with:
         # 1. pv azimuth in degrees [°] (0°=north, 90°=east, 180°=south, 270°=west). & 2. pv inclination in degrees [°]
         self.pv_orientation = (0,0)
@@ -94,6 +110,20 @@ class Simulation(Simulatable):
         # [s] Simulation timestep 
         self.timestep = timestep
         
+        ## Define input data files
+        self.irradiation_file = irradiation_file
+        self.weather_file = weather_file
+        self.load_file = load_file
+        if market_file is None:
+            if self.day_ahead_market:
+                market_file = 'data/market/day_ahead_DE.csv'
+            else:
+                market_file = 'data/market/consumer_price_list.csv'
+        self.market_file = market_file
+        
+        ## Checkpoints to resume long runs (optional)
+        # Checkpoint class instance, e.g. Checkpoint(directory='data/Checkpoints', interval=720) to save every 720 steps
+        self.checkpoint = None
                 
         #%% Initialize classes      
         
@@ -149,27 +179,44 @@ class Simulation(Simulatable):
         Simulatable.__init__(self, self.env,self.load,self.pv, self.pv_power_junction, self.pv_charger,
                              self.power_junction, self.battery_management, self.battery)
         
+        # Profiler records run time of childs under their attribute names
+        self.profiler = profiler
+        for name, component in self.get_components().items():
+            component.profile_name = name
+        
+        with profile_phase(self.profiler, 'data load'):
+            self.load_data()
+    
+    
+    def load_data(self):
+        '''
+        Method to load hourly timeseries data of irradiation, weather, load demand and market
+        
+        Parameters
+        ----------
+        None
+        '''
         # load hourly data
         #Load timeseries irradiation data
-        self.env.meteo_irradiation.read_csv(file_name='data/env/irradiation-89c990c4-62ac-11ec-a6f1-bc97e153e1e6.csv',
+        self.env.meteo_irradiation.read_csv(file_name=self.irradiation_file,
                                            start=0, 
                                            end=self.simulation_steps)
         #Load weather data
-        self.env.meteo_weather.read_csv(file_name='data/env/SoDa_MERRA2_lat41.965_lon12.795_2000-01-01_2020-01-01_790723248.csv', 
+        self.env.meteo_weather.read_csv(file_name=self.weather_file, 
                                        start=0, 
                                        end=self.simulation_steps)
         #Load load demand data
-        self.load.load_demand.read_csv(file_name='data/load/Load_Data.csv', 
+        self.load.load_demand.read_csv(file_name=self.load_file, 
                                       start=0, 
                                       end=8760)
         
         #load day_ahead market data or cost fixed buy and sell costs
         if self.day_ahead_market:
-            self.market.load_market_data.read_csv(file_name='data/market/day_ahead_DE.csv',
+            self.market.load_market_data.read_csv(file_name=self.market_file,
                                               start=0,
                                               end=self.simulation_steps)
         else:
-            self.market.load_market_data.read_csv(file_name='data/market/consumer_price_list.csv',
+            self.market.load_market_data.read_csv(file_name=self.market_file,
                                               start=0,
                                               end=2)
         self.market.calculate()
@@ -177,15 +224,16 @@ class Simulation(Simulatable):
    
     
     #%% run simulation for every timestep
-    def simulate(self):
+    def simulate(self, resume=False):
         '''
         Central simulation method, which :
             initializes all list containers to store simulation results
             iterates over all simulation timesteps and calls Simulatable.start/update/end()
+            saves a checkpoint at every checkpoint interval and at the end of the simulation (if checkpoint is set)
         
         Parameters
         ----------
-        None        
+        resume : boolean. Restart simulation from latest checkpoint without recomputing earlier steps        
         '''
         ## Initialization of list containers to store simulation results                               
         # Timeindex
@@ -245,67 +293,79 @@ class Simulation(Simulatable):
             print(datetime.today().strftime('%Y-%m-%d %H:%M:%S'), ' Start')
             
             ## pvlib: irradiation and weather data
-            self.env.load_data()
+            with profile_phase(self.profiler, 'environment'):
+                self.env.load_data()
+                ## pvlib: pv power
+                for i in range(len(self.pv)):
+                    self.pv[i].load_data()
             ## Timeindex from irradiation data file
             time_index = self.env.time_index   
-            ## pvlib: pv power
-            for i in range(len(self.pv)):
-                self.pv[i].load_data()
             
             ## Call start method (inheret from Simulatable) to start simulation
             self.start()
+            
+            ## Restore component states and results of earlier steps from latest checkpoint
+            time_start = 0
+            if resume and self.checkpoint is not None:
+                time_start = self.load_checkpoint(label='simulate')
+                print(datetime.today().strftime('%Y-%m-%d %H:%M:%S'), ' Resume at step', time_start)
                              
             ## Iteration over all simulation steps
-            for t in range(0, self.simulation_steps):
-                ## Call update method to call calculation method and go one simulation step further
-                self.update()
+            with profile_phase(self.profiler, 'simulate'):
+                for t in range(time_start, self.simulation_steps):
+                    ## Call update method to call calculation method and go one simulation step further
+                    self.update()
                 
-                # Time index
-                self.timeindex.append(time_index[t])
-                # Load demand
-                self.load_power_demand.append(self.load.power) 
-                # PV
-                for i in range(len(self.pv)):
-                    self.pv_power[i].append(self.pv[i].power)
-                    self.pv_temperature[i].append(self.pv[i].temperature)
-                    self.pv_peak_power_current[i].append(self.pv[i].peak_power_current)
-                # pv_charger
-                self.pv_charger_power.append(self.pv_charger.power)
-                self.pv_charger_efficiency.append(self.pv_charger.charger_efficiency)
-                # Power junction
-                self.power_junction_power.append(self.power_junction.power)
-                # BMS
-                self.battery_management_power.append(self.battery_management.power)
-                self.battery_management_charger_efficiency.append(self.battery_management.charger_efficiency)
-                self.battery_management_discharger_efficiency.append(self.battery_management.discharger_efficiency)                
-                # Battery
-                self.battery_power.append(self.battery.power_battery)
-                if self.battery.power_battery > 0:
-                    self.battery_charge_power.append(self.battery.power_battery)
-                else:
-                    self.battery_charge_power.append(0)
-                self.battery_charging_efficiency.append(self.battery.charging_efficiency)
-                self.battery_discharging_efficiency.append(self.battery.discharging_efficiency)
-                self.battery_power_loss.append(self.battery.power_loss)
-                self.battery_temperature.append(self.battery.temperature)
-                self.battery_state_of_charge.append(self.battery.state_of_charge)
-                self.battery_state_of_health.append(self.battery.state_of_health)
-                self.battery_capacity_current_wh.append(self.battery.capacity_current_wh)
-                self.battery_capacity_loss_wh.append(self.battery.capacity_loss_wh)
-                self.battery_voltage.append(self.battery.voltage)
-                # Component state of destruction
+                    # Time index
+                    self.timeindex.append(time_index[t])
+                    # Load demand
+                    self.load_power_demand.append(self.load.power) 
+                    # PV
+                    for i in range(len(self.pv)):
+                        self.pv_power[i].append(self.pv[i].power)
+                        self.pv_temperature[i].append(self.pv[i].temperature)
+                        self.pv_peak_power_current[i].append(self.pv[i].peak_power_current)
+                    # pv_charger
+                    self.pv_charger_power.append(self.pv_charger.power)
+                    self.pv_charger_efficiency.append(self.pv_charger.charger_efficiency)
+                    # Power junction
+                    self.power_junction_power.append(self.power_junction.power)
+                    # BMS
+                    self.battery_management_power.append(self.battery_management.power)
+                    self.battery_management_charger_efficiency.append(self.battery_management.charger_efficiency)
+                    self.battery_management_discharger_efficiency.append(self.battery_management.discharger_efficiency)                
+                    # Battery
+                    self.battery_power.append(self.battery.power_battery)
+                    if self.battery.power_battery > 0:
+                        self.battery_charge_power.append(self.battery.power_battery)
+                    else:
+                        self.battery_charge_power.append(0)
+                    self.battery_charging_efficiency.append(self.battery.charging_efficiency)
+                    self.battery_discharging_efficiency.append(self.battery.discharging_efficiency)
+                    self.battery_power_loss.append(self.battery.power_loss)
+                    self.battery_temperature.append(self.battery.temperature)
+                    self.battery_state_of_charge.append(self.battery.state_of_charge)
+                    self.battery_state_of_health.append(self.battery.state_of_health)
+                    self.battery_capacity_current_wh.append(self.battery.capacity_current_wh)
+                    self.battery_capacity_loss_wh.append(self.battery.capacity_loss_wh)
+                    self.battery_voltage.append(self.battery.voltage)
+                    # Component state of destruction
                 
-                for i in range(len(self.pv)):
-                    self.photovoltaic_state_of_destruction[i].append(self.pv[i].state_of_destruction)
-                self.battery_state_of_destruction.append(self.battery.state_of_destruction)
-                self.pv_charger_state_of_destruction.append(self.pv_charger.state_of_destruction)
-                self.battery_management_state_of_destruction.append(self.battery_management.state_of_destruction)
-                # Component replacement
-                for i in range(len(self.pv)):
-                    self.photovoltaic_replacement[i].append(self.pv[i].replacement)
-                self.battery_replacement.append(self.battery.replacement)
-                self.pv_charger_replacement.append(self.pv_charger.replacement)
-                self.battery_management_replacement.append(self.battery_management.replacement)
+                    for i in range(len(self.pv)):
+                        self.photovoltaic_state_of_destruction[i].append(self.pv[i].state_of_destruction)
+                    self.battery_state_of_destruction.append(self.battery.state_of_destruction)
+                    self.pv_charger_state_of_destruction.append(self.pv_charger.state_of_destruction)
+                    self.battery_management_state_of_destruction.append(self.battery_management.state_of_destruction)
+                    # Component replacement
+                    for i in range(len(self.pv)):
+                        self.photovoltaic_replacement[i].append(self.pv[i].replacement)
+                    self.battery_replacement.append(self.battery.replacement)
+                    self.pv_charger_replacement.append(self.pv_charger.replacement)
+                    self.battery_management_replacement.append(self.battery_management.replacement)
+                
+                    # Checkpoint of component states and results up to t
+                    if self.checkpoint is not None and (self.checkpoint.is_due(t+1) or t+1 == self.simulation_steps):
+                        self.save_checkpoint(label='simulate', time=t+1)
                 
             #total pv energy, after inefficiencies going into load coverage
             for i in range(len(self.pv_power)):
@@ -385,11 +445,7 @@ class Simulation(Simulatable):
         
         # Reset necessary lists
         # PV 
-        self.pv_power = list()
         self.max_possible_power = list()
-        for i in range(len(self.pv)):
-            self.pv_power.append([])
-        pv_power = list()
         # pv_charger
         self.pv_charger_power = list()
         self.pv_charger_efficiency = list()
@@ -412,22 +468,22 @@ class Simulation(Simulatable):
         self.battery_capacity_loss_wh = list()
         self.battery_voltage = list()
         
+        #pv power of all arrays per time step
+        pv_flow = np.asarray(pv_flow, dtype=float)
+        pv_power = np.sum(pv_flow, axis=0).tolist()
+        
         t = 0
         for i in self.battery_flow:
             #get power values at timestep t
-            pv_power = sum(pv_flow[j][t] for j in range(len(self.pv)))
             power_junct_power = self.power_junct_flow[t]
             battery_power = self.battery_flow[t]   
             
             #recalculate battery model with new input values
-            self.pv_charger.recalculate(pv_power)
+            self.pv_charger.recalculate(pv_power[t])
             self.battery_management.recalculate(battery_power)
             self.battery.calculate()   #use standardr calculation method, as data comes from updated battery_management module
             
             # update lists to new values
-            # PV
-            for j in range(len(self.pv)):
-                self.pv_power[j].append(pv_flow[j][t])
             # pv_charger
             self.pv_charger_power.append(self.pv_charger.power)
             self.pv_charger_efficiency.append(self.pv_charger.charger_efficiency)
@@ -460,6 +516,9 @@ class Simulation(Simulatable):
             self.battery_management.time += 1
             self.battery.time += 1
         
+        # PV power of the arrays as passed from optimization model
+        self.pv_power = [pv_flow[j][:t].tolist() for j in range(len(self.pv))]
+        
         #calculate average total generated energy of tech over a year
         #pv
         self.pv_tot_energy = list()
@@ -497,4 +556,74 @@ class Simulation(Simulatable):
         self.pv_peak_change = list()
         for i in range(len(self.pv)):
             self.pv_peak_change.append( self.pv_peak_power[i] /self.pv_peak_power_start[i])
-        self.bat_capa_change = self.battery_capacity/self.battery_capacity_start
\ No newline at end of file
+        self.bat_capa_change = self.battery_capacity/self.battery_capacity_start
+    
+    
+    #%% Save and restore simulation state
+    def get_components(self):
+        '''
+        Method to get all stateful simulation components by name
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        components : dict. Simulation components with attribute name as key, pv arrays with key pv_i
+        '''
+        components = dict()
+        for name in ['load', 'pv_power_junction', 'pv_charger', 'power_junction', 'battery_management', 'battery']:
+            components[name] = getattr(self, name)
+        for i in range(len(self.pv)):
+            components['pv_' + str(i)] = self.pv[i]
+        
+        return components
+    
+    
+    def save_checkpoint(self, label, time=None):
+        '''
+        Method to save a compact checkpoint of the simulation:
+            component states (e.g. state of charge, temperature, current capacity, micro cycle accumulators, time)
+            simulation results up to the current step and system sizes
+        
+        Parameters
+        ----------
+        label : string. Name of checkpoint
+        time : int. Number of finished simulation steps
+        '''
+        state = dict()
+        state['time'] = time
+        state['simulation'] = Checkpoint.get_state(self)
+        state['components'] = dict()
+        for name, component in self.get_components().items():
+            state['components'][name] = Checkpoint.get_state(component)
+        
+        self.checkpoint.save(label, state)
+    
+    
+    def load_checkpoint(self, label):
+        '''
+        Method to restore simulation from checkpoint.
+        Components need to exist (constructed in __init__), only their states are restored
+        
+        Parameters
+        ----------
+        label : string. Name of checkpoint
+        
+        Returns
+        -------
+        time : int. Number of simulation steps finished at checkpoint (0 if no checkpoint found)
+        '''
+        state = self.checkpoint.load(label)
+        if state is None:
+            return 0
+        
+        Checkpoint.set_state(self, state['simulation'])
+        components = self.get_components()
+        for name, component_state in state['components'].items():
+            Checkpoint.set_state(components[name], component_state)
+        
+        if state['time'] is None:
+            return 0
+        return state['time']
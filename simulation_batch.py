@@ -0,0 +1,345 @@
+import numpy as np
+from datetime import datetime
+
+from simulation import Simulation
+from components.photovoltaic import Photovoltaic
+from components.power_component import Power_Component
+from components.power_junction import Power_Junction
+from components.battery import Battery
+
+class Simulation_Batch(Simulation):
+    '''
+    Scenario-batched simulation class, where many technical scenarios of the energy system
+    are simulated together within one object graph.
+    Load power demand, pv peak powers and battery capacities carry a leading scenario dimension
+    and all scenarios are advanced with NumPy broadcasting.
+
+    Attributes
+    ----------
+    Simulation : class. Scalar simulation class the system and data loading is inherited from
+
+    Methods
+    -------
+    simulate
+    get_scenario_results
+    set_scenario
+    '''
+
+    def __init__(self,
+                 simulation_steps,
+                 timestep,
+                 scenarios,
+                 pv_peak_power = None,
+                 battery_capacity = None,
+                 load_scaling = None,
+                 load_power_demand = None,
+                 profiler = None,
+                 irradiation_file = 'data/env/irradiation-89c990c4-62ac-11ec-a6f1-bc97e153e1e6.csv',
+                 weather_file = 'data/env/SoDa_MERRA2_lat41.965_lon12.795_2000-01-01_2020-01-01_790723248.csv',
+                 load_file = 'data/load/Load_Data.csv',
+                 market_file = None):
+        '''
+        Parameters
+        ----------
+        simulation_steps : int. Number of simulation steps
+        timestep: int. Simulation timestep in seconds
+        scenarios : int. Number of scenarios simulated at once
+        pv_peak_power : array of floats (scenarios, number of pv arrays). Installed pv peak power per scenario [Wp].
+            Defaults to the peak power of Simulation for all scenarios
+        battery_capacity : array of floats (scenarios,). Installed battery capacity per scenario [Wh].
+            Defaults to the battery capacity of Simulation for all scenarios
+        load_scaling : array of floats (scenarios,). Scaling factor of the load profile per scenario [-]
+        load_power_demand : array of floats (scenarios, simulation_steps). Load profile per scenario [W].
+            Replaces the load profile of the load class if given
+        profiler : class. Profiler instance to record run time of phases and components (optional)
+        irradiation_file : string. File path of CAMS irradiation timeseries
+        weather_file : string. File path of MERRA weather timeseries
+        load_file : string. File path of load demand profile
+        market_file : string. File path of day ahead market prices or of fixed buy and sell costs
+        '''
+        # Scalar system definition and data loading (done once for all scenarios)
+        Simulation.__init__(self,
+                            simulation_steps=simulation_steps,
+                            timestep=timestep,
+                            profiler=profiler,
+                            irradiation_file=irradiation_file,
+                            weather_file=weather_file,
+                            load_file=load_file,
+                            market_file=market_file)
+
+        #%% Scenario dimension
+        self.scenarios = scenarios
+
+        if pv_peak_power is None:
+            pv_peak_power = np.tile(self.pv_peak_power, (self.scenarios, 1))
+        self.pv_peak_power = np.asarray(pv_peak_power, dtype=float).reshape(self.scenarios, -1)
+        self.pv_peak_power_start = self.pv_peak_power.copy()
+        self.pv_tot_peak = self.pv_peak_power.sum(axis=1)
+
+        if battery_capacity is None:
+            battery_capacity = np.full(self.scenarios, self.battery_capacity)
+        self.battery_capacity = np.asarray(battery_capacity, dtype=float).reshape(self.scenarios)
+        self.battery_capacity_start = self.battery_capacity.copy()
+
+        if load_scaling is None:
+            load_scaling = np.ones(self.scenarios)
+        self.load_scaling = np.asarray(load_scaling, dtype=float).reshape(self.scenarios)
+        self.load_power_demand_input = load_power_demand
+
+        #%% Reconstruct sized components with scenario arrays
+        self.pv = list()
+        for i in range(self.pv_peak_power.shape[1]):
+            pv_array = Photovoltaic(timestep=self.timestep,
+                               peak_power=self.pv_peak_power[:,i],
+                               controller_type='mppt',
+                               env=self.env,
+                               file_path='data/components/photovoltaic_resonix_120Wp.json')
+            self.pv.append(pv_array)
+
+        self.pv_power_junction = Power_Junction(input_link_1=self.pv,
+                                             input_link_2=None,
+                                             load= None)
+
+        self.pv_charger = Power_Component(timestep=self.timestep,
+                                       power_nominal=self.pv_tot_peak,
+                                       input_link=self.pv_power_junction,
+                                       file_path='data/components/power_component_mppt.json')
+
+        self.power_junction = Power_Junction(input_link_1=self.pv_charger,
+                                             input_link_2=None,
+                                             load=self.load)
+
+        self.battery_management = Power_Component(timestep=self.timestep,
+                                                  power_nominal=self.pv_tot_peak,
+                                                  input_link=self.power_junction,
+                                                  file_path='data/components/power_component_bms.json')
+
+        self.battery = Battery(timestep=self.timestep,
+                               capacity_nominal_wh=self.battery_capacity,
+                               input_link=self.battery_management,
+                               env=self.env,
+                               file_path='data/components/battery_lfp.json')
+
+        self.childs = [self.env, self.load, self.pv, self.pv_power_junction, self.pv_charger,
+                       self.power_junction, self.battery_management, self.battery]
+
+
+    #%% run simulation for every timestep and all scenarios
+    def simulate(self):
+        '''
+        Central batched simulation method, which :
+            initializes all array containers with shape (scenarios, simulation_steps)
+            iterates over all simulation timesteps and advances all scenarios at once
+
+        Parameters
+        ----------
+        None
+        '''
+        shape = (self.scenarios, self.simulation_steps)
+        num_pv = len(self.pv)
+
+        ## Initialization of array containers to store simulation results
+        # Timeindex
+        self.timeindex = list()
+        # Load demand
+        self.load_power_demand = np.zeros(shape)
+        # PV
+        self.pv_power = np.zeros((self.scenarios, num_pv, self.simulation_steps))
+        self.pv_temperature = np.zeros((num_pv, self.simulation_steps))
+        self.pv_peak_power_current = np.zeros((self.scenarios, num_pv, self.simulation_steps))
+        # pv_charger
+        self.pv_charger_power = np.zeros(shape)
+        self.pv_charger_efficiency = np.zeros(shape)
+        # Power junction
+        self.power_junction_power = np.zeros(shape)
+        # BMS
+        self.battery_management_power = np.zeros(shape)
+        self.battery_management_charger_efficiency = np.zeros(shape)
+        self.battery_management_discharger_efficiency = np.zeros(shape)
+        # Battery
+        self.battery_power = np.zeros(shape)
+        self.battery_charging_efficiency = np.zeros(shape)
+        self.battery_discharging_efficiency = np.zeros(shape)
+        self.battery_power_loss = np.zeros(shape)
+        self.battery_temperature = np.zeros(shape)
+        self.battery_state_of_charge = np.zeros(shape)
+        self.battery_state_of_health = np.zeros(shape)
+        self.battery_capacity_current_wh = np.zeros(shape)
+        self.battery_capacity_loss_wh = np.zeros(shape)
+        self.battery_voltage = np.zeros(shape)
+        # Component state of destruction
+        self.photovoltaic_state_of_destruction = np.zeros((self.scenarios, num_pv, self.simulation_steps))
+        self.battery_state_of_destruction = np.zeros(shape)
+        self.pv_charger_state_of_destruction = np.zeros(self.simulation_steps)
+        self.battery_management_state_of_destruction = np.zeros(self.simulation_steps)
+        # Component replacement
+        self.photovoltaic_replacement = np.zeros((self.scenarios, num_pv, self.simulation_steps), dtype=int)
+        self.battery_replacement = np.zeros(shape, dtype=int)
+        self.pv_charger_replacement = np.zeros(self.simulation_steps, dtype=int)
+        self.battery_management_replacement = np.zeros(self.simulation_steps, dtype=int)
+
+        # As long as needs_update = True simulation takes place
+        if self.needs_update:
+            print("----OpEnCells batched simulation start----")
+            print(datetime.today().strftime('%Y-%m-%d %H:%M:%S'), ' Start', self.scenarios, 'scenarios')
+
+            ## pvlib: irradiation and weather data (shared by all scenarios)
+            self.env.load_data()
+            time_index = self.env.time_index
+            for i in range(num_pv):
+                self.pv[i].load_data()
+
+            ## Call start method (inheret from Simulatable) to start simulation
+            self.start()
+
+            # Components are advanced in the same order as Simulatable.update()
+            components = [self.load] + self.pv + [self.pv_power_junction, self.pv_charger,
+                          self.power_junction, self.battery_management, self.battery]
+
+            ## Iteration over all simulation steps
+            for t in range(0, self.simulation_steps):
+                # Load demand of all scenarios
+                if self.load_power_demand_input is not None:
+                    self.load.power = self.load_power_demand_input[:,t]
+                else:
+                    self.load.calculate()
+                    self.load.power = self.load.power * self.load_scaling
+                # PV arrays and pv charger
+                for i in range(num_pv):
+                    self.pv[i].calculate_batch()
+                self.pv_power_junction.calculate()
+                self.pv_charger.calculate_batch()
+                # Power junction, BMS and battery
+                self.power_junction.calculate()
+                self.battery_management.calculate_batch()
+                self.battery.calculate_batch()
+
+                for component in components:
+                    component.time += 1
+
+                # Time index
+                self.timeindex.append(time_index[t])
+                # Load demand
+                self.load_power_demand[:,t] = self.load.power
+                # PV
+                for i in range(num_pv):
+                    self.pv_power[:,i,t] = self.pv[i].power
+                    self.pv_temperature[i,t] = self.pv[i].temperature
+                    self.pv_peak_power_current[:,i,t] = self.pv[i].peak_power_current
+                    self.photovoltaic_state_of_destruction[:,i,t] = self.pv[i].state_of_destruction
+                    self.photovoltaic_replacement[:,i,t] = self.pv[i].replacement
+                # pv_charger
+                self.pv_charger_power[:,t] = self.pv_charger.power
+                self.pv_charger_efficiency[:,t] = self.pv_charger.charger_efficiency
+                # Power junction
+                self.power_junction_power[:,t] = self.power_junction.power
+                # BMS
+                self.battery_management_power[:,t] = self.battery_management.power
+                self.battery_management_charger_efficiency[:,t] = self.battery_management.charger_efficiency
+                self.battery_management_discharger_efficiency[:,t] = self.battery_management.discharger_efficiency
+                # Battery
+                self.battery_power[:,t] = self.battery.power_battery
+                self.battery_charging_efficiency[:,t] = self.battery.charging_efficiency
+                self.battery_discharging_efficiency[:,t] = self.battery.discharging_efficiency
+                self.battery_power_loss[:,t] = self.battery.power_loss
+                self.battery_temperature[:,t] = self.battery.temperature
+                self.battery_state_of_charge[:,t] = self.battery.state_of_charge
+                self.battery_state_of_health[:,t] = self.battery.state_of_health
+                self.battery_capacity_current_wh[:,t] = self.battery.capacity_current_wh
+                self.battery_capacity_loss_wh[:,t] = self.battery.capacity_loss_wh
+                self.battery_voltage[:,t] = self.battery.voltage
+                # Component state of destruction and replacement
+                self.battery_state_of_destruction[:,t] = self.battery.state_of_destruction
+                self.battery_replacement[:,t] = self.battery.replacement
+                self.pv_charger_state_of_destruction[t] = self.pv_charger.state_of_destruction
+                self.pv_charger_replacement[t] = self.pv_charger.replacement
+                self.battery_management_state_of_destruction[t] = self.battery_management.state_of_destruction
+                self.battery_management_replacement[t] = self.battery_management.replacement
+
+            self.battery_charge_power = np.maximum(self.battery_power, 0)
+
+            #total pv energy, after inefficiencies going into load coverage
+            self.used_pv_power = self.pv_power.sum(axis=(1,2))
+
+            #calculate average total generated energy of tech over a year
+            years = self.simulation_steps*(self.timestep/3600)/8760
+            #pv
+            self.pv_tot_energy = self.pv_power.sum(axis=2)*(self.timestep/3600)/1000/years
+            #charger
+            self.pv_arrays_tot_energy = self.pv_tot_energy.sum(axis=1)
+            #BM: only positive power flows into battery, i.e. charge case, count into battery energy
+            self.battery_management_tot_energy = np.maximum(self.power_junction_power, 0).sum(axis=1)*(self.timestep/3600)/1000/years
+            #battery
+            self.battery_tot_energy = self.battery_charge_power.sum(axis=1)*(self.timestep/3600)/1000/years
+
+            ## Simulation over: set needs_update to false and call end method
+            self.needs_update = False
+            print(datetime.today().strftime('%Y-%m-%d %H:%M:%S'), ' End')
+            self.end()
+
+
+    def get_scenario_results(self, scenario):
+        '''
+        Method to extract the simulation results of a single scenario in the list format of the scalar Simulation
+
+        Parameters
+        ----------
+        scenario : int. Index of scenario along the leading scenario dimension
+
+        Returns
+        -------
+        results : dict. Simulation result series of the given scenario
+        '''
+        results = dict()
+        for name, value in self.__dict__.items():
+            if isinstance(value, np.ndarray) and value.ndim >= 2 and value.shape[0] == self.scenarios \
+                and value.shape[-1] == self.simulation_steps:
+                results[name] = value[scenario].tolist()
+
+        return results
+
+
+    def set_scenario(self, simulation, scenario):
+        '''
+        Method to write the results of a single scenario into a scalar Simulation instance, which is not simulated itself,
+        e.g. to evaluate the samples of a sensitivity analysis without optimization with Economics and Performance
+
+        Parameters
+        ----------
+        simulation : class. Scalar Simulation instance with the same system definition
+        scenario : int. Index of scenario along the leading scenario dimension
+
+        Returns
+        -------
+        simulation : class. Simulation instance with the results of the scenario
+        '''
+        for name, value in self.get_scenario_results(scenario).items():
+            setattr(simulation, name, value)
+        # Series shared by all scenarios
+        simulation.timeindex = list(self.timeindex)
+        simulation.pv_temperature = self.pv_temperature.tolist()
+        for name in ['pv_charger_state_of_destruction', 'pv_charger_replacement',
+                     'battery_management_state_of_destruction', 'battery_management_replacement']:
+            setattr(simulation, name, getattr(self, name).tolist())
+
+        # Sizes and energies of the scenario
+        simulation.pv_peak_power = self.pv_peak_power[scenario].tolist()
+        simulation.pv_tot_peak = float(self.pv_tot_peak[scenario])
+        simulation.battery_capacity = float(self.battery_capacity[scenario])
+        simulation.used_pv_power = float(self.used_pv_power[scenario])
+        simulation.pv_tot_energy = self.pv_tot_energy[scenario].tolist()
+        simulation.pv_arrays_tot_energy = float(self.pv_arrays_tot_energy[scenario])
+        simulation.battery_management_tot_energy = float(self.battery_management_tot_energy[scenario])
+        simulation.battery_tot_energy = float(self.battery_tot_energy[scenario])
+
+        # State of destruction of components at the end of simulation (for economic calculation)
+        components = [(simulation.pv[i], self.pv[i]) for i in range(len(self.pv))]
+        components += [(simulation.pv_charger, self.pv_charger),
+                       (simulation.battery_management, self.battery_management),
+                       (simulation.battery, self.battery)]
+        for component, component_batch in components:
+            state_of_destruction = np.broadcast_to(component_batch.state_of_destruction, (self.scenarios,))
+            component.state_of_destruction = float(state_of_destruction[scenario])
+        simulation.needs_update = False
+
+        return simulation